@@ -0,0 +1,223 @@
+"""Command line front end for the analysis core, for cron/CI runs without the Tk GUI.
+
+Examples:
+
+    python analyzer_cli.py usage HR EMPLOYEES --json
+    python analyzer_cli.py usage --batch tables.txt --json
+    python analyzer_cli.py table HR EMPLOYEES
+    python analyzer_cli.py table HR EMPLOYEES --count sample
+    python analyzer_cli.py packages HR
+    python analyzer_cli.py search HR get_employee
+    python analyzer_cli.py deps HR EMPLOYEES --depth 3 --format dot > employees.dot
+    python analyzer_cli.py --record hr.replay.gz table HR EMPLOYEES
+    python analyzer_cli.py --replay hr.replay.gz table HR EMPLOYEES
+
+Batch files hold one "SCHEMA TABLE" or "SCHEMA.TABLE" per line; blank lines and lines
+starting with # are skipped. With --json every result is printed as one JSON object per line.
+
+--record saves every database call of the run to a file; --replay answers the same calls from
+it with no database, for profiling and regression runs (see query_replay.py). --perf writes the
+timing of every call and analysis phase as JSON (see perf_trace.py).
+"""
+import argparse
+import json
+import sys
+
+import analyzer_core
+import dependency_graph
+import perf_trace
+import query_replay
+import source_search
+
+
+def read_batch_file(path):
+    targets = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.replace(".", " ").split()
+            if len(parts) != 2:
+                raise ValueError(f"{path}:{line_number}: expected 'SCHEMA TABLE', got {line!r}")
+            targets.append((parts[0].upper(), parts[1].upper()))
+    return targets
+
+
+def get_targets(args):
+    if args.batch:
+        return read_batch_file(args.batch)
+    if not args.schema or not args.table:
+        raise ValueError("SCHEMA and TABLE are required unless --batch is given")
+    return [(args.schema.upper(), args.table.upper())]
+
+
+def usage_result(schema, table, args):
+    usage = analyzer_core.analyze_table_usage(
+        schema, table, use_index=not args.no_index, workers=args.workers
+    )
+    hits = [
+        {"package": pkg, "operation": op, "lines": info["lines"]}
+        for (_, op, pkg), info in sorted(usage.items())
+    ]
+    return {"schema": schema, "table": table, "usage": hits, "packages": len({h["package"] for h in hits})}
+
+
+def print_usage_result(result):
+    print(f"{result['schema']}.{result['table']}:")
+    for hit in result["usage"]:
+        print(f"  - Package: {hit['package']}, Operation: {hit['operation']}, "
+              f"Lines: {', '.join(map(str, hit['lines']))}")
+    print(f"  Total packages using {result['table']}: {result['packages']}")
+
+
+def run_usage(args):
+    failed = False
+    for schema, table in get_targets(args):
+        try:
+            result = usage_result(schema, table, args)
+        except Exception as e:
+            failed = True
+            result = {"schema": schema, "table": table, "error": str(e)}
+            print(f"{schema}.{table}: {e}", file=sys.stderr)
+            if args.json:
+                print(json.dumps(result), flush=True)
+            continue
+
+        if args.json:
+            print(json.dumps(result), flush=True)
+        else:
+            print_usage_result(result)
+    return 1 if failed else 0
+
+
+def run_table(args):
+    for schema, table in get_targets(args):
+        report = analyzer_core.analyze_table(schema, table, count_mode=args.count)
+        if args.json:
+            print(json.dumps({"schema": schema, "table": table, "report": report}), flush=True)
+        else:
+            print(f"===== {schema}.{table} =====")
+            print("\n".join(report))
+    return 0
+
+
+def run_packages(args):
+    rows = analyzer_core.list_packages(args.schema)
+    if args.json:
+        packages = [{"name": name, "status": status, "created": created.isoformat()} for name, status, created in rows]
+        print(json.dumps({"schema": args.schema.upper(), "packages": packages}))
+    else:
+        for name, status, created in rows:
+            print(f"{name}\t{status}\t{created:%Y-%m-%d %H:%M:%S}")
+    return 0
+
+
+def run_search(args):
+    source_search.refresh_search_index(args.schema)
+    hits, seconds = source_search.search_source(
+        args.schema, args.query, whole_word=not args.substring, case_sensitive=args.case_sensitive, regex=args.regex
+    )
+    for hit in hits:
+        if args.json:
+            print(json.dumps(hit._asdict()))
+        else:
+            print(f"{hit.owner}.{hit.name} ({hit.type}) {hit.line}: {hit.text.strip()}")
+    print(f"{len(hits)} hits in {seconds * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+def run_deps(args):
+    direction = "upstream" if args.upstream else "downstream"
+    graph, hits = dependency_graph.impact_analysis(args.schema, args.name, direction, args.depth, args.type)
+    if args.format == "text":
+        print("\n".join(dependency_graph.format_impact(hits, direction)))
+    else:
+        render = dependency_graph.to_dot if args.format == "dot" else dependency_graph.to_json
+        print(render(graph, hits, direction), end="" if args.format == "dot" else "\n")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="package-analyzer", description="Oracle ATP package analyzer (headless)")
+    parser.add_argument("--config", default=analyzer_core.CONFIG_PATH, help="connection settings file")
+    parser.add_argument("--verbose", action="store_true", help="print debug logs to stderr")
+    parser.add_argument("--perf", metavar="FILE", help="save per-query and per-phase timings to FILE as JSON")
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument("--record", metavar="FILE", help="save every database call of this run to FILE")
+    recording.add_argument("--replay", metavar="FILE", help="answer database calls from a --record FILE, offline")
+    parser.add_argument("--replay-latency", type=float, default=0.0, metavar="FACTOR",
+                        help="with --replay, wait FACTOR x the recorded time of each call (default: 0)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name, func, help_text in (
+        ("usage", run_usage, "packages using a table, with operations and line numbers"),
+        ("table", run_table, "full Analyze Table report"),
+    ):
+        cmd = commands.add_parser(name, help=help_text)
+        cmd.add_argument("schema", nargs="?")
+        cmd.add_argument("table", nargs="?")
+        cmd.add_argument("--batch", metavar="FILE", help="analyze every SCHEMA TABLE listed in FILE")
+        cmd.add_argument("--json", action="store_true", help="print one JSON object per table")
+        cmd.add_argument("--workers", type=int, default=analyzer_core.SCAN_WORKERS, help="threads fetching changed packages one query each")
+        cmd.add_argument("--no-index", action="store_true", help="rescan sources instead of using the xref index")
+        cmd.set_defaults(func=func)
+    commands.choices["table"].add_argument(
+        "--count", choices=analyzer_core.ROW_COUNT_MODES, default="stats",
+        help="row count source: optimizer statistics (default), block sample estimate or exact COUNT(*)"
+    )
+
+    cmd = commands.add_parser("packages", help="list the packages in a schema")
+    cmd.add_argument("schema")
+    cmd.add_argument("--json", action="store_true")
+    cmd.set_defaults(func=run_packages)
+
+    cmd = commands.add_parser("search", help="find an identifier or pattern in the schema's PL/SQL sources")
+    cmd.add_argument("schema")
+    cmd.add_argument("query")
+    cmd.add_argument("--substring", action="store_true", help="match inside longer identifiers too")
+    cmd.add_argument("--case-sensitive", action="store_true")
+    cmd.add_argument("--regex", action="store_true", help="treat QUERY as a Python regular expression")
+    cmd.add_argument("--json", action="store_true", help="print one JSON object per hit")
+    cmd.set_defaults(func=run_search)
+
+    cmd = commands.add_parser("deps", help="objects depending on an object (or, with --upstream, that it depends on)")
+    cmd.add_argument("schema")
+    cmd.add_argument("name")
+    cmd.add_argument("--type", help="object type when the name is ambiguous, e.g. 'PACKAGE BODY'")
+    cmd.add_argument("--upstream", action="store_true", help="walk what NAME depends on instead")
+    cmd.add_argument("--depth", type=int, help="levels to follow (default: all)")
+    cmd.add_argument("--format", choices=("text", "json", "dot"), default="text")
+    cmd.set_defaults(func=run_deps)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    analyzer_core.CONFIG_PATH = args.config
+    if args.verbose:
+        analyzer_core.set_log_level("debug")
+    else:
+        analyzer_core.load_log_level()
+
+    recorder = None  # set only once the QueryRecorder is installed
+    try:
+        if args.record:
+            recorder = analyzer_core.data_source = query_replay.QueryRecorder(args.record)
+        elif args.replay:
+            analyzer_core.data_source = query_replay.QueryReplay(args.replay, args.replay_latency)
+        analyzer_core.connect()
+        return args.func(args)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        analyzer_core.close_session_pool()
+        if recorder:
+            recorder.save()
+        if args.perf:
+            perf_trace.export_json(args.perf)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
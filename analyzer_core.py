@@ -0,0 +1,1250 @@
+"""Headless analysis core: database access, package scanning and the cross-reference index.
+
+Has no Tkinter or PIL dependency, so it can be imported by the GUI (package_analyzer.py),
+the command line front end (analyzer_cli.py) or any batch job.
+"""
+import sys
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+import json
+import math
+import re
+import sqlite3
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+import time
+import zlib
+from contextlib import contextmanager, closing
+from datetime import datetime
+
+import oracledb
+
+import perf_trace
+from metadata_cache import MetadataCache
+from plsql_parser import iter_line_operations, scan_source_operations
+
+LOG_LEVELS = ("error", "warn", "info", "debug")
+LOG_LEVEL = "warn"  # set_log_level(), "log_level" in config.json or --verbose on the command line
+DEBUG = False       # LOG_LEVEL == "debug"; test it before building an expensive debug message
+session_pool = None  # Shared oracledb session pool, created on connect
+db_service_name = None
+data_source = None  # QueryRecorder or QueryReplay (query_replay.py); None = the live session pool
+
+
+def set_log_level(level):
+    global LOG_LEVEL, DEBUG
+    if level not in LOG_LEVELS:
+        raise ValueError(f"log level must be one of {', '.join(LOG_LEVELS)}, not {level!r}")
+    LOG_LEVEL = level
+    DEBUG = level == "debug"
+
+def log(level, msg, *args):
+    """Print msg % args to stderr if level is enabled.
+
+    Nothing is formatted for a disabled level, so pass values as args, not in an f-string.
+    """
+    if LOG_LEVELS.index(level) <= LOG_LEVELS.index(LOG_LEVEL):
+        print(f"[{level.upper()}]", msg % args if args else msg, file=sys.stderr)
+
+def debug_log(msg, *args):
+    if DEBUG:
+        print("[DEBUG]", msg % args if args else msg, file=sys.stderr)
+
+# ---------------- Constants and Globals ----------------
+CONFIG_PATH = "config.json"
+DB_USER = DB_PASS = DSN = None
+
+# Session pool sizing/health settings; any of these can be overridden in config.json
+POOL_DEFAULTS = {
+    "pool_min": 1,
+    "pool_max": 8,
+    "pool_increment": 1,
+    "pool_wait_timeout": 10000,  # ms to wait for a free session before failing
+    "pool_ping_interval": 60,    # s idle before a session is health-checked on acquire
+    "pool_timeout": 300,         # s before idle sessions above pool_min are closed
+}
+pool_stats = {"handshake": 0.0, "acquires": 0, "acquire_time": 0.0}
+pool_stats_lock = threading.Lock()
+
+# Local table -> package cross-reference index
+XREF_DB_PATH = "package_xref.db"
+XREF_SCHEMA_VERSION = 3  # bump whenever the scanner changes so old hits are rebuilt
+XREF_BULK_THRESHOLD = 50  # stale packages above this are refetched with one streamed query
+
+# Local PL/SQL source cache, validated against all_objects.last_ddl_time
+SOURCE_DB_PATH = "package_source.db"
+SOURCE_TYPES = ("PACKAGE BODY", "PROCEDURE", "FUNCTION")  # object types whose source is scanned
+SOURCE_IN_LIST_LIMIT = 1000  # Oracle's limit on expressions in an IN list
+
+# Parallel package scanning
+SCAN_WORKERS = 4                  # fetch threads (each borrows its own pooled session); 1 = serial
+
+# Data dictionary cache (tables, columns, constraints, ...); overridable in config.json
+METADATA_CACHE_DEFAULTS = {
+    "metadata_cache_ttl": 900,        # s before a cached lookup is queried again
+    "metadata_cache_size": 5000,      # entries kept; least recently used are dropped first
+    "metadata_cache_persist": False,  # keep the cache in METADATA_CACHE_PATH between sessions
+}
+METADATA_CACHE_PATH = "metadata_cache.json"
+metadata_cache = MetadataCache(METADATA_CACHE_DEFAULTS["metadata_cache_ttl"],
+                               METADATA_CACHE_DEFAULTS["metadata_cache_size"])
+
+
+# ---------------- Configuration I/O ----------------
+def read_config(path=None):
+    with open(path or CONFIG_PATH, "r") as f:
+        return json.load(f)
+
+def load_log_level():
+    """Apply "log_level" from the settings file, if it sets one."""
+    try:
+        level = read_config().get("log_level")
+    except Exception:
+        return
+    if level:
+        set_log_level(level)
+
+def load_pool_settings():
+    settings = dict(POOL_DEFAULTS)
+    try:
+        cfg = read_config()
+        for key in settings:
+            if key in cfg:
+                settings[key] = int(cfg[key])
+    except FileNotFoundError:
+        debug_log("Using default pool settings: no %s", CONFIG_PATH)
+    except Exception as e:
+        log("warn", "Using default pool settings: %s", e)
+    return settings
+
+def load_metadata_cache_settings():
+    settings = dict(METADATA_CACHE_DEFAULTS)
+    try:
+        cfg = read_config()
+        for key, default in settings.items():
+            if key in cfg:
+                settings[key] = type(default)(cfg[key])
+    except FileNotFoundError:
+        debug_log("Using default metadata cache settings: no %s", CONFIG_PATH)
+    except Exception as e:
+        log("warn", "Using default metadata cache settings: %s", e)
+    return settings
+
+# ---------------- Database Operations ----------------
+def connect(user=None, password=None, dsn=None):
+    """(Re)create the session pool and return it with (user, service name).
+
+    Credentials not passed in are read from config.json.
+    """
+    global DB_USER, DB_PASS, DSN, session_pool, db_service_name
+    close_session_pool()
+    if replaying():
+        # No pool: the recorded session stands in, so DSN-keyed caches match the recording
+        DB_USER, DB_PASS, DSN = data_source.user, None, data_source.dsn
+        db_service_name = data_source.service_name
+        configure_metadata_cache()
+        debug_log("[REPLAY] Serving %s@%s from %s", DB_USER, DSN, data_source.path)
+        return None, (DB_USER, db_service_name)
+
+    if user is None:
+        cfg = read_config()
+        user, password, dsn = cfg.get("db_user"), cfg.get("db_password"), cfg.get("dsn")
+    DB_USER, DB_PASS, DSN = user, password, dsn
+
+    settings = load_pool_settings()
+    pool = oracledb.create_pool(
+        user=DB_USER, password=DB_PASS, dsn=DSN,
+        min=settings["pool_min"],
+        max=settings["pool_max"],
+        increment=settings["pool_increment"],
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+        wait_timeout=settings["pool_wait_timeout"],
+        ping_interval=settings["pool_ping_interval"],
+        timeout=settings["pool_timeout"],
+    )
+    debug_log("[POOL] Created session pool %s", settings)
+
+    # The first acquire waits for a brand-new session, so it is the handshake baseline.
+    # The service name is looked up once here instead of on every call.
+    start = time.perf_counter()
+    query = "SELECT SYS_CONTEXT('USERENV','SERVICE_NAME') FROM dual"
+    try:
+        with perf_trace.traced_call("connect", query) as stats:
+            conn = pool.acquire()
+            stats.connect = time.perf_counter() - start
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(query)
+                    db_name = cursor.fetchone()[0]
+                stats.execute = time.perf_counter() - start - stats.connect
+                stats.round_trips = stats.rows = 1
+            finally:
+                pool.release(conn)
+    except Exception:
+        pool.close(force=True)
+        raise
+    handshake = time.perf_counter() - start
+
+    with pool_stats_lock:
+        pool_stats.update(handshake=handshake, acquires=0, acquire_time=0.0)
+    debug_log("[POOL] Initial session handshake took %.1f ms", handshake * 1000)
+
+    session_pool = pool
+    db_service_name = db_name
+    configure_metadata_cache()
+    return pool, (DB_USER, db_name)
+
+def get_session_pool():
+    if replaying():
+        raise RuntimeError(f"No database session: replaying {data_source.path}")
+    if session_pool is None:
+        connect()
+    return session_pool
+
+def replaying():
+    return data_source is not None and data_source.offline
+
+# ---------------- Jobs ----------------
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """Cancellation token for one background operation.
+
+    Code run through job.run() sees it as current_job(). Every session that code borrows
+    with pooled_connection() is registered with the job, so cancel() interrupts calls that
+    are already running on the server (connection.cancel()) as well as stopping the job at
+    its next check(). Jobs are independent: cancelling one never touches another.
+    """
+    def __init__(self, name="job"):
+        self.name = name
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._connections = set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        # Holding the lock keeps a session from being released to the pool mid-cancel
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.cancel()
+                except Exception as e:
+                    debug_log("[%s] cancel failed: %s", self.name, e)
+
+    def check(self):
+        if self.cancelled:
+            raise JobCancelled(f"{self.name} cancelled")
+
+    def run(self, func, *args, **kwargs):
+        """Call func with this job as current_job()."""
+        token = _current_job.set(self)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_job.reset(token)
+
+    def attach(self, conn):
+        with self._lock:
+            self.check()
+            self._connections.add(conn)
+
+    def detach(self, conn):
+        with self._lock:
+            self._connections.discard(conn)
+
+
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+def current_job():
+    return _current_job.get()
+
+def check_cancelled():
+    job = current_job()
+    if job:
+        job.check()
+
+def submit_in_job(executor, func, *args):
+    """executor.submit() that keeps the caller's current_job() in the worker thread."""
+    return executor.submit(contextvars.copy_context().run, func, *args)
+
+@contextmanager
+def pooled_connection():
+    """Borrow a session from the pool and hand it back when the block exits.
+
+    The session is registered with the current job, if any, and errors raised because
+    that job was cancelled (e.g. ORA-01013 from a broken call) become JobCancelled.
+    """
+    job = current_job()
+    if job:
+        job.check()
+    conn = acquire_connection()
+    try:
+        if job:
+            job.attach(conn)
+        yield conn
+    except oracledb.Error as e:
+        if job and job.cancelled:
+            raise JobCancelled(f"{job.name} cancelled") from e
+        raise
+    finally:
+        if job:
+            job.detach(conn)
+        release_connection(conn)
+
+def acquire_connection():
+    """Borrow a session for longer than one block (e.g. an open result cursor).
+    Pair every call with release_connection()."""
+    pool = get_session_pool()
+    start = time.perf_counter()
+    conn = pool.acquire()
+    elapsed = time.perf_counter() - start
+    with pool_stats_lock:
+        pool_stats["acquires"] += 1
+        pool_stats["acquire_time"] += elapsed
+    return conn
+
+def release_connection(conn):
+    # close() hands a pooled session back to the pool it came from. After a forced pool
+    # close (disconnect with a result cursor still open) the session is already gone.
+    try:
+        conn.close()
+    except oracledb.Error as e:
+        debug_log("Session already released: %s", e)
+
+def pool_timing_report():
+    with pool_stats_lock:
+        handshake = pool_stats["handshake"]
+        acquires = pool_stats["acquires"]
+        acquire_time = pool_stats["acquire_time"]
+    if not acquires:
+        return "[POOL] No sessions borrowed yet"
+    avg_acquire = acquire_time / acquires
+    saved = acquires * handshake - acquire_time
+    return (f"[POOL] {acquires} borrows, avg {avg_acquire * 1000:.1f} ms vs "
+            f"{handshake * 1000:.1f} ms per new session; ~{saved:.2f}s of handshakes saved")
+
+def close_session_pool():
+    global session_pool
+    if session_pool:
+        debug_log(pool_timing_report())
+        pool, session_pool = session_pool, None
+        pool.close(force=True)
+        save_metadata_cache()
+
+def fetch_query(query, params=None, on_progress=None, batch_size=1000, on_cancel=None):
+    """Return (columns, rows). Raises JobCancelled (after calling on_cancel) if the current
+    job is cancelled, including while the statement itself is still executing."""
+    if data_source:
+        return data_source.fetch_query(query, params, on_progress, batch_size, on_cancel)
+    return oracle_fetch_query(query, params, on_progress, batch_size, on_cancel)
+
+def stream_query(query, params=None, batch_size=1000):
+    """Yield rows as they are fetched, keeping a single pooled session open."""
+    if data_source:
+        return data_source.stream_query(query, params, batch_size)
+    return oracle_stream_query(query, params, batch_size)
+
+def execute_query(query, params=None):
+    if data_source:
+        return data_source.execute_query(query, params)
+    return oracle_execute_query(query, params)
+
+def oracle_fetch_query(query, params=None, on_progress=None, batch_size=1000, on_cancel=None):
+    job = current_job()
+    results = []
+
+    try:
+        with perf_trace.traced_call("fetch", query) as stats:
+            start = time.perf_counter()
+            with pooled_connection() as conn, conn.cursor() as cursor:
+                cursor.arraysize = batch_size  # one round-trip per fetchmany(), not one per 100 rows
+                stats.connect = time.perf_counter() - start
+                start = time.perf_counter()
+                cursor.execute(query, params or [])
+                stats.execute = time.perf_counter() - start
+                stats.round_trips = 1
+                columns = [desc[0] for desc in cursor.description]
+
+                while True:
+                    if job:
+                        job.check()
+                    start = time.perf_counter()
+                    rows = cursor.fetchmany(batch_size)
+                    stats.fetch += time.perf_counter() - start
+                    if not rows:
+                        break
+                    stats.add_rows(rows, perf_trace.DEFAULT_PREFETCH_ROWS, batch_size)
+                    results.extend(rows)
+                    if on_progress:
+                        on_progress(len(results))
+
+                return columns, results
+    except JobCancelled:
+        if on_cancel:
+            on_cancel()
+        raise
+
+def oracle_stream_query(query, params=None, batch_size=1000):
+    job = current_job()
+
+    with perf_trace.traced_call("stream", query) as stats:
+        start = time.perf_counter()
+        with pooled_connection() as conn, conn.cursor() as cursor:
+            cursor.arraysize = batch_size
+            cursor.prefetchrows = batch_size + 1
+            stats.connect = time.perf_counter() - start
+            start = time.perf_counter()
+            cursor.execute(query, params or [])
+            stats.execute = time.perf_counter() - start
+            stats.round_trips = 1
+            while True:
+                if job:
+                    job.check()
+                start = time.perf_counter()
+                rows = cursor.fetchmany()
+                stats.fetch += time.perf_counter() - start
+                if not rows:
+                    break
+                stats.add_rows(rows, batch_size + 1, batch_size)
+                yield from rows
+
+def oracle_execute_query(query, params=None):
+    with perf_trace.traced_call("execute", query) as stats:
+        start = time.perf_counter()
+        with pooled_connection() as conn:
+            stats.connect = time.perf_counter() - start
+            try:
+                start = time.perf_counter()
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params or [])
+                conn.commit()
+                stats.execute = time.perf_counter() - start
+                stats.round_trips = 2  # execute, commit
+                return True
+            except Exception as e:
+                conn.rollback()
+                raise e
+
+def get_schema_objects(schema, obj_type):
+    return cached_metadata(f"objects:{obj_type}", schema, "", lambda: [row[0] for row in fetch_query(
+        "SELECT object_name FROM all_objects WHERE owner = UPPER(:1) AND object_type = :2 ORDER BY object_name",
+        [schema, obj_type]
+    )[1]])
+
+def get_all_schemas():
+    try:
+        return cached_metadata("schemas", "", "", lambda: [
+            row[0] for row in fetch_query("SELECT username FROM all_users ORDER BY username")[1]
+        ])
+    except:
+        return []
+
+def get_tables(schema):
+    return cached_metadata("tables", schema, "", lambda: [row[0] for row in fetch_query(
+        "SELECT table_name FROM all_tables WHERE owner = UPPER(:1) and TABLE_NAME != 'MY_SQL_SHEETS' ORDER BY table_name", [schema]
+    )[1]])
+
+def get_sequences(schema):
+    return cached_metadata("sequences", schema, "", lambda: [row[0] for row in fetch_query(
+        "SELECT sequence_name FROM all_sequences WHERE sequence_owner = UPPER(:1) ORDER BY sequence_name", [schema]
+    )[1]])
+
+def get_package_source(schema, name, versions=None):
+    """Source rows of a package body (or standalone procedure/function), from the local
+    source cache when it is current. versions is source_versions() of the schema; without
+    it the object's last_ddl_time is looked up on its own."""
+    if versions is None:
+        versions = source_versions(schema, name)
+    obj_type, ddl_time = versions.get(name.upper(), (None, None))
+    return cached_source(schema, name, obj_type, ddl_time, lambda: fetch_query("""
+        SELECT line, text FROM all_source 
+        WHERE owner = UPPER(:1) AND name = UPPER(:2) AND type IN ('PACKAGE BODY', 'PROCEDURE', 'FUNCTION')
+        ORDER BY line
+    """, [schema, name])[1])
+
+def in_list_batches(names):
+    """names sorted and split into lists of at most SOURCE_IN_LIST_LIMIT."""
+    names = sorted(names)
+    return [names[i:i + SOURCE_IN_LIST_LIMIT] for i in range(0, len(names), SOURCE_IN_LIST_LIMIT)]
+
+def in_list_binds(prefix, values):
+    """(":p0, :p1, ...", {"p0": values[0], ...}) for an IN list of bind variables."""
+    params = {f"{prefix}{i}": value for i, value in enumerate(values)}
+    return ", ".join(f":{name}" for name in params), params
+
+def iter_schema_package_sources(schema, names=None):
+    """Stream the source of every package in the schema, or only of names, with one ordered query.
+
+    Yields (package, [(line, text), ...]) as soon as each package's rows have arrived,
+    so callers can scan the first package while later ones are still being fetched.
+    names are bound in IN lists, one query per SOURCE_IN_LIST_LIMIT of them.
+    """
+    for batch in [None] if names is None else in_list_batches(names):
+        params = {"owner": schema}
+        name_filter = ""
+        if batch:
+            binds, name_params = in_list_binds("n", batch)
+            params.update(name_params)
+            name_filter = f"AND name IN ({binds})"
+        rows = stream_query(f"""
+            SELECT name, line, text FROM all_source
+            WHERE owner = UPPER(:owner) AND type IN ('PACKAGE BODY', 'PROCEDURE', 'FUNCTION')
+            AND name IN (
+                SELECT object_name FROM all_objects
+                WHERE owner = UPPER(:owner) AND object_type = 'PACKAGE'
+            )
+            {name_filter}
+            ORDER BY name, line
+        """, params)
+        for name, group in groupby(rows, key=itemgetter(0)):
+            yield name, [(line, text) for _, line, text in group]
+
+# ---------------- Metadata Cache ----------------
+# Dictionary lookups are cached per (kind, owner, object) in metadata_cache. Only structure
+# is cached; live values such as sequence numbers and row counts are always queried.
+def configure_metadata_cache():
+    """Apply the config.json settings and switch the cache to the connected database."""
+    settings = load_metadata_cache_settings()
+    metadata_cache.ttl = settings["metadata_cache_ttl"]
+    metadata_cache.max_entries = settings["metadata_cache_size"]
+    metadata_cache.path = METADATA_CACHE_PATH if settings["metadata_cache_persist"] else None
+    metadata_cache.bind(DSN)
+    debug_log("[CACHE] Metadata cache for %s: %s entries loaded %s", DSN, len(metadata_cache.entries), settings)
+
+def save_metadata_cache():
+    try:
+        metadata_cache.save()
+    except OSError as e:
+        log("warn", "Could not save metadata cache: %s", e)
+
+def cached_metadata(kind, owner, obj, loader):
+    return metadata_cache.get_or_load((kind, (owner or "").upper(), (obj or "").upper()), loader)
+
+def invalidate_metadata(schema=None, table_name=None):
+    """Forget cached metadata for one table, one schema or (with no arguments) everything."""
+    if schema is None:
+        removed = metadata_cache.invalidate()
+    else:
+        removed = metadata_cache.invalidate(owner=schema, obj=table_name)
+        if table_name is None:
+            removed += metadata_cache.invalidate(kind="schemas")
+    debug_log("[CACHE] Invalidated %s metadata entries for %s%s",
+              removed, schema or "all schemas", "." + table_name if table_name else "")
+    return removed
+
+def get_table_columns(schema, table_name):
+    """(column_name, data_type, data_length, data_default) rows in column order."""
+    return cached_metadata("columns", schema, table_name, lambda: fetch_query("""
+        SELECT column_name, data_type, data_length, data_default
+        FROM all_tab_columns
+        WHERE table_name = UPPER(:1) AND owner = UPPER(:2)
+        ORDER BY column_id
+    """, [table_name, schema])[1])
+
+def get_table_constraints(schema, table_name):
+    return cached_metadata("constraints", schema, table_name, lambda: fetch_query("""
+        SELECT ac.constraint_name, ac.constraint_type, acc.column_name
+        FROM all_constraints ac
+        JOIN all_cons_columns acc ON ac.constraint_name = acc.constraint_name AND ac.owner = acc.owner
+        WHERE ac.table_name = UPPER(:1) AND ac.owner = UPPER(:2)
+        ORDER BY ac.constraint_name, acc.position
+    """, [table_name, schema])[1])
+
+def get_table_indexes(schema, table_name):
+    return cached_metadata("indexes", schema, table_name, lambda: fetch_query("""
+        SELECT ai.index_name, ai.uniqueness, aic.column_name
+        FROM all_indexes ai
+        JOIN all_ind_columns aic ON ai.index_name = aic.index_name AND ai.table_owner = aic.table_owner
+        WHERE ai.table_name = UPPER(:1) AND ai.owner = UPPER(:2)
+        ORDER BY ai.index_name, aic.column_position
+    """, [table_name, schema])[1])
+
+def get_table_triggers(schema, table_name):
+    return cached_metadata("triggers", schema, table_name, lambda: fetch_query("""
+        SELECT trigger_name, trigger_body
+        FROM all_triggers
+        WHERE table_owner = UPPER(:1)
+        AND table_name = UPPER(:2)
+    """, [schema, table_name])[1])
+
+# Schema-wide versions of the per-table lookups above; the first column is the table name
+PREWARM_QUERIES = {
+    "columns": """
+        SELECT table_name, column_name, data_type, data_length, data_default
+        FROM all_tab_columns
+        WHERE owner = UPPER(:1)
+        ORDER BY table_name, column_id
+    """,
+    "constraints": """
+        SELECT ac.table_name, ac.constraint_name, ac.constraint_type, acc.column_name
+        FROM all_constraints ac
+        JOIN all_cons_columns acc ON ac.constraint_name = acc.constraint_name AND ac.owner = acc.owner
+        WHERE ac.owner = UPPER(:1)
+        ORDER BY ac.table_name, ac.constraint_name, acc.position
+    """,
+    "indexes": """
+        SELECT ai.table_name, ai.index_name, ai.uniqueness, aic.column_name
+        FROM all_indexes ai
+        JOIN all_ind_columns aic ON ai.index_name = aic.index_name AND ai.table_owner = aic.table_owner
+        WHERE ai.owner = UPPER(:1)
+        ORDER BY ai.table_name, ai.index_name, aic.column_position
+    """,
+    "triggers": """
+        SELECT table_name, trigger_name, trigger_body
+        FROM all_triggers
+        WHERE table_owner = UPPER(:1)
+        ORDER BY table_name
+    """,
+}
+
+@perf_trace.timed("Prewarm Metadata")
+def prewarm_schema(schema, force=False):
+    """Fill the cache for every table in schema with one query per kind instead of one per table.
+
+    Skipped (returning 0) while the entries of the last prewarm are still live, unless force.
+    """
+    marker = ("prewarmed", schema.upper(), "")  # expires and is invalidated with the schema's entries
+    if not force and metadata_cache.get(marker)[0]:
+        debug_log("[CACHE] %s is still prewarmed", schema)
+        return 0
+    start = time.perf_counter()
+    tables = get_tables(schema)
+    for kind, query in PREWARM_QUERIES.items():
+        by_table = {table: [] for table in tables}
+        for table, *row in stream_query(query, [schema]):
+            by_table.setdefault(table, []).append(tuple(row))
+        for table, rows in by_table.items():
+            metadata_cache.put((kind, schema.upper(), table), rows)
+    metadata_cache.put(marker, True)
+    debug_log("[CACHE] Prewarmed %s tables of %s in %.2fs", len(tables), schema, time.perf_counter() - start)
+    return len(tables)
+
+# ---------------- Row Counts ----------------
+# COUNT(*) is a full scan, so Analyze Table reports the optimizer statistics by default.
+# "sample" adds a block-sample estimate with a 95% confidence interval, "exact" runs COUNT(*).
+ROW_COUNT_MODES = ("stats", "sample", "exact")
+ROW_SAMPLE_PERCENT = 1.0  # share of blocks read by the sample estimate
+SIMPLE_IDENTIFIER = re.compile(r"[A-Za-z][A-Za-z0-9_$#]{0,127}")  # names the count queries put into SQL text
+
+def get_table_statistics(schema, table_name):
+    """(num_rows, last_analyzed, blocks, stale_stats) of the table; all None if never analyzed."""
+    rows = fetch_query("""
+        SELECT num_rows, last_analyzed, blocks, stale_stats
+        FROM all_tab_statistics
+        WHERE owner = UPPER(:1) AND table_name = UPPER(:2) AND object_type = 'TABLE'
+    """, [schema, table_name])[1]
+    return rows[0] if rows else (None, None, None, None)
+
+def get_segment_size(schema, table_name):
+    """(bytes, blocks) allocated to the table over all partitions, or None if not visible.
+
+    dba_segments needs a privilege most accounts lack; for the connected user's own tables
+    user_segments is used instead.
+    """
+    queries = [("SELECT SUM(bytes), SUM(blocks) FROM dba_segments "
+                "WHERE owner = UPPER(:owner) AND segment_name = UPPER(:name)",
+                {"owner": schema, "name": table_name})]
+    if DB_USER and schema.upper() == DB_USER.upper():
+        queries.append(("SELECT SUM(bytes), SUM(blocks) FROM user_segments WHERE segment_name = UPPER(:name)",
+                        {"name": table_name}))
+    for query, params in queries:
+        try:
+            size, blocks = fetch_query(query, params)[1][0]
+        except oracledb.Error as e:
+            # ORA-00942 is the expected dba_segments answer for accounts without the privilege
+            log("debug" if str(e).startswith("ORA-00942") else "warn", "Segment size lookup failed: %s", e)
+            continue
+        return (size, blocks) if size is not None else None
+    return None
+
+def qualified_name(schema, name):
+    """'"SCHEMA"."NAME"' for SQL text that cannot use binds, upper-cased like an unquoted name.
+
+    Raises ValueError unless both are simple identifiers, so user input never reaches the
+    statement unchecked.
+    """
+    for part in (schema, name):
+        if not SIMPLE_IDENTIFIER.fullmatch(part or ""):
+            raise ValueError(f"Not a valid Oracle identifier: {part!r}")
+    return f'"{schema.upper()}"."{name.upper()}"'
+
+def sample_row_count(schema, table_name, percent=ROW_SAMPLE_PERCENT):
+    """Estimate the row count from a SAMPLE BLOCK query; returns (estimate, 95% half-width).
+
+    Each block is read with probability p, so sum(c)/p is an unbiased estimate of the row
+    count and (1 - p) * sum(c^2) / p^2 of its variance, where c is the row count of each
+    sampled block.
+    """
+    percent = float(percent)
+    if not 0 < percent < 100:
+        raise ValueError("Sample percent must be between 0 and 100")
+    total, squares = fetch_query(f"""
+        SELECT SUM(c), SUM(c * c) FROM (
+            SELECT COUNT(*) c FROM {qualified_name(schema, table_name)} SAMPLE BLOCK ({percent})
+            GROUP BY DBMS_ROWID.ROWID_OBJECT(ROWID), DBMS_ROWID.ROWID_RELATIVE_FNO(ROWID),
+                     DBMS_ROWID.ROWID_BLOCK_NUMBER(ROWID)
+        )
+    """)[1][0]
+    p = percent / 100
+    return (total or 0) / p, 1.96 * math.sqrt((1 - p) * (squares or 0)) / p
+
+def exact_row_count(schema, table_name):
+    """COUNT(*) of the table; a full scan, cancellable through the current job."""
+    return fetch_query(f"SELECT COUNT(*) FROM {qualified_name(schema, table_name)}")[1][0][0]
+
+def format_bytes(size):
+    for unit in ("bytes", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return f"{size:,.0f} {unit}" if unit == "bytes" else f"{size:,.1f} {unit}"
+        size /= 1024
+
+def format_age(moment, now=None):
+    days = ((now or datetime.now()) - moment).total_seconds() / 86400
+    if days < 1:
+        return f"{days * 24:.0f} hours ago"
+    return f"{days:.0f} days ago"
+
+@perf_trace.timed("row count")
+def row_count_lines(schema, table_name, mode="stats", sample_percent=ROW_SAMPLE_PERCENT):
+    """Row Count section lines: statistics and segment size, plus a sample or exact count by mode."""
+    if mode not in ROW_COUNT_MODES:
+        raise ValueError(f"Unknown row count mode {mode!r} (use {', '.join(ROW_COUNT_MODES)})")
+    lines = ["Row Count:"]
+
+    num_rows, last_analyzed, stats_blocks, stale = get_table_statistics(schema, table_name)
+    if num_rows is None or last_analyzed is None:
+        lines.append("  - Estimate: no optimizer statistics (table never analyzed)")
+    else:
+        staleness = format_age(last_analyzed) + (", marked stale" if stale == "YES" else "")
+        lines.append(f"  - Estimate: {num_rows:,} rows (optimizer statistics, analyzed "
+                     f"{last_analyzed:%Y-%m-%d %H:%M}, {staleness})")
+
+    segment = get_segment_size(schema, table_name)
+    if segment:
+        size, blocks = segment
+        at_analyze = f" ({stats_blocks:,} used at last analyze)" if stats_blocks is not None else ""
+        lines.append(f"  - Segment size: {format_bytes(size)}, {blocks:,} blocks{at_analyze}")
+
+    if mode == "sample":
+        start = time.perf_counter()
+        estimate, half_width = sample_row_count(schema, table_name, sample_percent)
+        lines.append(f"  - Sample estimate: {estimate:,.0f} ± {half_width:,.0f} rows (95% confidence, "
+                     f"{sample_percent:g}% block sample, {time.perf_counter() - start:.1f}s)")
+    elif mode == "exact":
+        start = time.perf_counter()
+        count = exact_row_count(schema, table_name)
+        lines.append(f"  - Exact: {count:,} rows (COUNT(*) now, {time.perf_counter() - start:.1f}s)")
+    return lines
+
+# ---------------- Text Analysis Helpers ----------------
+def get_sequence_info(schema, names):
+    """{sequence_name: (increment_by, last_number)} for the given sequences, in one query."""
+    names = sorted({name.upper() for name in names})
+    if not names:
+        return {}
+    binds = ", ".join(f":{i}" for i in range(2, len(names) + 2))
+    return {
+        name: (incr, last) for name, incr, last in fetch_query(f"""
+            SELECT sequence_name, increment_by, last_number
+            FROM all_sequences
+            WHERE sequence_owner = UPPER(:1)
+              AND sequence_name IN ({binds})
+        """, [schema, *names])[1]
+    }
+
+def table_sequence_usage(triggers, cols):
+    """Return (sequence names, {sequence: column}) referenced by triggers and column defaults."""
+    used_sequences = set()
+    col_seq_map = {}
+
+    debug_log("[STEP] Analyzing triggers for sequences")
+    for trigger_name, trigger_body in triggers:
+        if trigger_body:
+            try:
+                body_str = str(trigger_body)
+                matches = re.findall(r"(\w+)\.(NEXTVAL|CURRVAL)", body_str.upper())
+                debug_log("[TRIGGER] %s uses sequences: %s", trigger_name, matches)
+                used_sequences.update(seq_name for seq_name, _ in matches)
+            except Exception as e:
+                log("error", "Failed to read trigger %s: %s", trigger_name, e)
+
+    debug_log("[STEP] Analyzing default column values for sequences")
+    for col, _, _, default in cols:
+        if default:
+            matches = re.findall(r"(\w+)\.NEXTVAL", default, re.IGNORECASE)
+            if matches:
+                debug_log("[COLUMN] %s default uses sequences: %s", col, matches)
+            for seq in matches:
+                seq_name = seq.upper()
+                used_sequences.add(seq_name)
+                col_seq_map[seq_name] = col
+    return used_sequences, col_seq_map
+
+ANALYZE_WORKERS = 4  # concurrent lookups per Analyze Table; the usage scan borrows SCAN_WORKERS more sessions
+
+@perf_trace.timed("Analyze Table")
+def analyze_table(schema, table_name, on_progress=None, on_section=None, count_mode="stats"):
+    """Build the Analyze Table report for schema.table_name as a list of output lines.
+
+    The dictionary lookups, the package usage scan and the row count run concurrently, each
+    on its own pooled session. Sections are produced in report order as soon as their data
+    has arrived, and passed to on_section(lines) when given, so a caller can show the
+    columns while the usage scan is still running. count_mode picks the row count source
+    (see ROW_COUNT_MODES); only "exact" runs a COUNT(*).
+    """
+    output = []
+    debug_log("[INPUT] Schema: %s", schema)
+    debug_log("[INPUT] Table: %s", table_name)
+
+    def emit(lines):
+        output.extend(lines)
+        if on_section:
+            on_section(lines)
+
+    pool = ThreadPoolExecutor(max_workers=ANALYZE_WORKERS, thread_name_prefix="analyze")
+    debug_log("[STEP] Fetching columns, constraints, indexes, triggers, usage and row count (%s)", count_mode)
+    # The usage scan is by far the slowest, so it starts first
+    usage = submit_in_job(pool, partial(analyze_table_usage, schema, table_name, on_progress=on_progress))
+    cols = submit_in_job(pool, get_table_columns, schema, table_name)
+    cons = submit_in_job(pool, get_table_constraints, schema, table_name)
+    idxs = submit_in_job(pool, get_table_indexes, schema, table_name)
+    triggers = submit_in_job(pool, get_table_triggers, schema, table_name)
+    count = submit_in_job(pool, row_count_lines, schema, table_name, count_mode)
+
+    try:
+        # --- Columns ---
+        debug_log("[RESULT] Columns found: %s", len(cols.result()))
+        emit(["Columns:"] + [f"  - {c[0]} ({c[1]} [{c[2]}])" for c in cols.result()])
+
+        # --- Constraints ---
+        debug_log("[RESULT] Constraints found: %s", len(cons.result()))
+        emit(["\nConstraints:"] + [f"  - {c[0]} ({c[1]}) [{c[2]}]" for c in cons.result()])
+
+        # --- Indexes ---
+        debug_log("[RESULT] Indexes found: %s", len(idxs.result()))
+        emit(["\nIndexes:"] + [f"  - {i[0]} ({i[1]}) [{i[2]}]" for i in idxs.result()])
+
+        # --- Sequences Used ---
+        debug_log("[RESULT] Triggers found: %s", len(triggers.result()))
+        used_sequences, col_seq_map = table_sequence_usage(triggers.result(), cols.result())
+        lines = ["\nSequences Used:"]
+        if not used_sequences:
+            debug_log("[RESULT] No sequences found")
+            lines.append("  - No sequences detected.")
+        else:
+            debug_log("[STEP] Fetching info for sequences: %s", sorted(used_sequences))
+            seq_info = get_sequence_info(schema, used_sequences)
+            for seq in sorted(used_sequences):
+                if seq in seq_info:
+                    incr, last = seq_info[seq]
+                    col = col_seq_map.get(seq, "Unknown")
+                    lines.append(f"  - {seq} -> Column: {col}, Current Value: {last}, Next Value: {last + incr}, Increment: {incr}")
+                    debug_log("[SEQUENCE] %s -> Current: %s, Next: %s, Increment: %s", seq, last, last + incr, incr)
+                else:
+                    log("warn", "Sequence %s not found in all_sequences", seq)
+                    lines.append(f"  - {seq} -> Not found in all_sequences")
+        emit(lines)
+
+        # --- Usage in packages ---
+        debug_log("[RESULT] Usage found in %s entries", len(usage.result()))
+        lines = ["\nUsage in Packages:"]
+        pkgs = set()
+        for (tbl, op, pkg), info in sorted(usage.result().items()):
+            pkgs.add(pkg)
+            lines.append(f"  - Package: {pkg}, Operation: {op}, Lines: {', '.join(map(str, info['lines']))}")
+        lines.append(f"\nTotal packages using {table_name}: {len(pkgs)}")
+        emit(lines)
+
+        # --- Row count ---
+        lines = count.result()
+        debug_log("[RESULT] Row count: %s", lines[1:])
+        emit(["\n" + lines[0]] + lines[1:])
+
+    except JobCancelled:
+        raise
+    except Exception as e:
+        log("error", "Exception during analysis: %s", e)
+        emit([f"\nError retrieving table details: {str(e)}"])
+    finally:
+        # Lookups still running after an error are left to finish on their own
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- Final debug log output ---
+    if DEBUG:
+        debug_log("[STEP] Final output lines:\n%s", "\n".join(output))
+
+    return output
+
+@perf_trace.timed("table usage")
+def analyze_table_usage(schema, table_name, bulk=True, use_index=True, workers=SCAN_WORKERS, on_progress=None):
+    if use_index:
+        start = time.perf_counter()
+        refreshed = refresh_xref_index(schema, workers=workers, on_progress=on_progress)
+        results = lookup_table_usage(schema, table_name)
+        debug_log("Index lookup for %s.%s took %.1f ms (%s packages refreshed)",
+                  schema, table_name, (time.perf_counter() - start) * 1000, refreshed)
+        return results
+
+    debug_log("Analyzing usage of table %s.%s in packages", schema, table_name)
+    scanned = scan_packages(schema, workers=workers, bulk=bulk, on_progress=on_progress)
+    return collect_table_usage(scanned, table_name)
+
+def collect_table_usage(scanned, table_name):
+    """Group the hits on table_name in {package: [(table, operation, line), ...]} by (table, operation, package)."""
+    results = defaultdict(lambda: {"count": 0, "lines": [], "files": set()})
+    target = table_name.upper()
+    for pkg, hits in scanned.items():
+        for matched_table, op, line_number in hits:
+            if matched_table == target:
+                key = (matched_table, op, pkg)
+                results[key]["count"] += 1
+                results[key]["lines"].append(line_number)
+                results[key]["files"].add(pkg)
+                debug_log("Match found in %s: line %s, op %s", pkg, line_number, op)
+
+    if DEBUG:
+        debug_log("Total matches found: %s", sum(len(v["lines"]) for v in results.values()))
+    return results
+
+@perf_trace.timed("scan packages")
+def scan_packages(schema, packages=None, workers=SCAN_WORKERS, bulk=True, on_progress=None):
+    """Scan package sources and return {package: [(table, operation, line), ...]} in package order.
+
+    bulk serves cached sources and streams the stale ones in one query, which is the cheapest
+    way to read many packages. bulk=False, meant for a few changed packages, fetches them one
+    query each, on workers threads (each on its own pooled session) while matching runs
+    alongside them. on_progress(done, total) is called per package.
+    """
+    if packages is None:
+        packages = get_schema_objects(schema, 'PACKAGE')
+    total = len(packages)
+    hits = {}
+
+    def record(pkg, pkg_hits, parse_seconds=0.0):
+        check_cancelled()
+        hits[pkg] = pkg_hits
+        perf_trace.add_parse_time(parse_seconds)
+        if on_progress:
+            on_progress(len(hits), total)
+
+    if not replaying():
+        workers = min(workers, get_session_pool().max)
+    versions = source_versions(schema)  # one query decides which cached sources are current
+    if not bulk and workers > 1 and total > 1:
+        scan_packages_parallel(schema, packages, workers, record, versions)
+    else:
+        if bulk:
+            # Cached sources, then one streamed round-trip for the stale ones instead of one query each
+            sources = iter_package_sources(schema, packages, versions)
+        else:
+            sources = ((pkg, get_package_source(schema, pkg, versions)) for pkg in packages)
+        for pkg, src_lines in sources:
+            record(pkg, *parse_source(src_lines))
+    for pkg in packages:
+        if pkg not in hits:
+            debug_log("No source found for package %s", pkg)
+            record(pkg, [])
+
+    return {pkg: hits[pkg] for pkg in packages}
+
+def parse_source(src_lines):
+    """scan_source_operations() and the seconds it took, for the caller's phase."""
+    start = time.perf_counter()
+    return scan_source_operations(src_lines), time.perf_counter() - start
+
+def scan_packages_parallel(schema, packages, workers, record, versions=None):
+    """Fetch one package per query on a thread pool and match each one as it arrives."""
+    debug_log("[SCAN] %s packages on %s fetch threads", len(packages), workers)
+    with ThreadPoolExecutor(max_workers=workers) as fetchers:
+        fetches = {submit_in_job(fetchers, get_package_source, schema, pkg, versions): pkg for pkg in packages}
+        for fetch in as_completed(fetches):
+            record(fetches[fetch], *parse_source(fetch.result()))
+
+# ---------------- Source Cache ----------------
+# Source rows are stored per (DSN, owner, name, type) with the last_ddl_time they were
+# fetched at, so unchanged packages are never downloaded from all_source again.
+def open_source_db():
+    db = sqlite3.connect(SOURCE_DB_PATH, timeout=30)  # scan threads write concurrently
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS source_cache (
+            dsn TEXT, owner TEXT, name TEXT, type TEXT, last_ddl_time TEXT, source BLOB,
+            PRIMARY KEY (dsn, owner, name, type)
+        )
+    """)
+    return db
+
+def encode_source(rows):
+    return zlib.compress(json.dumps(rows).encode("utf-8"))
+
+def decode_source(blob):
+    return [tuple(row) for row in json.loads(zlib.decompress(blob))]
+
+def object_ddl_times(schema, types, name=None):
+    """{(name, type): last_ddl_time} of the schema's objects of the given types, in one query."""
+    binds = ", ".join(f":t{i}" for i in range(len(types)))
+    query = f"""
+        SELECT object_name, object_type, last_ddl_time FROM all_objects
+        WHERE owner = UPPER(:owner) AND object_type IN ({binds})
+    """
+    params = {"owner": schema, **{f"t{i}": obj_type for i, obj_type in enumerate(types)}}
+    if name:
+        query += " AND object_name = UPPER(:name)"
+        params["name"] = name
+    return {(obj_name, obj_type): str(ddl_time) for obj_name, obj_type, ddl_time in fetch_query(query, params)[1]}
+
+def source_versions(schema, name=None):
+    """{name: (object type, last_ddl_time)} of the schema's scannable objects, in one query."""
+    return {obj_name: (obj_type, ddl_time)
+            for (obj_name, obj_type), ddl_time in object_ddl_times(schema, SOURCE_TYPES, name).items()}
+
+def store_source(schema, name, obj_type, ddl_time, rows):
+    with closing(open_source_db()) as db, db:
+        db.execute("INSERT OR REPLACE INTO source_cache VALUES (?, ?, ?, ?, ?, ?)",
+                   (DSN or "", schema.upper(), name.upper(), obj_type, ddl_time, encode_source(rows)))
+
+def cached_source(schema, name, obj_type, ddl_time, fetch):
+    """Rows of one object from the cache if stored at ddl_time, otherwise fetch() and store them."""
+    if obj_type is None:
+        return fetch()  # not in all_objects (or no access): nothing to validate against
+    with closing(open_source_db()) as db:
+        row = db.execute("""
+            SELECT last_ddl_time, source FROM source_cache
+            WHERE dsn = ? AND owner = ? AND name = ? AND type = ?
+        """, (DSN or "", schema.upper(), name.upper(), obj_type)).fetchone()
+    if row and row[0] == ddl_time:
+        return decode_source(row[1])
+    rows = fetch()
+    if rows:
+        store_source(schema, name, obj_type, ddl_time, rows)
+    return rows
+
+def read_cached_sources(schema, versions):
+    """{name: rows} of every cached object of the schema that is still current; drops the rest."""
+    sources = {}
+    with closing(open_source_db()) as db, db:
+        stored = db.execute("SELECT name, type, last_ddl_time, source FROM source_cache WHERE dsn = ? AND owner = ?",
+                            (DSN or "", schema.upper())).fetchall()
+        for name, obj_type, ddl_time, blob in stored:
+            if obj_type not in SOURCE_TYPES:
+                continue  # other sources (specs, triggers) are validated by their own readers
+            if versions.get(name) == (obj_type, ddl_time):
+                sources[name] = decode_source(blob)
+            else:
+                db.execute("DELETE FROM source_cache WHERE dsn = ? AND owner = ? AND name = ? AND type = ?",
+                           (DSN or "", schema.upper(), name, obj_type))
+    return sources
+
+def iter_package_sources(schema, packages, versions):
+    """Yield (package, rows) for packages: current cached sources first, then the stale ones
+    from the database (one stream over just those when there are many) while caching them."""
+    cached = read_cached_sources(schema, versions)
+    stale = [pkg for pkg in packages if pkg not in cached]
+    debug_log("[SOURCE] %s of %s package sources served from cache", len(packages) - len(stale), len(packages))
+    for pkg in packages:
+        if pkg in cached:
+            yield pkg, cached[pkg]
+
+    if len(stale) > XREF_BULK_THRESHOLD:
+        for pkg, rows in iter_schema_package_sources(schema, stale):
+            if pkg in versions:
+                store_source(schema, pkg, *versions[pkg], rows)
+            yield pkg, rows
+    else:
+        for pkg in stale:
+            yield pkg, get_package_source(schema, pkg, versions)
+
+def iter_object_sources(schema, objects, ddl_times):
+    """Yield ((name, type), rows) for the given objects of any type, like iter_package_sources.
+
+    ddl_times is object_ddl_times() for the schema and must cover every object.
+    """
+    current, stale = [], []
+    with closing(open_source_db()) as db:
+        for name, obj_type in objects:
+            row = db.execute("""
+                SELECT last_ddl_time, source FROM source_cache
+                WHERE dsn = ? AND owner = ? AND name = ? AND type = ?
+            """, (DSN or "", schema.upper(), name, obj_type)).fetchone()
+            if row and row[0] == ddl_times[(name, obj_type)]:
+                current.append(((name, obj_type), row[1]))
+            else:
+                stale.append((name, obj_type))
+    debug_log("[SOURCE] %s of %s object sources served from cache", len(current), len(objects))
+    for key, blob in current:
+        yield key, decode_source(blob)
+
+    if len(stale) > XREF_BULK_THRESHOLD:
+        wanted = set(stale)
+        type_binds, type_params = in_list_binds("t", sorted({obj_type for _, obj_type in stale}))
+        for batch in in_list_batches({name for name, _ in stale}):
+            name_binds, name_params = in_list_binds("n", batch)
+            rows = stream_query(f"""
+                SELECT name, type, line, text FROM all_source
+                WHERE owner = UPPER(:owner) AND type IN ({type_binds}) AND name IN ({name_binds})
+                ORDER BY name, type, line
+            """, {"owner": schema, **type_params, **name_params})
+            for key, group in groupby(rows, key=itemgetter(0, 1)):
+                if key in wanted:
+                    wanted.discard(key)
+                    source = [(line, text) for _, _, line, text in group]
+                    store_source(schema, *key, ddl_times[key], source)
+                    yield key, source
+        # Objects without source rows (e.g. no access to all_source) are still reported, so
+        # callers can record them instead of asking again every time
+        for key in sorted(wanted):
+            yield key, []
+    else:
+        for name, obj_type in stale:
+            yield (name, obj_type), cached_source(schema, name, obj_type, ddl_times[(name, obj_type)], lambda: fetch_query("""
+                SELECT line, text FROM all_source
+                WHERE owner = UPPER(:1) AND name = :2 AND type = :3
+                ORDER BY line
+            """, [schema, name, obj_type])[1])
+
+def clear_source_cache(schema=None):
+    with closing(open_source_db()) as db, db:
+        if schema:
+            db.execute("DELETE FROM source_cache WHERE dsn = ? AND owner = ?", (DSN or "", schema.upper()))
+        else:
+            db.execute("DELETE FROM source_cache")
+
+# ---------------- Cross-Reference Index ----------------
+
+def open_xref_db():
+    db = sqlite3.connect(XREF_DB_PATH, timeout=30)  # concurrent refreshes wait for each other's writes
+    db.executescript("""
+        CREATE TABLE IF NOT EXISTS xref_packages (
+            dsn TEXT, owner TEXT, package TEXT, last_ddl_time TEXT,
+            PRIMARY KEY (dsn, owner, package)
+        );
+        CREATE TABLE IF NOT EXISTS xref_usage (
+            dsn TEXT, owner TEXT, table_name TEXT, operation TEXT, package TEXT, line INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS xref_usage_table ON xref_usage (dsn, owner, table_name);
+        CREATE INDEX IF NOT EXISTS xref_usage_package ON xref_usage (dsn, owner, package);
+    """)
+    if db.execute("PRAGMA user_version").fetchone()[0] != XREF_SCHEMA_VERSION:
+        with db:
+            db.execute("DELETE FROM xref_usage")
+            db.execute("DELETE FROM xref_packages")
+            db.execute(f"PRAGMA user_version = {XREF_SCHEMA_VERSION}")
+    return db
+
+@perf_trace.timed("xref refresh")
+def refresh_xref_index(schema, workers=SCAN_WORKERS, on_progress=None):
+    """Rescan only the packages whose last_ddl_time changed since they were indexed.
+
+    Returns the number of packages that were (re)indexed or dropped.
+    """
+    owner = schema.upper()
+    dsn = DSN or ""
+    current = {
+        name: str(ddl_time) for name, ddl_time in fetch_query("""
+            SELECT object_name, MAX(last_ddl_time) FROM all_objects
+            WHERE owner = UPPER(:1) AND object_type IN ('PACKAGE', 'PACKAGE BODY')
+            GROUP BY object_name
+        """, [schema])[1]
+    }
+
+    with closing(open_xref_db()) as db:
+        stored = dict(db.execute(
+            "SELECT package, last_ddl_time FROM xref_packages WHERE dsn = ? AND owner = ?", (dsn, owner)
+        ))
+    stale = {name for name, ddl_time in current.items() if stored.get(name) != ddl_time}
+    dropped = set(stored) - set(current)
+    if not stale and not dropped:
+        return 0
+    debug_log("[XREF] %s: %s stale, %s dropped of %s packages", owner, len(stale), len(dropped), len(current))
+
+    # Scan outside any transaction: the write lock is held only for the short swap below
+    bulk = not stored or len(stale) > XREF_BULK_THRESHOLD
+    scanned = scan_packages(schema, sorted(stale), workers=workers, bulk=bulk, on_progress=on_progress)
+    with closing(open_xref_db()) as db, db:
+        for pkg in stale | dropped:
+            db.execute("DELETE FROM xref_usage WHERE dsn = ? AND owner = ? AND package = ?", (dsn, owner, pkg))
+            db.execute("DELETE FROM xref_packages WHERE dsn = ? AND owner = ? AND package = ?", (dsn, owner, pkg))
+        for pkg, hits in scanned.items():
+            db.executemany(
+                "INSERT INTO xref_usage VALUES (?, ?, ?, ?, ?, ?)",
+                ((dsn, owner, table, op, pkg, line) for table, op, line in hits)
+            )
+        db.executemany(
+            "INSERT INTO xref_packages VALUES (?, ?, ?, ?)",
+            [(dsn, owner, pkg, current[pkg]) for pkg in stale]
+        )
+    return len(stale) + len(dropped)
+
+def lookup_table_usage(schema, table_name):
+    results = defaultdict(lambda: {"count": 0, "lines": [], "files": set()})
+    with closing(open_xref_db()) as db:
+        rows = db.execute("""
+            SELECT operation, package, line FROM xref_usage
+            WHERE dsn = ? AND owner = ? AND table_name = ?
+            ORDER BY rowid
+        """, (DSN or "", schema.upper(), table_name.upper())).fetchall()
+
+    for op, pkg, line in rows:
+        key = (table_name.upper(), op, pkg)
+        results[key]["count"] += 1
+        results[key]["lines"].append(line)
+        results[key]["files"].add(pkg)
+    return results
+
+def clear_xref_index(schema=None):
+    with closing(open_xref_db()) as db, db:
+        if schema:
+            params = (DSN or "", schema.upper())
+            db.execute("DELETE FROM xref_usage WHERE dsn = ? AND owner = ?", params)
+            db.execute("DELETE FROM xref_packages WHERE dsn = ? AND owner = ?", params)
+        else:
+            db.execute("DELETE FROM xref_usage")
+            db.execute("DELETE FROM xref_packages")
+
+# ---------------- Package Listing / Extraction ----------------
+@perf_trace.timed("List Packages")
+def list_packages(schema):
+    debug_log("[INPUT] Schema for listing packages: '%s'", schema)
+    query = """
+        SELECT object_name, status, created 
+        FROM all_objects 
+        WHERE object_type = 'PACKAGE' 
+        AND owner = UPPER(:1)
+        ORDER BY object_name
+    """
+    rows = fetch_query(query, [schema])[1]
+    debug_log("[RESULT] Packages found: %s", rows)
+    return rows
+
+def extract_package_content(schema, pkg):
+    # Fetch source with line numbers; served from the source cache if the body is unchanged
+    query = """
+        SELECT line, text FROM all_source 
+        WHERE owner = UPPER(:1) AND name = UPPER(:2) AND type IN ('PACKAGE BODY')
+        ORDER BY TYPE,line
+    """
+    obj_type, ddl_time = source_versions(schema, pkg).get(pkg.upper(), (None, None))
+    if obj_type != "PACKAGE BODY":
+        obj_type = ddl_time = None
+    rows = cached_source(schema, pkg, obj_type, ddl_time, lambda: fetch_query(query, [schema, pkg])[1])
+    if not rows:
+        raise Exception("No source found for package.")
+    return rows
+
+
+def extract_table_operations(lines):
+    operations = defaultdict(list)
+
+    for line_num, line in lines:
+        for op, table_name in iter_line_operations(line):
+            operations[table_name].append((op, line_num, line.strip()))
+
+    return operations
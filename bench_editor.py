@@ -0,0 +1,161 @@
+"""Keystroke-to-paint latency of the SQL editor highlighting on a large script.
+
+Compares the old full-document pass (tag_remove + one editor.search loop per keyword +
+regex passes for comments, run on every key release) with IncrementalHighlighter, and
+the time to first paint of a large package body in the Extract Content view (one insert
+and tag_add per line vs. one bulk insert with LineTagPainter). Needs a display, but no
+database:
+
+    python bench_editor.py [--lines 3000] [--keys 50] [--package-lines 60000]
+"""
+import argparse
+import re
+import statistics
+import time
+import tkinter as tk
+
+from bench_matcher import generate_lines
+from editor_widgets import IncrementalHighlighter, LineTagPainter
+
+SQL_KEYWORDS = [
+    "SELECT", "FROM", "WHERE", "INSERT", "INTO", "VALUES", "UPDATE", "SET", "DELETE",
+    "CREATE", "TABLE", "ALTER", "DROP", "VIEW", "INDEX", "JOIN", "LEFT", "RIGHT",
+    "FULL", "OUTER", "INNER", "GROUP", "ORDER", "BY", "HAVING", "AS", "DISTINCT",
+    "AND", "OR", "NOT", "IN", "IS", "NULL", "LIKE", "BETWEEN", "CASE", "WHEN", "THEN", "END",
+    "DESC",
+]
+
+
+def legacy_highlight(editor):
+    content = editor.get("1.0", tk.END)
+    editor.tag_remove("keyword", "1.0", tk.END)
+    editor.tag_remove("comment", "1.0", tk.END)
+    for word in SQL_KEYWORDS:
+        start = "1.0"
+        while True:
+            start = editor.search(rf"\y{word}\y", start, tk.END, regexp=True, nocase=True)
+            if not start:
+                break
+            end = f"{start}+{len(word)}c"
+            editor.tag_add("keyword", start, end)
+            start = end
+    for match in re.finditer(r'--.*', content):
+        editor.tag_add("comment", f"1.0 + {match.start()} chars", f"1.0 + {match.end()} chars")
+    for match in re.finditer(r'/\*.*?\*/', content, re.DOTALL):
+        editor.tag_add("comment", f"1.0 + {match.start()} chars", f"1.0 + {match.end()} chars")
+
+
+def make_editor(root, text):
+    editor = tk.Text(root, wrap=tk.WORD, font=("Courier New", 10))
+    editor.pack(fill="both", expand=True)
+    editor.insert("1.0", text)
+    editor.mark_set(tk.INSERT, "1.0 + 40 lines")
+    editor.see(tk.INSERT)
+    root.update()
+    return editor
+
+
+def bench_legacy(root, text, keys):
+    editor = make_editor(root, text)
+    latencies = []
+    for _ in range(keys):
+        start = time.perf_counter()
+        editor.insert(tk.INSERT, "x")
+        legacy_highlight(editor)
+        root.update_idletasks()
+        latencies.append(time.perf_counter() - start)
+    editor.destroy()
+    return latencies
+
+
+def bench_incremental(root, text, keys):
+    editor = make_editor(root, text)
+    highlighter = IncrementalHighlighter(editor, SQL_KEYWORDS)
+    while highlighter.pending:
+        root.update()
+
+    painted = []
+    highlighter.on_painted = lambda: painted.append(time.perf_counter())
+    latencies = []
+    for _ in range(keys):
+        painted.clear()
+        start = time.perf_counter()
+        editor.insert(tk.INSERT, "x")
+        while not painted:
+            root.update()
+        root.update_idletasks()
+        latencies.append(time.perf_counter() - start)
+    editor.destroy()
+    return latencies
+
+
+def make_package_view(root):
+    view = tk.Text(root, wrap=tk.WORD)
+    view.pack(fill="both", expand=True)
+    view.tag_configure("highlight", background="#ffffcc")
+    root.update()
+    return view
+
+
+def bench_package_legacy(root, rows):
+    view = make_package_view(root)
+    start = time.perf_counter()
+    for line_num, text in rows:
+        view.insert(tk.END, f"{line_num:>4}: {text.rstrip()}\n")
+        if re.search(r"\b(PROCEDURE|FUNCTION)\b", text, re.IGNORECASE):
+            view.tag_add("highlight", f"{line_num}.0", f"{line_num}.end")
+    root.update_idletasks()
+    elapsed = time.perf_counter() - start
+    view.destroy()
+    return elapsed
+
+
+def bench_package_bulk(root, rows):
+    # Text and marked lines are built on the worker thread in the app, so not timed here
+    text = "".join(f"{line_num:>4}: {src.rstrip()}\n" for line_num, src in rows)
+    pattern = re.compile(r"\b(PROCEDURE|FUNCTION)\b", re.IGNORECASE)
+    marked = [index for index, (_, src) in enumerate(rows, 1) if pattern.search(src)]
+    view = make_package_view(root)
+    start = time.perf_counter()
+    view.insert("1.0", text)
+    painter = LineTagPainter(view, "highlight", marked)
+    root.update_idletasks()
+    elapsed = time.perf_counter() - start
+    while painter.pending:
+        root.update()
+    view.destroy()
+    return elapsed
+
+
+def describe(name, latencies):
+    ms = sorted(x * 1000 for x in latencies)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(f"  {name:<12}: median {statistics.median(ms):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=3000)
+    parser.add_argument("--keys", type=int, default=50)
+    parser.add_argument("--package-lines", type=int, default=60000)
+    args = parser.parse_args()
+
+    text = "".join(line for _, line in generate_lines(args.lines))
+    root = tk.Tk()
+    root.geometry("900x700")
+    try:
+        print(f"Script: {args.lines} lines, {args.keys} keystrokes")
+        describe("full pass", bench_legacy(root, text, args.keys))
+        describe("incremental", bench_incremental(root, text, args.keys))
+        print(f"  (incremental includes the {IncrementalHighlighter.DEBOUNCE_MS} ms debounce)")
+
+        rows = generate_lines(args.package_lines)
+        print(f"Package view: {args.package_lines} lines, time to first paint")
+        print(f"  {'per line':<12}: {bench_package_legacy(root, rows) * 1000:8.2f} ms")
+        print(f"  {'bulk':<12}: {bench_package_bulk(root, rows) * 1000:8.2f} ms")
+    finally:
+        root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Micro-benchmark: per-operation OPERATION_PATTERNS loop vs the single-pass OPERATION_MATCHER.
+
+Also times the statement lexer (iter_sql_statements) that analyze_table_usage scans with,
+and what the dynamic SQL analyzer adds to a scan_source_operations pass.
+
+Runs offline on a synthetic PL/SQL corpus:
+
+    python bench_matcher.py [--lines 200000] [--seed 42] [--dynamic-share 0.05]
+"""
+import argparse
+import random
+import re
+import time
+from collections import Counter
+
+from plsql_parser import (
+    OPERATION_PATTERNS, iter_line_operations, iter_operation_matches, iter_sql_statements, scan_source_operations,
+    strip_line_comment
+)
+
+TABLES = ["EMPLOYEES", "DEPARTMENTS", "hr.JOB_HISTORY", "ORDERS", "ORDER_ITEMS", "AUDIT_LOG", "CUSTOMERS"]
+LINE_TEMPLATES = [
+    "    SELECT emp_id, emp_name INTO v_id, v_name FROM {t} WHERE emp_id = p_id;",
+    "    INSERT INTO {t} (id, name) VALUES (p_id, p_name);",
+    "    UPDATE {t} SET status = 'DONE' WHERE id = p_id; -- mark finished",
+    "    DELETE FROM {t} WHERE created < SYSDATE - 30;",
+    "    v_total := v_total + 1;",
+    "    -- SELECT * FROM {t} is kept here for reference",
+    "    IF v_count > 0 THEN",
+    "    END IF;",
+    "    dbms_output.put_line('Processing ' || p_id);",
+    "  PROCEDURE process_{n}(p_id IN NUMBER) IS",
+]
+# SQL built as text; DYNAMIC_SHARE of the lines come from here
+DYNAMIC_TEMPLATES = [
+    "    EXECUTE IMMEDIATE 'DELETE FROM {t} WHERE id = :1' USING p_id;",
+    "    v_sql := 'SELECT COUNT(*) FROM ' || '{t}';",
+    "    v_sql := v_sql || ' WHERE status = ''OPEN''';",
+    "    OPEN c_rows FOR v_sql;",
+]
+DYNAMIC_SHARE = 0.05
+
+
+def generate_lines(count, seed=42, dynamic_share=DYNAMIC_SHARE):
+    rnd = random.Random(seed)
+    lines = []
+    for n in range(1, count + 1):
+        if n % 500 == 0:
+            # A long generated line with many SELECTs and no usable FROM: worst case for ".*?"
+            text = " ".join(f"SELECT col_{i}, (SELECT 1 FROM (" for i in range(40)) + ") x"
+        else:
+            templates = DYNAMIC_TEMPLATES if rnd.random() < dynamic_share else LINE_TEMPLATES
+            text = rnd.choice(templates).format(t=rnd.choice(TABLES), n=n)
+        lines.append((n, text + "\n"))
+    return lines
+
+
+def legacy_scan(lines):
+    hits = []
+    for line_number, line_text in lines:
+        clean_line = re.sub(r"--.*", "", line_text).strip()
+        for op, pattern in OPERATION_PATTERNS.items():
+            for match in pattern.finditer(clean_line):
+                hits.append((match.group(1).upper(), op, line_number))
+    return hits
+
+
+def single_pass_scan(lines):
+    hits = []
+    for line_number, line_text in lines:
+        for op, table in iter_line_operations(strip_line_comment(line_text)):
+            hits.append((table.upper(), op, line_number))
+    return hits
+
+
+def statement_scan(lines):
+    # Not compared with the others: it also finds SELECT ... FROM split across lines
+    hits = []
+    for statement in iter_sql_statements(lines):
+        for op, table, offset in iter_operation_matches(statement.text):
+            hits.append((table.upper(), op, statement.line_at(offset)))
+    return hits
+
+
+def static_scan(lines):
+    return scan_source_operations(lines, dynamic=False)
+
+
+def dynamic_scan(lines):
+    return scan_source_operations(lines)
+
+
+def bench(func, lines, repeat=3):
+    best = float("inf")
+    hits = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hits = func(lines)
+        best = min(best, time.perf_counter() - start)
+    return best, hits
+
+
+def bench_interleaved(funcs, lines, repeat=5):
+    # Alternate the runs so drift on a busy machine hits all functions alike
+    best = [float("inf")] * len(funcs)
+    hits = [None] * len(funcs)
+    for _ in range(repeat):
+        for index, func in enumerate(funcs):
+            start = time.perf_counter()
+            hits[index] = func(lines)
+            best[index] = min(best[index], time.perf_counter() - start)
+    return best, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dynamic-share", type=float, default=DYNAMIC_SHARE,
+                        help="fraction of lines that build or run dynamic SQL")
+    args = parser.parse_args()
+
+    lines = generate_lines(args.lines, args.seed, args.dynamic_share)
+    legacy_time, legacy_hits = bench(legacy_scan, lines)
+    single_time, single_hits = bench(single_pass_scan, lines)
+    lexer_time, _ = bench(statement_scan, lines)
+    (static_time, dynamic_time), (static_hits, dynamic_hits) = bench_interleaved([static_scan, dynamic_scan], lines)
+
+    if Counter(legacy_hits) != Counter(single_hits):
+        raise SystemExit("Mismatch between legacy and single-pass hits")
+
+    print(f"Corpus: {len(lines)} lines, {len(single_hits)} hits")
+    print(f"  per-pattern loop : {len(lines) / legacy_time:>12,.0f} lines/sec ({legacy_time:.3f}s)")
+    print(f"  single-pass      : {len(lines) / single_time:>12,.0f} lines/sec ({single_time:.3f}s)")
+    print(f"  speed-up         : {legacy_time / single_time:.2f}x")
+    print(f"  statement lexer  : {len(lines) / lexer_time:>12,.0f} lines/sec ({lexer_time:.3f}s)")
+    print(f"  scan, static     : {len(lines) / static_time:>12,.0f} lines/sec ({static_time:.3f}s)")
+    print(f"  scan, dynamic    : {len(lines) / dynamic_time:>12,.0f} lines/sec ({dynamic_time:.3f}s), "
+          f"{len(dynamic_hits) - len(static_hits)} dynamic hits, {(dynamic_time / static_time - 1) * 100:+.1f}% time")
+
+
+if __name__ == "__main__":
+    main()
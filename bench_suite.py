@@ -0,0 +1,279 @@
+"""Benchmark suite for the parsing and analysis functions on a synthetic PL/SQL corpus.
+
+Generates package bodies at a configurable scale (packages x lines, share of SQL statements,
+multi-line statements, comments and dynamic SQL), runs every benchmark on them and reports
+lines/sec, peak traced memory and allocation pressure. Results can be saved as JSON and
+compared with an earlier run. Runs fully offline, without a database:
+
+    python bench_suite.py [--packages 200] [--lines 2000] [--sql-density 0.35] [--repeat 3]
+    python bench_suite.py --output before.json
+    python bench_suite.py --compare before.json [--only scan_dynamic table_usage]
+
+Memory is measured in a separate run under tracemalloc, since tracing slows everything down.
+CPython has no cheap counter of allocations, so "gc_collections" (generation-0 collections
+during one run, each one about 700 more container objects allocated than freed) stands in
+for allocation pressure.
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from typing import NamedTuple
+
+import analyzer_core
+from plsql_parser import iter_sql_statements, highlight_line, scan_source_operations
+
+TABLES = [f"{prefix}_{suffix}" for prefix in ("EMP", "DEPT", "ORDER", "INVOICE", "AUDIT", "CUSTOMER")
+          for suffix in ("DATA", "HISTORY", "LOG", "STAGE", "ARCHIVE")]
+TARGET_TABLE = "ORDER_HISTORY"  # table looked up by the table_usage benchmark
+KEYWORDS = frozenset(("SELECT", "FROM", "WHERE", "INSERT", "INTO", "VALUES", "UPDATE", "SET", "DELETE",
+                      "BEGIN", "END", "IF", "THEN", "ELSE", "LOOP", "IS", "AS", "AND", "OR", "NOT", "NULL"))
+
+
+class CorpusSpec(NamedTuple):
+    packages: int = 200
+    lines: int = 2000              # per package
+    sql_density: float = 0.35      # share of statements that are SQL
+    multiline_share: float = 0.4   # share of SQL statements spread over several lines
+    comment_share: float = 0.1     # share of statements preceded by a comment
+    dynamic_share: float = 0.05    # share of statements that build or run SQL text
+    seed: int = 42
+
+
+# ---------------- Corpus ----------------
+def table(rnd):
+    name = rnd.choice(TABLES)
+    if rnd.random() < 0.1:
+        return f"hr.{name}"
+    return name.lower() if rnd.random() < 0.3 else name
+
+
+def sql_statement(rnd, multiline):
+    t, other = table(rnd), table(rnd)
+    kind = rnd.randrange(5)
+    if not multiline:
+        return [
+            f"SELECT COUNT(*) INTO v_count FROM {t} WHERE id = p_id;",
+            f"INSERT INTO {t} (id, name, created) VALUES (p_id, p_name, SYSDATE);",
+            f"UPDATE {t} SET status = 'DONE' WHERE id = p_id;",
+            f"DELETE FROM {t} WHERE created < SYSDATE - 30;",
+            f"SELECT a.id INTO v_id FROM {t} a JOIN {other} b ON b.id = a.id WHERE ROWNUM = 1;",
+        ][kind]
+    return [
+        f"SELECT e.id, e.name, e.status\n  INTO v_id, v_name, v_status\n  FROM {t} e\n WHERE e.id = p_id\n   AND e.status <> 'X';",
+        f"INSERT INTO {t}\n  (id, name, created)\nSELECT id, name, SYSDATE\n  FROM {other}\n WHERE processed = 'N';",
+        f"UPDATE {t}\n   SET status = 'DONE',\n       updated = SYSDATE\n WHERE id IN (SELECT id FROM {other});",
+        f"DELETE\n  FROM {t}\n WHERE created < ADD_MONTHS(SYSDATE, -12);",
+        f"MERGE INTO {t} d\nUSING (SELECT id FROM {other}) s\n   ON (d.id = s.id)\n WHEN MATCHED THEN UPDATE SET d.flag = 'Y';",
+    ][kind]
+
+
+def dynamic_statement(rnd):
+    t = table(rnd)
+    return rnd.choice([
+        f"EXECUTE IMMEDIATE 'DELETE FROM {t} WHERE id = :1' USING p_id;",
+        f"v_sql := 'SELECT COUNT(*) FROM ' || '{t}'\n      || ' WHERE status = ''OPEN''';\nEXECUTE IMMEDIATE v_sql INTO v_count;",
+        f"v_sql := 'UPDATE {t} SET flag = ''Y''';\nv_sql := v_sql || ' WHERE id = ' || p_id;\nEXECUTE IMMEDIATE v_sql;",
+        f"OPEN c_rows FOR 'SELECT * FROM ' || p_owner || '.{t}';",
+        f"EXECUTE IMMEDIATE q'[INSERT INTO {t} (id) VALUES (:1)]' USING p_id;",
+    ])
+
+
+def comment(rnd):
+    t = table(rnd)
+    return rnd.choice([
+        f"-- SELECT * FROM {t} was too slow here",
+        f"/* Old version:\n   DELETE FROM {t} WHERE id = p_id;\n   kept for reference */",
+        "-- TODO: batch this",
+    ])
+
+
+def plsql_statement(rnd, n):
+    return rnd.choice([
+        "v_total := v_total + 1;",
+        f"IF v_count > {n % 97} THEN\n  v_flag := 'Y';\nEND IF;",
+        "dbms_output.put_line('Processing -- ' || p_id || '; done');",
+        f"FOR r IN 1 .. {n % 50 + 1} LOOP\n  v_total := v_total + r;\nEND LOOP;",
+        "v_name := UPPER(TRIM(p_name));",
+    ])
+
+
+def generate_package(rnd, name, spec):
+    lines = [f"CREATE OR REPLACE PACKAGE BODY {name} AS"]
+    n = 0
+    while len(lines) < spec.lines - 2:
+        n += 1
+        lines += [f"  PROCEDURE proc_{n}(p_id IN NUMBER, p_name IN VARCHAR2, p_owner IN VARCHAR2) IS",
+                  "    v_sql VARCHAR2(4000);", "    v_count NUMBER;", "  BEGIN"]
+        for _ in range(rnd.randint(5, 25)):
+            if rnd.random() < spec.comment_share:
+                text = comment(rnd)
+            elif rnd.random() < spec.dynamic_share:
+                text = dynamic_statement(rnd)
+            elif rnd.random() < spec.sql_density:
+                text = sql_statement(rnd, rnd.random() < spec.multiline_share)
+            else:
+                text = plsql_statement(rnd, n)
+            lines += ["    " + line for line in text.split("\n")]
+        lines += [f"  END proc_{n};", ""]
+    lines += [f"END {name};", "/"]
+    return [(number, text + "\n") for number, text in enumerate(lines[:spec.lines], 1)]
+
+
+def generate_corpus(spec):
+    """[(package name, [(line, text), ...]), ...] for spec, the same for the same spec."""
+    rnd = random.Random(spec.seed)
+    return [(f"PKG_{index:05d}", generate_package(rnd, f"PKG_{index:05d}", spec)) for index in range(spec.packages)]
+
+
+# ---------------- Benchmarks ----------------
+# Each benchmark takes the corpus and returns a count, printed so runs can be sanity-checked.
+def bench_line_matcher(corpus):
+    return sum(len(analyzer_core.extract_table_operations(rows)) for _, rows in corpus)
+
+
+def bench_statement_lexer(corpus):
+    return sum(1 for _, rows in corpus for _ in iter_sql_statements(rows))
+
+
+def bench_scan_static(corpus):
+    return sum(len(scan_source_operations(rows, dynamic=False)) for _, rows in corpus)
+
+
+def bench_scan_dynamic(corpus):
+    return sum(len(scan_source_operations(rows)) for _, rows in corpus)
+
+
+def bench_table_usage(corpus):
+    # analyze_table_usage without the database: scan every package, then group the hits on one table
+    scanned = {pkg: scan_source_operations(rows) for pkg, rows in corpus}
+    return sum(info["count"] for info in analyzer_core.collect_table_usage(scanned, TARGET_TABLE).values())
+
+
+def bench_editor_highlight(corpus):
+    spans = 0
+    for _, rows in corpus:
+        state = None
+        for _, text in rows:
+            line_spans, state = highlight_line(text, state, KEYWORDS)
+            spans += len(line_spans)
+    return spans
+
+
+BENCHMARKS = {
+    "line_matcher": bench_line_matcher,
+    "statement_lexer": bench_statement_lexer,
+    "scan_static": bench_scan_static,
+    "scan_dynamic": bench_scan_dynamic,
+    "table_usage": bench_table_usage,
+    "editor_highlight": bench_editor_highlight,
+}
+
+
+def measure(func, corpus, total_lines, repeat):
+    times = []
+    collections = 0
+    for _ in range(repeat):
+        gc.collect()
+        before = gc.get_stats()[0]["collections"]
+        start = time.perf_counter()
+        count = func(corpus)
+        times.append(time.perf_counter() - start)
+        collections = gc.get_stats()[0]["collections"] - before
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = func(corpus)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    best = min(times)
+    return {
+        "count": count,
+        "seconds": best,
+        "seconds_median": statistics.median(times),
+        "lines_per_sec": total_lines / best if best else 0.0,
+        "peak_kib": (peak - baseline) / 1024,
+        "retained_kib": (current - baseline) / 1024,
+        "gc_collections": collections,
+    }
+
+
+def compare(results, corpus, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} ({baseline['meta']['timestamp']}):")
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if not old:
+            print(f"  {name:<17} (not in baseline)")
+            continue
+        speed = (result["lines_per_sec"] / old["lines_per_sec"] - 1) * 100 if old["lines_per_sec"] else 0.0
+        memory = result["peak_kib"] - old["peak_kib"]
+        print(f"  {name:<17} {speed:+7.1f}% lines/sec   {memory:+10.0f} KiB peak")
+    if baseline["meta"]["corpus"] != corpus:
+        print("  (note: the corpus settings differ from the baseline)")
+
+
+def main():
+    defaults = CorpusSpec()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packages", type=int, default=defaults.packages)
+    parser.add_argument("--lines", type=int, default=defaults.lines, help="lines per package")
+    parser.add_argument("--sql-density", type=float, default=defaults.sql_density)
+    parser.add_argument("--multiline-share", type=float, default=defaults.multiline_share)
+    parser.add_argument("--comment-share", type=float, default=defaults.comment_share)
+    parser.add_argument("--dynamic-share", type=float, default=defaults.dynamic_share)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="run only these benchmarks")
+    parser.add_argument("--output", help="save the results as JSON")
+    parser.add_argument("--compare", metavar="JSON", help="print the change against an earlier --output")
+    args = parser.parse_args()
+
+    analyzer_core.DEBUG = False
+    spec = CorpusSpec(args.packages, args.lines, args.sql_density, args.multiline_share,
+                      args.comment_share, args.dynamic_share, args.seed)
+    start = time.perf_counter()
+    corpus = generate_corpus(spec)
+    total_lines = sum(len(rows) for _, rows in corpus)
+    total_bytes = sum(len(text) for _, rows in corpus for _, text in rows)
+    print(f"Corpus: {spec.packages} packages, {total_lines:,} lines, {total_bytes / 1e6:.1f} MB "
+          f"(generated in {time.perf_counter() - start:.1f}s)")
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        result = results[name] = measure(BENCHMARKS[name], corpus, total_lines, args.repeat)
+        print(f"  {name:<17} {result['lines_per_sec']:>12,.0f} lines/sec ({result['seconds']:.3f}s)  "
+              f"peak {result['peak_kib']:>9,.0f} KiB  gc {result['gc_collections']:>5}  count {result['count']:,}")
+
+    if args.compare:
+        compare(results, spec._asdict(), args.compare)
+    if args.output:
+        report = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "corpus": spec._asdict(),
+                "lines": total_lines,
+                "bytes": total_bytes,
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# test_atp.py is a manual connection check: it needs config.json and a live database
+collect_ignore = ["test_atp.py"]
@@ -0,0 +1,371 @@
+"""Dependency graph of a schema for impact analysis.
+
+Edges come from all_dependencies (views, synonyms, triggers, packages, types, ...) and from
+the package source scan in the cross-reference index, so a table a package only reaches
+through dynamic SQL is connected too. Edges run from the dependent object to the object it
+references, and include objects of other schemas (and PUBLIC synonyms) that reference the
+schema. Queries walk the in-memory adjacency lists breadth first:
+
+    downstream   everything that depends on X, directly or through others: what an ALTER may break
+    upstream     everything X depends on
+
+The graph is kept in a local SQLite file with the last_ddl_time of every object whose edges
+it holds; refresh_dependency_graph() re-reads the edges of changed objects only.
+"""
+import json
+import sqlite3
+import time
+from collections import defaultdict, deque
+from contextlib import closing
+from typing import NamedTuple
+
+import analyzer_core
+import perf_trace
+from analyzer_core import check_cancelled, debug_log, fetch_query
+
+DEPENDENCY_DB_PATH = "dependency_graph.db"
+DEPENDENCY_TYPES = (
+    "TABLE", "VIEW", "MATERIALIZED VIEW", "SYNONYM", "SEQUENCE", "TRIGGER", "PACKAGE", "PACKAGE BODY",
+    "PROCEDURE", "FUNCTION", "TYPE", "TYPE BODY",
+)
+IGNORED_OWNERS = ("SYS", "PUBLIC")  # built-ins (STANDARD, DBMS_OUTPUT, ...) would be upstream of everything
+TABLE_LIKE_TYPES = ("TABLE", "VIEW", "MATERIALIZED VIEW", "SYNONYM")  # what a scanned table name can be
+IN_LIST_LIMIT = 1000  # Oracle's limit on IN list entries
+
+
+class DependencyNode(NamedTuple):
+    owner: str
+    name: str
+    type: str
+
+    def __str__(self):
+        return f"{self.owner}.{self.name} ({self.type})"
+
+
+class DependencyHit(NamedTuple):
+    node: DependencyNode
+    depth: int
+    via: DependencyNode  # the node it was reached from; None for the start
+    kinds: tuple         # dependency types of that edge (HARD, REF) and scanned operations
+
+
+class DependencyGraph:
+    def __init__(self):
+        self.uses = defaultdict(dict)     # node -> {referenced node: set of kinds}
+        self.used_by = defaultdict(dict)  # node -> {dependent node: set of kinds}
+        self.by_name = defaultdict(set)   # (owner, name) -> nodes, for find()
+
+    def add_edge(self, node, referenced, kind):
+        self.uses[node].setdefault(referenced, set()).add(kind)
+        self.used_by[referenced].setdefault(node, set()).add(kind)
+        self.by_name[node[:2]].add(node)
+        self.by_name[referenced[:2]].add(referenced)
+
+    def remove_dependent(self, node):
+        """Drop the edges from node, i.e. what it was recorded to reference."""
+        for referenced in self.uses.pop(node, {}):
+            dependents = self.used_by.get(referenced)
+            if dependents is not None:
+                dependents.pop(node, None)
+                if not dependents:
+                    del self.used_by[referenced]
+
+    def find(self, owner, name, obj_type=None):
+        """Nodes named owner.name (of obj_type if given), tables and views first."""
+        found = [
+            node for node in self.by_name.get((owner.upper(), name.upper()), ())
+            if (node in self.uses or node in self.used_by) and (obj_type is None or node.type == obj_type.upper())
+        ]
+        order = {obj_type: index for index, obj_type in enumerate(DEPENDENCY_TYPES)}
+        return sorted(found, key=lambda node: order.get(node.type, len(order)))
+
+    def walk(self, starts, direction="downstream", depth=None):
+        """Breadth-first walk from the start nodes; returns [DependencyHit, ...] in visiting order.
+
+        depth limits the number of edges followed (None walks to the end). Each node is
+        reported once, at its smallest depth.
+        """
+        edges = self.used_by if direction == "downstream" else self.uses
+        hits = [DependencyHit(node, 0, None, ()) for node in starts]
+        seen = set(starts)
+        queue = deque((node, 0) for node in starts)
+        while queue:
+            node, level = queue.popleft()
+            if depth is not None and level >= depth:
+                continue
+            for other, kinds in edges.get(node, {}).items():
+                if other not in seen:
+                    seen.add(other)
+                    hits.append(DependencyHit(other, level + 1, node, tuple(sorted(kinds))))
+                    queue.append((other, level + 1))
+        return hits
+
+    def subgraph_edges(self, hits):
+        """[(dependent, referenced, kinds)] among the walked nodes, for export."""
+        walked = {hit.node for hit in hits}
+        return [
+            (node, referenced, tuple(sorted(kinds)))
+            for node in sorted(walked)
+            for referenced, kinds in sorted(self.uses.get(node, {}).items())
+            if referenced in walked
+        ]
+
+
+# ---------------- Export ----------------
+def to_dot(graph, hits, direction="downstream"):
+    starts = ", ".join(f"{hit.node.owner}.{hit.node.name}" for hit in hits if hit.depth == 0)
+    lines = ["digraph dependencies {", f'  label="{direction} of {starts}";', "  rankdir=LR;",
+             "  node [shape=box, fontname=Helvetica];"]
+    for hit in hits:
+        style = ", style=bold" if hit.depth == 0 else ""
+        lines.append(f'  "{hit.node}" [label="{hit.node.owner}.{hit.node.name}\\n{hit.node.type}"{style}];')
+    for node, referenced, kinds in graph.subgraph_edges(hits):
+        lines.append(f'  "{node}" -> "{referenced}" [label="{", ".join(kinds)}"];')
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def to_json(graph, hits, direction="downstream"):
+    return json.dumps({
+        "direction": direction,
+        "nodes": [
+            {**hit.node._asdict(), "depth": hit.depth, "via": hit.via and hit.via._asdict()}
+            for hit in hits
+        ],
+        "edges": [
+            {"from": node._asdict(), "to": referenced._asdict(), "kinds": list(kinds)}
+            for node, referenced, kinds in graph.subgraph_edges(hits)
+        ],
+    }, indent=2)
+
+
+EXPORT_FORMATS = {".dot": to_dot, ".gv": to_dot, ".json": to_json}
+
+
+def export_graph(graph, hits, path, direction="downstream"):
+    for suffix, render in EXPORT_FORMATS.items():
+        if path.lower().endswith(suffix):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(render(graph, hits, direction))
+            return
+    raise ValueError(f"Unsupported graph format: {path} (use {', '.join(EXPORT_FORMATS)})")
+
+
+# ---------------- Storage ----------------
+def open_dependency_db():
+    db = sqlite3.connect(DEPENDENCY_DB_PATH, timeout=30)
+    db.executescript("""
+        CREATE TABLE IF NOT EXISTS dep_objects (
+            dsn TEXT, scope TEXT, owner TEXT, name TEXT, type TEXT, last_ddl_time TEXT,
+            PRIMARY KEY (dsn, scope, owner, name, type)
+        );
+        CREATE TABLE IF NOT EXISTS dep_edges (
+            dsn TEXT, scope TEXT, owner TEXT, name TEXT, type TEXT,
+            ref_owner TEXT, ref_name TEXT, ref_type TEXT, kind TEXT
+        );
+        CREATE INDEX IF NOT EXISTS dep_edges_object ON dep_edges (dsn, scope, owner, name, type);
+    """)
+    # Scanned edges come from the xref index, so they are rebuilt along with it
+    if db.execute("PRAGMA user_version").fetchone()[0] != analyzer_core.XREF_SCHEMA_VERSION:
+        with db:
+            db.execute("DELETE FROM dep_edges")
+            db.execute("DELETE FROM dep_objects")
+            db.execute(f"PRAGMA user_version = {analyzer_core.XREF_SCHEMA_VERSION}")
+    return db
+
+
+def load_graph(db, scope):
+    graph = DependencyGraph()
+    for owner, name, obj_type, ref_owner, ref_name, ref_type, kind in db.execute("""
+        SELECT owner, name, type, ref_owner, ref_name, ref_type, kind FROM dep_edges WHERE dsn = ? AND scope = ?
+    """, (analyzer_core.DSN or "", scope)):
+        graph.add_edge(DependencyNode(owner, name, obj_type), DependencyNode(ref_owner, ref_name, ref_type), kind)
+    return graph
+
+
+def clear_dependency_graph(schema=None):
+    with closing(open_dependency_db()) as db, db:
+        if schema:
+            params = (analyzer_core.DSN or "", schema.upper())
+            db.execute("DELETE FROM dep_edges WHERE dsn = ? AND scope = ?", params)
+            db.execute("DELETE FROM dep_objects WHERE dsn = ? AND scope = ?", params)
+        else:
+            db.execute("DELETE FROM dep_edges")
+            db.execute("DELETE FROM dep_objects")
+    graphs.clear()
+
+
+# ---------------- Refresh ----------------
+graphs = {}  # (DSN, schema) -> DependencyGraph, patched in place by refresh_dependency_graph
+
+
+def current_objects(schema):
+    """{DependencyNode: last_ddl_time} of the schema's objects and of the objects elsewhere that reference it."""
+    binds = ", ".join(f":t{i}" for i in range(len(DEPENDENCY_TYPES)))
+    rows = fetch_query(f"""
+        SELECT o.owner, o.object_name, o.object_type, o.last_ddl_time FROM all_objects o
+        WHERE o.object_type IN ({binds})
+          AND (o.owner = UPPER(:owner)
+               OR (o.owner, o.object_name, o.object_type) IN (
+                   SELECT d.owner, d.name, d.type FROM all_dependencies d
+                   WHERE d.referenced_owner = UPPER(:owner) AND d.owner <> d.referenced_owner))
+    """, {"owner": schema, **{f"t{i}": obj_type for i, obj_type in enumerate(DEPENDENCY_TYPES)}})[1]
+    return {DependencyNode(owner, name, obj_type): str(ddl_time) for owner, name, obj_type, ddl_time in rows}
+
+
+def dictionary_edges(schema, stale, bulk):
+    """[(node, referenced, kind)] from all_dependencies for the stale nodes, keeping only edges
+    that touch the schema and skipping references to IGNORED_OWNERS."""
+    owner = schema.upper()
+    columns = "owner, name, type, referenced_owner, referenced_name, referenced_type, dependency_type"
+    if bulk:
+        rows = fetch_query(f"""
+            SELECT {columns} FROM all_dependencies
+            WHERE owner = UPPER(:owner) OR referenced_owner = UPPER(:owner)
+        """, {"owner": schema})[1]
+    else:
+        rows = []
+        by_owner = defaultdict(set)
+        for node in stale:
+            by_owner[node.owner].add(node.name)
+        for node_owner, names in by_owner.items():
+            names = sorted(names)
+            for start in range(0, len(names), IN_LIST_LIMIT):
+                check_cancelled()
+                chunk = names[start:start + IN_LIST_LIMIT]
+                binds = ", ".join(f":n{i}" for i in range(len(chunk)))
+                rows += fetch_query(f"""
+                    SELECT {columns} FROM all_dependencies
+                    WHERE owner = :owner AND name IN ({binds})
+                """, {"owner": node_owner, **{f"n{i}": name for i, name in enumerate(chunk)}})[1]
+
+    edges = []
+    for dep_owner, name, obj_type, ref_owner, ref_name, ref_type, kind in rows:
+        node = DependencyNode(dep_owner, name, obj_type)
+        if node not in stale or (ref_owner in IGNORED_OWNERS and ref_owner != owner):
+            continue
+        if dep_owner != owner and ref_owner != owner:
+            continue
+        edges.append((node, DependencyNode(ref_owner, ref_name, ref_type), kind))
+    return edges
+
+
+def scanned_edges(schema, stale, objects):
+    """[(package body, table, operation)] from the xref index for the stale package bodies of schema."""
+    owner = schema.upper()
+    bodies = {node.name: node for node in stale if node.type == "PACKAGE BODY" and node.owner == owner}
+    if not bodies:
+        return []
+    by_name = {}
+    for node in objects:  # resolve a scanned name to the schema's table, view or synonym of that name
+        if node.owner == owner and node.type in TABLE_LIKE_TYPES:
+            known = by_name.get(node.name)
+            if known is None or TABLE_LIKE_TYPES.index(node.type) < TABLE_LIKE_TYPES.index(known.type):
+                by_name[node.name] = node
+
+    edges = set()
+    with closing(analyzer_core.open_xref_db()) as db:
+        for table, op, pkg in db.execute(
+            "SELECT DISTINCT table_name, operation, package FROM xref_usage WHERE dsn = ? AND owner = ?",
+            (analyzer_core.DSN or "", owner)
+        ):
+            if pkg in bodies:
+                edges.add((bodies[pkg], by_name.get(table, DependencyNode(owner, table, "TABLE")), op))
+    return sorted(edges)
+
+
+@perf_trace.timed("dependency refresh")
+def refresh_dependency_graph(schema, on_progress=None):
+    """Bring the graph of schema up to date and return (graph, number of objects re-read or dropped).
+
+    The xref index is refreshed first (on_progress(done, total) reports its package scan), then
+    only objects whose last_ddl_time changed get their edges read again.
+    """
+    scope = schema.upper()
+    dsn = analyzer_core.DSN or ""
+    analyzer_core.refresh_xref_index(schema, on_progress=on_progress)
+    objects = current_objects(schema)
+
+    with closing(open_dependency_db()) as db:
+        stored = {
+            DependencyNode(owner, name, obj_type): ddl_time
+            for owner, name, obj_type, ddl_time in db.execute(
+                "SELECT owner, name, type, last_ddl_time FROM dep_objects WHERE dsn = ? AND scope = ?", (dsn, scope)
+            )
+        }
+        stale = {node for node, ddl_time in objects.items() if stored.get(node) != ddl_time}
+        dropped = set(stored) - set(objects)
+        graph = graphs.get((dsn, scope))
+        if graph is None:
+            graph = graphs[(dsn, scope)] = load_graph(db, scope)
+        if not stale and not dropped:
+            return graph, 0
+        debug_log("[DEPS] %s: %s stale, %s dropped of %s objects", scope, len(stale), len(dropped), len(objects))
+
+        bulk = not stored or len(stale) > analyzer_core.XREF_BULK_THRESHOLD
+        edges = dictionary_edges(schema, stale, bulk) + scanned_edges(schema, stale, objects)
+        check_cancelled()
+
+        with db:
+            for node in stale | dropped:
+                db.execute("DELETE FROM dep_edges WHERE dsn = ? AND scope = ? AND owner = ? AND name = ? AND type = ?",
+                           (dsn, scope, *node))
+                db.execute("DELETE FROM dep_objects WHERE dsn = ? AND scope = ? AND owner = ? AND name = ? AND type = ?",
+                           (dsn, scope, *node))
+            db.executemany("INSERT INTO dep_edges VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                           [(dsn, scope, *node, *referenced, kind) for node, referenced, kind in edges])
+            db.executemany("INSERT INTO dep_objects VALUES (?, ?, ?, ?, ?, ?)",
+                           [(dsn, scope, *node, objects[node]) for node in stale])
+
+    for node in stale | dropped:
+        graph.remove_dependent(node)
+    for node, referenced, kind in edges:
+        graph.add_edge(node, referenced, kind)
+    return graph, len(stale) + len(dropped)
+
+
+@perf_trace.timed("Dependents")
+def impact_analysis(schema, name, direction="downstream", depth=None, obj_type=None, refresh=True, on_progress=None):
+    """Return (graph, [DependencyHit, ...]) for the objects named schema.name and what they
+    depend on (upstream) or what depends on them (downstream), to depth."""
+    start = time.perf_counter()
+    if refresh:
+        graph, _ = refresh_dependency_graph(schema, on_progress)
+    else:
+        graph = graphs.get((analyzer_core.DSN or "", schema.upper()))
+        if graph is None:
+            with closing(open_dependency_db()) as db:
+                graph = graphs[(analyzer_core.DSN or "", schema.upper())] = load_graph(db, schema.upper())
+
+    walk_start = time.perf_counter()
+    starts = graph.find(schema, name, obj_type) or [DependencyNode(schema.upper(), name.upper(), obj_type or "TABLE")]
+    hits = graph.walk(starts, direction, depth)
+    debug_log("[DEPS] %s of %s.%s: %s objects, walk %.1f ms, total %.1f ms", direction, schema, name,
+              len(hits) - len(starts), (time.perf_counter() - walk_start) * 1000, (time.perf_counter() - start) * 1000)
+    return graph, hits
+
+
+def format_impact(hits, direction="downstream"):
+    """Report lines with one indented entry per object, under the object it was reached from."""
+    children = defaultdict(list)
+    for hit in sorted(hits, key=lambda hit: hit.node):
+        if hit.via is not None:
+            children[hit.via].append(hit)
+    title = "Dependents" if direction == "downstream" else "Dependencies"
+    lines = []
+
+    def add(hit, indent):
+        kinds = f" [{', '.join(hit.kinds)}]" if hit.kinds else ""
+        lines.append(f"{'  ' * indent}- {hit.node}{kinds}")
+        for child in children[hit.node]:
+            add(child, indent + 1)
+
+    for hit in hits:
+        if hit.depth == 0:
+            lines.append(f"{title} of {hit.node}:")
+            if not children[hit.node]:
+                lines.append("  (none)")
+            for child in children[hit.node]:
+                add(child, 1)
+    lines.append(f"Total: {sum(1 for hit in hits if hit.depth > 0)} objects")
+    return lines
@@ -0,0 +1,291 @@
+"""Incremental helpers for the Tk text widgets (SQL editor and package source view).
+
+Both the highlighter and the line-number gutter work from change notifications instead of re-reading the whole buffer on every key
+press, so their cost follows the size of the edit rather than the size of the script.
+"""
+from bisect import bisect_left, bisect_right
+from itertools import islice
+import tkinter as tk
+from tkinter import font as tkfont
+
+from plsql_parser import highlight_line
+
+
+# ---------------- Change Notifications ----------------
+def add_change_listener(widget, listener):
+    """Call listener(line, delta, last) after every insert/delete/replace on a Text widget.
+
+    line is the first line touched, delta the change in line count and last the last line
+    holding inserted text (line itself for a delete). The widget's Tcl command is wrapped
+    once (the same trick idlelib uses), so typing, paste, undo/redo and programmatic edits
+    are all reported.
+    """
+    listeners = getattr(widget, "_change_listeners", None)
+    if listeners is None:
+        listeners = widget._change_listeners = []
+        original = widget._w + "_orig"
+        call = widget.tk.call
+        widget.tk.call("rename", widget._w, original)
+
+        def line_count():
+            return int(call(original, "index", "end-1c").split(".")[0])
+
+        def proxy(command, *args):
+            if command not in ("insert", "delete", "replace") or not args:
+                return call(original, command, *args)
+            before = line_count()
+            line = min(int(call(original, "index", args[0]).split(".")[0]), before)
+            result = call(original, command, *args)
+            delta = line_count() - before
+            inserted = args[1::2] if command == "insert" else args[2::2] if command == "replace" else ()
+            last = line + sum(str(text).count("\n") for text in inserted)
+            for notify in listeners:
+                notify(line, delta, last)
+            return result
+
+        widget.tk.createcommand(widget._w, proxy)
+        if widget._tclCommands is None:
+            widget._tclCommands = []
+        widget._tclCommands.append(widget._w)  # removed again by widget.destroy()
+    listeners.append(listener)
+
+
+def visible_lines(widget):
+    """First and last line (1-based) currently shown in a Text widget."""
+    first = int(widget.index("@0,0").split(".")[0])
+    last = int(widget.index(f"@0,{widget.winfo_height()}").split(".")[0])
+    return first, last
+
+
+# ---------------- Syntax Highlighting ----------------
+UNKNOWN = object()  # entry state of a line that has not been tokenized yet
+
+
+class IncrementalHighlighter:
+    """Keeps "keyword" and "comment" tags on a Text widget up to date.
+
+    Only edited lines are re-tokenized. Tokenizing continues past the edit only while the
+    lexer state at the start of the next line changes (e.g. after typing "/*"). Edits are
+    coalesced for DEBOUNCE_MS, and each pass paints the visible lines before the rest.
+    """
+    DEBOUNCE_MS = 30
+    TOKENIZE_CHUNK = 2000   # lines tokenized per pass
+    PAINT_CHUNK = 300       # off-screen lines painted per pass
+    TAGS = ("keyword", "comment")
+
+    def __init__(self, widget, keywords):
+        self.widget = widget
+        self.keywords = frozenset(k.upper() for k in keywords)
+        self.states = [None]    # lexer state at the start of each line; index 0 is line 1
+        self.dirty = None       # first line whose state must be recomputed
+        self.dirty_end = 0      # last edited line; tokenizing never stops before it
+        self.unpainted = {}     # line -> spans waiting to be applied as tags
+        self.pending = None
+        self.on_painted = None  # optional callback after a pass that painted lines, for benchmarks
+
+        add_change_listener(widget, self.on_change)
+        line_count = int(widget.index("end-1c").split(".")[0])
+        self.states += [UNKNOWN] * (line_count - 1)
+        self.on_change(1, 0, line_count)
+
+    def on_change(self, line, delta, last):
+        if delta > 0:
+            self.states[line:line] = [UNKNOWN] * delta
+        elif delta < 0:
+            del self.states[line:line - delta]
+        if delta and self.unpainted:
+            removed_to = line - delta if delta < 0 else line
+            self.unpainted = {
+                (n + delta if n > line else n): spans
+                for n, spans in self.unpainted.items()
+                if not line < n <= removed_to
+            }
+
+        if self.dirty is None:
+            self.dirty, self.dirty_end = line, 0
+        else:
+            if self.dirty > line:
+                # A pass is still under way below this edit and the states from where it
+                # got to are stale, so tokenizing must not stop before that line
+                self.dirty_end = max(self.dirty_end, self.dirty)
+            self.dirty = min(self.dirty, line)
+            if self.dirty_end > line:
+                self.dirty_end = max(line, self.dirty_end + delta)
+        self.dirty_end = max(self.dirty_end, last)
+        self.schedule()
+
+    def schedule(self):
+        if self.pending is None:
+            self.pending = self.widget.after(self.DEBOUNCE_MS, self.run)
+
+    def run(self):
+        self.pending = None
+        if self.dirty is not None:
+            self.tokenize()
+        painted = self.paint()
+        if self.dirty is not None or self.unpainted:
+            self.pending = self.widget.after(1, self.run)
+        if painted and self.on_painted:
+            self.on_painted()
+
+    def tokenize(self):
+        first = self.dirty
+        line_count = len(self.states)
+        last = min(line_count, first + self.TOKENIZE_CHUNK - 1)
+        lines = self.widget.get(f"{first}.0", f"{last}.end").split("\n")
+        states = self.states
+        keywords = self.keywords
+        state = states[first - 1]
+
+        for line, text in enumerate(lines, first):
+            self.unpainted[line], state = highlight_line(text, state, keywords)
+            if line >= line_count or (line >= self.dirty_end and states[line] == state):
+                self.dirty = None
+                return
+            states[line] = state
+        self.dirty = last + 1
+
+    def paint(self):
+        if not self.unpainted:
+            return 0
+        first, last = visible_lines(self.widget)
+        # Lines below the tokenized part are not final yet
+        limit = self.dirty - 1 if self.dirty is not None else len(self.states)
+        lines = [n for n in range(first, min(last, limit) + 1) if n in self.unpainted]
+        lines += [n for n in islice(self.unpainted, self.PAINT_CHUNK) if n <= limit and not first <= n <= last]
+        if not lines:
+            return 0
+
+        lines.sort()
+        widget = self.widget
+        ranges = {tag: [] for tag in self.TAGS}
+        run_start = previous = None
+        for line in lines:
+            if run_start is None:
+                run_start = line
+            elif line != previous + 1:
+                for tag in self.TAGS:
+                    widget.tag_remove(tag, f"{run_start}.0", f"{previous}.end")
+                run_start = line
+            previous = line
+            for tag, start, end in self.unpainted.pop(line):
+                ranges[tag] += (f"{line}.{start}", f"{line}.{end}")
+        for tag in self.TAGS:
+            widget.tag_remove(tag, f"{run_start}.0", f"{previous}.end")
+            if ranges[tag]:
+                widget.tag_add(tag, *ranges[tag])
+        return len(lines)
+
+
+# ---------------- Line Number Gutter ----------------
+class LineNumberGutter(tk.Canvas):
+    """Line numbers for a Text widget, drawn on a Canvas for the visible lines only.
+
+    Takes over the editor's yscrollcommand (passing it on to scroll_command) and redraws
+    when the view moves, the editor is resized or the line count changes. The numbers are
+    a fixed pool of canvas items that are moved and relabelled, never rebuilt.
+    """
+    PAD = 5
+
+    def __init__(self, master, editor, scroll_command=None, **kwargs):
+        kwargs.setdefault("background", "#F0F0F0")
+        super().__init__(master, highlightthickness=0, takefocus=0, **kwargs)
+        self.editor = editor
+        self.scroll_command = scroll_command
+        self.font = tkfont.Font(root=editor, font=editor.cget("font"))
+        self.line_count = int(editor.index("end-1c").split(".")[0])
+        self.digits = 0
+        self.items = []
+        self.drawn = None  # what the current drawing was made for, to skip identical redraws
+
+        editor.config(yscrollcommand=self.on_editor_scroll)
+        editor.bind("<Configure>", lambda e: self.redraw(), add="+")
+        add_change_listener(editor, self.on_change)
+        self.update_width()
+
+    def on_editor_scroll(self, first, last):
+        if self.scroll_command:
+            self.scroll_command(first, last)
+        self.redraw()
+
+    def on_change(self, line, delta, last):
+        if delta:
+            self.line_count += delta
+            self.update_width()
+            self.redraw()
+
+    def update_width(self):
+        digits = max(len(str(self.line_count)), 2)
+        if digits != self.digits:
+            self.digits = digits
+            self.config(width=self.font.measure("9" * digits) + 2 * self.PAD)
+            self.drawn = None
+
+    def redraw(self):
+        editor = self.editor
+        height = editor.winfo_height()
+        first = int(editor.index("@0,0").split(".")[0])
+        last = min(int(editor.index(f"@0,{height}").split(".")[0]), self.line_count)
+        first_info = editor.dlineinfo(f"{first}.0")
+        last_info = editor.dlineinfo(f"{last}.0")
+        if first_info is None:
+            return  # not mapped yet
+        # The y of the first and last visible line also catch re-wrapping of long lines
+        key = (first, first_info[1], last, last_info and last_info[1], self.line_count, self.digits)
+        if key == self.drawn:
+            return
+        self.drawn = key
+
+        x = int(self.cget("width")) - self.PAD
+        shown = 0
+        for line in range(first, last + 1):
+            info = editor.dlineinfo(f"{line}.0")
+            if info is None:
+                break
+            if shown < len(self.items):
+                item = self.items[shown]
+                self.coords(item, x, info[1])
+                self.itemconfigure(item, text=line, state="normal")
+            else:
+                self.items.append(self.create_text(x, info[1], anchor="ne", text=line,
+                                                   font=self.font, fill="#606060"))
+            shown += 1
+        for item in self.items[shown:]:
+            self.itemconfigure(item, state="hidden")
+
+
+# ---------------- Bulk Line Tags ----------------
+class LineTagPainter:
+    """Applies a tag to a sorted list of whole lines without blocking the UI.
+
+    The lines on screen are tagged at once; the rest follow CHUNK lines per event-loop
+    turn, each chunk in a single tag_add call. cancel() stops a painter whose text has
+    been replaced.
+    """
+    CHUNK = 5000
+
+    def __init__(self, widget, tag, lines):
+        self.widget = widget
+        self.tag = tag
+        first, last = visible_lines(widget)
+        start, end = bisect_left(lines, first), bisect_right(lines, last)
+        self.tag_lines(lines[start:end])
+        self.remaining = lines[:start] + lines[end:]
+        self.pending = widget.after(1, self.run) if self.remaining else None
+
+    def tag_lines(self, lines):
+        if lines:
+            ranges = []
+            for line in lines:
+                ranges += (f"{line}.0", f"{line}.end")
+            self.widget.tag_add(self.tag, *ranges)
+
+    def run(self):
+        chunk, self.remaining = self.remaining[:self.CHUNK], self.remaining[self.CHUNK:]
+        self.tag_lines(chunk)
+        self.pending = self.widget.after(1, self.run) if self.remaining else None
+
+    def cancel(self):
+        if self.pending:
+            self.widget.after_cancel(self.pending)
+            self.pending = None
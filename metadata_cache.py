@@ -0,0 +1,116 @@
+"""TTL + LRU cache for data dictionary lookups.
+
+Entries are keyed by (kind, owner, object), e.g. ("columns", "HR", "EMPLOYEES") or
+("tables", "HR", ""), and belong to one database (the scope, normally the DSN). They can
+be saved to a JSON file and loaded again in the next session.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    raise TypeError(f"Cannot cache {type(value).__name__}")
+
+
+def _decode(obj):
+    if "$datetime" in obj:
+        return datetime.fromisoformat(obj["$datetime"])
+    return obj
+
+
+class MetadataCache:
+    def __init__(self, ttl=900, max_entries=5000, path=None):
+        self.ttl = ttl                  # seconds an entry stays valid
+        self.max_entries = max_entries  # least recently used entries are dropped above this
+        self.path = path                # JSON file for persistence; None keeps the cache in memory
+        self.scope = None
+        self.entries = OrderedDict()    # key -> (stored_at, value), oldest use first
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        """Return (True, value) for a live entry, else (False, None)."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and time.time() - entry[0] < self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry:
+                del self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, stored_at=None):
+        with self.lock:
+            self.entries[key] = (stored_at or time.time(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        found, value = self.get(key)
+        if not found:
+            value = loader()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, kind=None, owner=None, obj=None):
+        """Drop every entry matching the given parts (None matches anything); returns the count."""
+        wanted = (kind, owner and owner.upper(), obj and obj.upper())
+        with self.lock:
+            keys = [
+                key for key in self.entries
+                if all(part is None or part == actual for part, actual in zip(wanted, key))
+            ]
+            for key in keys:
+                del self.entries[key]
+        return len(keys)
+
+    def bind(self, scope):
+        """Switch to the entries of another database, loading them from disk if persisted."""
+        if scope == self.scope:
+            return
+        with self.lock:
+            self.entries.clear()
+            self.scope = scope
+        self.load()
+
+    def read_file(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f, object_hook=_decode)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Ignoring unreadable metadata cache {self.path}: {e}", file=sys.stderr)
+            return {}
+
+    def load(self):
+        now = time.time()
+        for kind, owner, obj, stored_at, value in self.read_file().get(self.scope or "", []):
+            if now - stored_at < self.ttl:
+                self.put((kind, owner, obj), value, stored_at)
+
+    def save(self):
+        if not self.path:
+            return
+        data = self.read_file()
+        now = time.time()
+        with self.lock:
+            data[self.scope or ""] = [
+                [*key, stored_at, value]
+                for key, (stored_at, value) in self.entries.items()
+                if now - stored_at < self.ttl
+            ]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, default=_encode)
+        os.replace(tmp_path, self.path)
@@ -1,38 +1,31 @@
+import time
+startup_started = time.perf_counter()  # start of the startup timing report
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog, simpledialog,Toplevel, Text, Scrollbar, BOTH, RIGHT, Y
 import threading
-from threading import Thread
 import json
 import re
-import csv
-from collections import defaultdict
+from collections import OrderedDict
 from PIL import Image, ImageTk
 import os
-import oracledb
 import getpass
-import time
 import textwrap
 
-DEBUG = True  # Set False to disable debug logs
-username = getpass.getuser()
-fetch_rows = 50
-cancel_flag = False
-current_connection = None  # Tracks the active DB connection
-
-
-def debug_log(msg):
-    if DEBUG:
-        print("[DEBUG]", msg)
-
-# ---------------- Constants and Globals ----------------
-OPERATION_PATTERNS = {
-    "SELECT": re.compile(r"\bSELECT\b.*?\bFROM\b\s+(?:\w+\.)?([a-zA-Z0-9_]+)", re.IGNORECASE | re.DOTALL),
-    "INSERT": re.compile(r"\bINSERT\s+INTO\s+(?:\w+\.)?([a-zA-Z0-9_]+)", re.IGNORECASE),
-    "UPDATE": re.compile(r"\bUPDATE\s+(?:\w+\.)?([a-zA-Z0-9_]+)\s+SET\b", re.IGNORECASE),
-    "DELETE": re.compile(r"\bDELETE\s+FROM\s+(?:\w+\.)?([a-zA-Z0-9_]+)", re.IGNORECASE),
-}
+import analyzer_core  # "log_level": "debug" in config.json prints debug logs
+import dependency_graph
+import perf_trace
+import result_export
+import source_search
+from editor_widgets import IncrementalHighlighter, LineNumberGutter, LineTagPainter
+from result_pages import RESULT_PAGE_SIZE, get_result_rows
+from analyzer_core import (
+    debug_log, log, pooled_connection, close_session_pool, Job, JobCancelled,
+    fetch_query, execute_query, get_schema_objects, get_all_schemas, get_tables,
+)
 
-DB_USER = DB_PASS = DSN = None
+analyzer_core.load_log_level()
+username = getpass.getuser()
+startup_times = {"import": time.perf_counter() - startup_started}
 
 # Get the directory where the current script resides
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -41,54 +34,52 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # ---------------- Configuration I/O ----------------
 def load_config():
     try:
-        with open("config.json", "r") as f:
-            cfg = json.load(f)
+        cfg = analyzer_core.read_config()
 
-            # Clear existing text first
-            username_entry.delete(0, tk.END)
-            password_entry.delete(0, tk.END)
-            dsn_entry.delete(0, tk.END)
+        # Clear existing text first
+        username_entry.delete(0, tk.END)
+        password_entry.delete(0, tk.END)
+        dsn_entry.delete(0, tk.END)
 
-            # Insert loaded values
-            username_entry.insert(0, cfg.get("db_user", ""))
-            password_entry.insert(0, cfg.get("db_password", ""))
-            dsn_entry.insert(0, cfg.get("dsn", ""))
+        # Insert loaded values
+        username_entry.insert(0, cfg.get("db_user", ""))
+        password_entry.insert(0, cfg.get("db_password", ""))
+        dsn_entry.insert(0, cfg.get("dsn", ""))
 
-            return cfg.get("db_user"), cfg.get("db_password"), cfg.get("dsn")
+        return cfg.get("db_user"), cfg.get("db_password"), cfg.get("dsn")
     except Exception as e:
-        debug_log(f"[ERROR] Failed to load config: {e}")
+        log("error", "Failed to load config: %s", e)
         return "", "", ""
 
 def save_config():
     user = username_entry.get()
     password = password_entry.get()
     dsn = dsn_entry.get()
-    with open("config.json", "w") as f:
-        json.dump({
-            "db_user": user,
-            "db_password": password,
-            "dsn": dsn
-        }, f, indent=4)
+
+    # Keep any extra settings (e.g. pool sizing) already in the file
+    try:
+        cfg = analyzer_core.read_config()
+    except Exception:
+        cfg = {}
+
+    cfg.update({
+        "db_user": user,
+        "db_password": password,
+        "dsn": dsn
+    })
+    with open(analyzer_core.CONFIG_PATH, "w") as f:
+        json.dump(cfg, f, indent=4)
 
 # ---------------- Database Operations ----------------
 def connect():
-    global DB_USER, DB_PASS, DSN, current_connection
-    DB_USER, DB_PASS, DSN = load_config()
+    """(Re)create the shared session pool from the saved credentials, reporting failures in a dialog."""
+    user, password, dsn = load_config()
     try:
-        conn = oracledb.connect(user=DB_USER, password=DB_PASS, dsn=DSN)
-        current_connection = conn  # Track active connection
-
-        # Query for DB name (service_name)
-        cursor = conn.cursor()
-        cursor.execute("SELECT SYS_CONTEXT('USERENV','SERVICE_NAME') FROM dual")
-        db_name = cursor.fetchone()[0]
-
-        return conn, (DB_USER, db_name)
+        return analyzer_core.connect(user, password, dsn)
     except Exception as e:
         messagebox.showerror("Connection Failed", str(e))
         return None, (None, None)
 
-
 def connect_worker():
     def stop_loader():
         progress_bar1.stop()
@@ -96,11 +87,11 @@ def connect_worker():
 
     try:
         save_config()
-        conn, (username, dbname) = connect()
-        if conn:
+        pool, (username, dbname) = connect()
+        if pool:
             def update_ui():
                 footer_label.config(text=f"Connected as {username} @ {dbname}", foreground="green")
-                for i in range(1, 5):
+                for i in range(1, 6):
                     notebook.tab(i, state='normal')
                 notebook.select(1)
                 
@@ -111,16 +102,36 @@ def connect_worker():
                 connect_btn.config(state="disabled")
                 disconnect_btn.config(state="normal")  # Enable Disconnect button
             app.after(0, update_ui)
+            load_session_data()
     except Exception as e:
         err_msg = str(e)
         app.after(0, lambda: messagebox.showerror("Error", err_msg))
     finally:
         app.after(0, stop_loader)
 
-def cancel_operation():
-    global cancel_flag
-    cancel_flag = True
+def load_session_data():
+    """Fill the schema lists and saved SQL sheets in the background once connected.
+
+    The schema list is queried once and shared by all the schema comboboxes.
+    """
+    def worker():
+        schemas = get_all_schemas()
+        debug_log("[STARTUP] Loaded %s schemas", len(schemas))
+
+        def update_ui():
+            for combo in (schema_entry_table, schema_entry_pkg_list, schema_entry_package, schema_entry_search):
+                combo['values'] = schemas
+        app.after(0, update_ui)
+        refresh_sql_list(on_done=lambda: record_startup_time("first data"))
+
+    run_in_thread(worker)
 
+def record_startup_time(stage):
+    if stage in startup_times:
+        return
+    startup_times[stage] = time.perf_counter() - startup_started
+    report = ", ".join(f"{name} {elapsed:.2f}s" for name, elapsed in startup_times.items())
+    debug_log("[STARTUP] %s", report)
 
 def connect_callback():
     def start_loader():
@@ -131,11 +142,10 @@ def connect_callback():
     run_in_thread(connect_worker)
 
 def disconnect():
-    global current_connection
     try:
-        if current_connection:
-            current_connection.close()
-            current_connection = None
+        if analyzer_core.session_pool:
+            close_result_view()
+            close_session_pool()
 
             # Re-enable inputs
             username_entry.config(state="normal")
@@ -147,7 +157,7 @@ def disconnect():
             footer_label.config(text="Disconnected", foreground="red")
 
             # Disable tabs again
-            for i in range(1, 5):
+            for i in range(1, 6):
                 notebook.tab(i, state='disabled')
             notebook.select(0)  # Go back to connection tab
 
@@ -156,57 +166,7 @@ def disconnect():
         messagebox.showerror("Error", f"Failed to disconnect: {str(e)}")
 
 
-def fetch_query(query, params=None, on_progress=None, batch_size=1000, on_cancel=None):
-    global cancel_flag
-    cancel_flag = False
-    results = []
-
-    conn, _ = connect()
-    if not conn:
-        raise Exception("Database connection failed.")
-
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute(query, params or [])
-            columns = [desc[0] for desc in cursor.description]
-
-            while True:
-                if cancel_flag:
-                    if on_cancel:
-                        on_cancel()
-                    break
-                rows = cursor.fetchmany(batch_size)
-                if not rows:
-                    break
-                results.extend(rows)
-                if on_progress:
-                    on_progress(len(results))
-
-            return columns, results
-    finally:
-        conn.close()
-
-    
-def execute_query(query, params=None):
-    global cancel_flag
-    cancel_flag = False
-
-    conn, _ = connect()
-    if not conn:
-        raise Exception("Database connection failed.")
-
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute(query, params or [])
-        conn.commit()
-        return True
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
-
-def show_progress_dialog(title="Executing...", message="Please wait..."):
+def show_progress_dialog(job, title="Executing...", message="Please wait..."):
     progress_win = tk.Toplevel()
     progress_win.title(title)
     progress_win.geometry("300x100")
@@ -217,13 +177,14 @@ def show_progress_dialog(title="Executing...", message="Please wait..."):
     label = ttk.Label(progress_win, text=message)
     label.pack(pady=10)
 
-    cancel_btn = ttk.Button(progress_win, text="Cancel", command=cancel_operation)
+    cancel_btn = ttk.Button(progress_win, text="Cancel", command=job.cancel)
     cancel_btn.pack()
 
     return progress_win
 
 def run_fetch_in_background(query):
-    progress_win = show_progress_dialog("Fetching...", "Running query...")
+    job = Job("Fetch")
+    progress_win = show_progress_dialog(job, "Fetching...", "Running query...")
 
     def worker():
         try:
@@ -238,240 +199,234 @@ def run_fetch_in_background(query):
                 display_query_results(cols, rows)
             app.after(0, update_ui)
 
+        except JobCancelled:
+            app.after(0, progress_win.destroy)
         except Exception as e:
             progress_win.destroy()
             messagebox.showerror("Error", f"Query failed:\n{str(e)}")
 
-    Thread(target=worker, daemon=True).start()
+    run_in_thread(worker, job=job)
 
 def display_query_results(columns, rows):
+    open_result_rows(columns, rows)
+    result_label.config(text=f"✅ Query Result – {len(rows)} rows")
+
+# ---------------- Virtual Result Grid ----------------
+# The result grid only ever holds the rows that fit on screen; result_pages pages them in
+# from the open cursor as the user scrolls.
+RESULT_ROW_HEIGHT = 22     # fixed so the number of visible rows can be computed from the height
+RESULT_HEADER_HEIGHT = 25
+
+result_view = {
+    "conn": None,          # pooled session held while the cursor is open
+    "cursor": None,
+    "rows": None,          # a plain list instead of a cursor (display_query_results)
+    "pages": OrderedDict(),
+    "next_page": 0,        # page a plain fetchmany() returns next
+    "known_rows": 0,       # rows seen so far
+    "total": None,         # exact row count once the cursor is exhausted
+    "offset": 0,           # first row shown
+    "visible": 20,         # rows that fit in the grid
+}
+
+def close_result_view():
+    cursor, conn = result_view["cursor"], result_view["conn"]
+    result_view.update(conn=None, cursor=None, rows=None, pages=OrderedDict(), next_page=0,
+                       known_rows=0, total=None, offset=0)
+    if cursor:
+        try:
+            cursor.close()
+        except Exception as e:
+            debug_log("Result cursor already closed: %s", e)
+    if conn:
+        analyzer_core.release_connection(conn)
+
+def set_result_columns(columns):
     result_tree.delete(*result_tree.get_children())
     result_tree["columns"] = columns
+    result_tree["show"] = "headings"
     for col in columns:
         result_tree.heading(col, text=col)
-    for row in rows:
-        result_tree.insert("", tk.END, values=row)
-    result_label.config(text=f"✅ Query Result – {len(rows)} rows")
 
-def get_schema_objects(schema, obj_type):
-    return [row[0] for row in fetch_query(
-        "SELECT object_name FROM all_objects WHERE owner = UPPER(:1) AND object_type = :2 ORDER BY object_name",
-        [schema, obj_type]
-    )[1]]
+def execute_result_cursor(query, job, call_timeout=0):
+    """Execute query on a session that stays borrowed for the result grid (worker thread).
 
-def get_all_schemas():
+    Returns (conn, cursor, columns, first_page). conn and cursor are None for statements
+    without a result set; those are committed and their session is released right away.
+    The session is attached to job while the statement runs, so job.cancel() interrupts it.
+    """
+    conn = analyzer_core.acquire_connection()
     try:
-        return [row[0] for row in fetch_query("SELECT username FROM all_users ORDER BY username")[1]]
-    except:
-        return []
+        job.attach(conn)
+        conn.call_timeout = call_timeout  # ms, 0 = no limit
+        cursor = conn.cursor(scrollable=True)
+        cursor.arraysize = RESULT_PAGE_SIZE
+        cursor.prefetchrows = RESULT_PAGE_SIZE + 1
+        debug_log("Executing query:\n%s", query)
+        cursor.execute(query)
+        if cursor.description:
+            rows = cursor.fetchmany(RESULT_PAGE_SIZE)
+        else:
+            conn.commit()
+            debug_log("Non-SELECT query executed and committed.")
+    except BaseException:
+        job.detach(conn)
+        conn.call_timeout = 0
+        analyzer_core.release_connection(conn)
+        raise
+
+    job.detach(conn)
+    conn.call_timeout = 0  # pooled sessions keep their settings
+    if job.cancelled or not cursor.description:
+        cursor.close()
+        analyzer_core.release_connection(conn)
+        job.check()
+        return None, None, [], []
+    return conn, cursor, [desc[0] for desc in cursor.description], rows
+
+def show_result_cursor(conn, cursor, columns, first_page):
+    """Hand a cursor from execute_result_cursor() to the grid (Tk thread)."""
+    close_result_view()
+    result_view.update(conn=conn, cursor=cursor, next_page=1, known_rows=len(first_page))
+    result_view["pages"][0] = first_page
+    if len(first_page) < RESULT_PAGE_SIZE:
+        result_view["total"] = len(first_page)
+    set_result_columns(columns)
+    render_result_window()
+
+def open_result_rows(columns, rows):
+    close_result_view()
+    result_view.update(rows=list(rows), known_rows=len(rows), total=len(rows))
+    set_result_columns(columns)
+    render_result_window()
+
+def result_row_span():
+    """Rows the scrollbar spans: exact once known, otherwise one page past what has been seen."""
+    if result_view["total"] is not None:
+        return result_view["total"]
+    return result_view["known_rows"] + RESULT_PAGE_SIZE
+
+def render_result_window():
+    visible = result_view["visible"]
+    try:
+        rows = get_result_rows(result_view, result_view["offset"], visible)
+    except Exception as e:
+        debug_log("Failed to fetch result rows: %s", e)
+        result_label.config(text=f"❌ Fetch failed: {e}")
+        rows = []
+
+    # Reuse the existing items instead of rebuilding the tree on every scroll
+    items = result_tree.get_children()
+    for i, row in enumerate(rows):
+        if i < len(items):
+            result_tree.item(items[i], values=row)
+        else:
+            result_tree.insert("", tk.END, values=row)
+    if len(items) > len(rows):
+        result_tree.delete(*items[len(rows):])
 
-def get_tables(schema):
-    return [row[0] for row in fetch_query(
-        "SELECT table_name FROM all_tables WHERE owner = UPPER(:1) and TABLE_NAME != 'MY_SQL_SHEETS' ORDER BY table_name", [schema]
-    )[1]]
+    span = max(result_row_span(), 1)
+    first = result_view["offset"] / span
+    result_scrollbar.set(first, min(1.0, first + visible / span))
+    update_result_position_label(len(rows))
 
-def get_sequences(schema):
-    return [row[0] for row in fetch_query(
-        "SELECT sequence_name FROM all_sequences WHERE sequence_owner = UPPER(:1) ORDER BY sequence_name", [schema]
-    )[1]]
+def update_result_position_label(shown):
+    if result_view["cursor"] is None:
+        return
+    offset = result_view["offset"]
+    total = result_view["total"]
+    count = f"{total:,}" if total is not None else f"{result_view['known_rows']:,}+"
+    if shown:
+        result_label.config(text=f"✅ Rows {offset + 1:,}–{offset + shown:,} of {count}")
+    else:
+        result_label.config(text=f"✅ Query Result – {count} rows")
+
+def scroll_result_to(offset):
+    offset = max(0, min(int(offset), result_row_span() - result_view["visible"]))
+    if offset != result_view["offset"]:
+        result_view["offset"] = offset
+        render_result_window()
+        # Scrolled onto the end of the data: the span may have shrunk to the real total
+        if offset > max(0, result_row_span() - result_view["visible"]):
+            scroll_result_to(offset)
+
+def on_result_scrollbar(action, amount, unit=None):
+    if action == "moveto":
+        scroll_result_to(float(amount) * result_row_span())
+    else:
+        step = result_view["visible"] if unit == "pages" else 1
+        scroll_result_to(result_view["offset"] + int(amount) * step)
+
+def on_result_mousewheel(event):
+    if event.num == 4:
+        delta = -3
+    elif event.num == 5:
+        delta = 3
+    else:
+        delta = -3 if event.delta > 0 else 3
+    scroll_result_to(result_view["offset"] + delta)
+    return "break"
 
-def get_package_source(schema, name):
-    return fetch_query("""
-        SELECT line, text FROM all_source 
-        WHERE owner = UPPER(:1) AND name = UPPER(:2) AND type IN ('PACKAGE BODY', 'PROCEDURE', 'FUNCTION')
-        ORDER BY line
-    """, [schema, name])[1]
+def on_result_key(event):
+    step = result_view["visible"] if event.keysym == "Next" else -result_view["visible"]
+    scroll_result_to(result_view["offset"] + step)
+    return "break"
+
+def on_result_resize(event):
+    visible = max(1, (event.height - RESULT_HEADER_HEIGHT) // RESULT_ROW_HEIGHT)
+    if visible != result_view["visible"]:
+        result_view["visible"] = visible
+        render_result_window()
 
 # ---------------- Text Analysis Helpers ----------------
 def analyze_table():
-    output = []
     schema = schema_entry_table.get().strip()
     table_name = table_entry.get().strip()
 
-    debug_log(f"[INPUT] Schema: {schema}")
-    debug_log(f"[INPUT] Table: {table_name}")
-
     if not schema or not table_name:
         messagebox.showwarning("Input Error", "Please enter both schema and table name.")
         return
 
-    try:
-        # --- Columns ---
-        debug_log("[STEP] Fetching columns")
-        cols = fetch_query("""
-            SELECT column_name, data_type, data_length 
-            FROM all_tab_columns 
-            WHERE table_name = UPPER(:1) AND owner = UPPER(:2) 
-            ORDER BY column_id
-        """, [table_name, schema])[1]
-        debug_log(f"[RESULT] Columns found: {len(cols)}")
-        output.append("Columns:")
-        output.extend(f"  - {c[0]} ({c[1]} [{c[2]}])" for c in cols)
-
-        # --- Constraints ---
-        debug_log("[STEP] Fetching constraints")
-        cons = fetch_query("""
-            SELECT ac.constraint_name, ac.constraint_type, acc.column_name
-            FROM all_constraints ac
-            JOIN all_cons_columns acc ON ac.constraint_name = acc.constraint_name AND ac.owner = acc.owner
-            WHERE ac.table_name = UPPER(:1) AND ac.owner = UPPER(:2)
-            ORDER BY ac.constraint_name, acc.position
-        """, [table_name, schema])[1]
-        debug_log(f"[RESULT] Constraints found: {len(cons)}")
-        output.append("\nConstraints:")
-        output.extend(f"  - {c[0]} ({c[1]}) [{c[2]}]" for c in cons)
-
-        # --- Indexes ---
-        debug_log("[STEP] Fetching indexes")
-        idxs = fetch_query("""
-            SELECT ai.index_name, ai.uniqueness, aic.column_name
-            FROM all_indexes ai
-            JOIN all_ind_columns aic ON ai.index_name = aic.index_name AND ai.table_owner = aic.table_owner
-            WHERE ai.table_name = UPPER(:1) AND ai.owner = UPPER(:2)
-            ORDER BY ai.index_name, aic.column_position
-        """, [table_name, schema])[1]
-        debug_log(f"[RESULT] Indexes found: {len(idxs)}")
-        output.append("\nIndexes:")
-        output.extend(f"  - {i[0]} ({i[1]}) [{i[2]}]" for i in idxs)
-
-        # --- Sequences Used ---
-        debug_log("[STEP] Checking sequences used")
-        output.append("\nSequences Used:")
-        used_sequences = set()
-        trigger_seq_map = {}
-        col_seq_map = {}
-
-        # --- From triggers ---
-        debug_log("[STEP] Analyzing triggers for sequences")
-        triggers = fetch_query("""
-            SELECT trigger_name, trigger_body
-            FROM all_triggers
-            WHERE table_owner = UPPER(:1)
-            AND table_name = UPPER(:2)
-        """, [schema, table_name])[1]
-        debug_log(f"[RESULT] Triggers found: {len(triggers)}")
-        for trigger_name, trigger_body in triggers:
-            if trigger_body:
-                try:
-                    body_str = str(trigger_body)
-                    matches = re.findall(r"(\w+)\.(NEXTVAL|CURRVAL)", body_str.upper())
-                    debug_log(f"[TRIGGER] {trigger_name} uses sequences: {matches}")
-                    for seq_name, _ in matches:
-                        used_sequences.add(seq_name)
-                        trigger_seq_map.setdefault(seq_name, []).append(trigger_name)
-                except Exception as e:
-                    debug_log(f"[ERROR] Failed to read trigger {trigger_name}: {e}")
-
-        # --- From default column values ---
-        debug_log("[STEP] Analyzing default column values for sequences")
-        defaults = fetch_query("""
-            SELECT column_name, data_default
-            FROM all_tab_columns 
-            WHERE table_name = UPPER(:1)
-            AND owner = UPPER(:2)
-        """, [table_name, schema])[1]
-        for col, default in defaults:
-            if default:
-                matches = re.findall(r"(\w+)\.NEXTVAL", default, re.IGNORECASE)
-                if matches:
-                    debug_log(f"[COLUMN] {col} default uses sequences: {matches}")
-                for seq in matches:
-                    seq_name = seq.upper()
-                    used_sequences.add(seq_name)
-                    col_seq_map[seq_name] = col
-
-        if not used_sequences:
-            debug_log("[RESULT] No sequences found")
-            output.append("  - No sequences detected.")
-        else:
-            for seq in sorted(used_sequences):
-                debug_log(f"[STEP] Fetching info for sequence: {seq}")
-                seq_info = fetch_query("""
-                    SELECT sequence_name, increment_by, last_number
-                    FROM all_sequences
-                    WHERE sequence_owner = UPPER(:1)
-                      AND sequence_name = UPPER(:2)
-                """, [schema, seq])[1]
-                if seq_info:
-                    sname, incr, last = seq_info[0]
-                    col = col_seq_map.get(seq, "Unknown")
-                    output.append(f"  - {sname} -> Column: {col}, Current Value: {last}, Next Value: {last + incr}, Increment: {incr}")
-                    debug_log(f"[SEQUENCE] {sname} -> Current: {last}, Next: {last + incr}, Increment: {incr}")
-                else:
-                    debug_log(f"[WARN] Sequence {seq} not found in all_sequences")
-                    output.append(f"  - {seq} -> Not found in all_sequences")
-
-        # --- Usage in packages ---
-        debug_log("[STEP] Analyzing usage in packages")
-        usage = analyze_table_usage(schema, table_name)
-        debug_log(f"[RESULT] Usage found in {len(usage)} entries")
-        output.append("\nUsage in Packages:")
-        pkgs = set()
-        for (tbl, op, pkg), info in sorted(usage.items()):
-            pkgs.add(pkg)
-            output.append(f"  - Package: {pkg}, Operation: {op}, Lines: {', '.join(map(str, info['lines']))}")
-        output.append(f"\nTotal packages using {table_name}: {len(pkgs)}")
-        
-        # --- Record count ---
-        count_query = f"SELECT COUNT(*) FROM {schema}.{table_name}"
-        debug_log(f"[STEP] Executing count query: {count_query}")
-        count = fetch_query(count_query)[1][0][0]
-        debug_log(f"[RESULT] Record count: {count}")
-        output.append(f"\nTotal Records: {count}")
-
-    except Exception as e:
-        debug_log(f"[ERROR] Exception during analysis: {e}")
-        output.append(f"\nError retrieving table details: {str(e)}")
-
-    # --- Final debug log output ---
-    debug_log("[STEP] Final output lines:")
-    for line in output:
-        debug_log(line)
-
-    return output
-
-def analyze_table_usage(schema, table_name):
-    results = defaultdict(lambda: {"count": 0, "lines": [], "files": set()})
-    debug_log(f"Analyzing usage of table {schema}.{table_name} in packages")
-    
-    for pkg in get_schema_objects(schema, 'PACKAGE'):
-        debug_log(f"Checking package: {pkg}")
-        src_lines = get_package_source(schema, pkg)
-        if not src_lines:
-            debug_log(f"No source found for package {pkg}")
-            continue
-        
-        for line_number, line_text in src_lines:
-            clean_line = re.sub(r"--.*", "", line_text).strip()
-            for op, pattern in OPERATION_PATTERNS.items():
-                for match in pattern.finditer(clean_line):
-                    matched_table = match.group(1).split('.')[-1].upper()
-                    if matched_table == table_name.upper():
-                        key = (matched_table, op, pkg)
-                        results[key]["count"] += 1
-                        results[key]["lines"].append(line_number)
-                        results[key]["files"].add(pkg)
-                        debug_log(f"Match found in {pkg}: line {line_number}, op {op}")
-    
-    debug_log(f"Total matches found: {sum(len(v['lines']) for v in results.values())}")
-    return results
+    app.after(0, clear_table_output)
+    count_mode = "sample" if sample_count_var.get() else "stats"
+    return analyzer_core.analyze_table(schema, table_name, on_progress=update_scan_progress,
+                                       on_section=show_table_section, count_mode=count_mode)
+
+def clear_table_output():
+    table_output.config(state=tk.NORMAL)
+    table_output.delete('1.0', tk.END)
+    table_output.config(state=tk.DISABLED)
+
+def show_table_section(lines):
+    """Append one report section to table_output as soon as analyze_table produces it."""
+    def update_ui():
+        table_output.config(state=tk.NORMAL)      # Enable editing temporarily
+        if table_output.compare("end-1c", "!=", "1.0"):
+            table_output.insert(tk.END, "\n")
+        table_output.insert(tk.END, "\n".join(lines))
+        table_output.config(state=tk.DISABLED)    # Disable editing again
+    app.after(0, update_ui)
+
+def update_scan_progress(done, total):
+    def update_ui():
+        if str(progress_bar1["mode"]) != "determinate":
+            progress_bar1.stop()
+            progress_bar1.config(mode="determinate", maximum=max(total, 1))
+        progress_bar1["value"] = done
+    app.after(0, update_ui)
 
 def analyze_table_worker():
     def stop_loader():
         progress_bar1.stop()
+        progress_bar1.config(mode="indeterminate", value=0)
         progress_bar1.pack_forget()
 
     try:
-        output = analyze_table()
-        def update_ui():
-            table_output.config(state=tk.NORMAL)      # Enable editing temporarily
-            table_output.delete('1.0', tk.END)
-            if output:
-                table_output.insert(tk.END, "\n".join(output))
-            table_output.config(state=tk.DISABLED)    # Disable editing again
-        app.after(0, update_ui)
+        analyze_table()  # sections are shown by show_table_section as they arrive
+    except JobCancelled:
+        debug_log("Analyze table cancelled")
     except Exception as e:
-        app.after(0, lambda: messagebox.showerror("Error", str(e)))
+        app.after(0, lambda msg=str(e): messagebox.showerror("Error", msg))
     finally:
         app.after(0, stop_loader)
 
@@ -480,32 +435,94 @@ def analyze_table_callback():
         progress_bar1.pack(fill='x', padx=10, pady=(0, 10))
         progress_bar1.start()
 
-    start_loader()
-    run_in_thread(analyze_table_worker)
+    if start_tab_job("table", analyze_btn, "Analyze Table", analyze_table_worker):
+        start_loader()
+
+def exact_count_callback():
+    """Run COUNT(*) on the selected table as its own cancellable job and append the result."""
+    schema = schema_entry_table.get().strip()
+    table_name = table_entry.get().strip()
+    if not schema or not table_name:
+        messagebox.showwarning("Input Error", "Please enter both schema and table name.")
+        return
+
+    def worker():
+        try:
+            start = time.perf_counter()
+            count = analyzer_core.exact_row_count(schema, table_name)
+            show_table_section([f"\nExact Count: {count:,} rows in {schema}.{table_name} "
+                                f"(COUNT(*) at {time.strftime('%H:%M:%S')}, {time.perf_counter() - start:.1f}s)"])
+        except JobCancelled:
+            debug_log("Exact count cancelled")
+        except Exception as e:
+            app.after(0, lambda msg=str(e): messagebox.showerror("Error", msg))
+
+    start_tab_job("count", count_btn, "Exact Count", worker)
+
+last_impact = {}  # graph and hits of the last Dependents run, for Export Graph
+
+def dependents_callback():
+    """Show everything that depends on the selected table (to the chosen depth) as its own job."""
+    schema = schema_entry_table.get().strip()
+    table_name = table_entry.get().strip()
+    if not schema or not table_name:
+        messagebox.showwarning("Input Error", "Please enter both schema and table name.")
+        return
+    depth = impact_depth_var.get()
+    depth = None if depth == "All" else int(depth)
+
+    def worker():
+        try:
+            graph, hits = dependency_graph.impact_analysis(schema, table_name, depth=depth)
+            last_impact.update(graph=graph, hits=hits)
+            show_table_section([""] + dependency_graph.format_impact(hits))
+        except JobCancelled:
+            debug_log("Dependency analysis cancelled")
+        except Exception as e:
+            app.after(0, lambda msg=str(e): messagebox.showerror("Error", msg))
+
+    start_tab_job("deps", deps_btn, "Dependents", worker)
+
+def export_graph_callback():
+    if not last_impact:
+        messagebox.showinfo("Export Graph", "Run Dependents first.")
+        return
+    path = filedialog.asksaveasfilename(
+        defaultextension=".dot", filetypes=[("Graphviz DOT", "*.dot"), ("JSON Files", "*.json")]
+    )
+    if path:
+        try:
+            dependency_graph.export_graph(last_impact["graph"], last_impact["hits"], path)
+        except Exception as e:
+            messagebox.showerror("Export Graph", str(e))
+
+def prewarm_metadata(schema, force=False):
+    """Load the dictionary metadata of every table in schema so Analyze Table hits the cache."""
+    try:
+        analyzer_core.prewarm_schema(schema, force)
+    except Exception as e:
+        log("warn", "Metadata prewarm for %s failed: %s", schema, e)
+
+def refresh_metadata_callback():
+    schema = schema_entry_table.get().strip()
+    analyzer_core.invalidate_metadata(schema or None)
+    if schema:
+        table_entry['values'] = get_tables(schema)
+        run_in_thread(prewarm_metadata, schema, True)
 
 def list_packages():
     schema = schema_entry_pkg_list.get().strip()
-    debug_log(f"[INPUT] Schema for listing packages: '{schema}'")
 
     if not schema:
         messagebox.showwarning("Input Error", "Please enter schema name.")
         return []
 
     try:
-        query = """
-            SELECT object_name, status, created 
-            FROM all_objects 
-            WHERE object_type = 'PACKAGE' 
-            AND owner = UPPER(:1)
-            ORDER BY object_name
-        """
-        rows = fetch_query(query, [schema])[1]
-        packages = [row[0] for row in rows]
-        debug_log(f"[RESULT] Packages found: {rows}")
-        return rows
-
+        return analyzer_core.list_packages(schema)
+    except JobCancelled:
+        raise
     except Exception as e:
-        debug_log(f"[ERROR] Failed to list packages: {e}")
+        log("error", "Failed to list packages: %s", e)
         messagebox.showerror("Database Error", f"Failed to list packages: {e}")
         return []
     
@@ -522,8 +539,10 @@ def list_packages_worker():
                 for name, status, created in output:
                     package_tree.insert("", "end", values=(name, status, created.strftime("%Y-%m-%d %H:%M:%S")))
         app.after(0, update_ui)
+    except JobCancelled:
+        debug_log("List packages cancelled")
     except Exception as e:
-        app.after(0, lambda: messagebox.showerror("Error", str(e)))
+        app.after(0, lambda msg=str(e): messagebox.showerror("Error", msg))
     finally:
         app.after(0, stop_loader)
 
@@ -532,11 +551,45 @@ def list_packages_callback():
         progress_bar2.pack(fill='x', padx=10, pady=(0, 10))
         progress_bar2.start()
 
-    start_loader()
-    run_in_thread(list_packages_worker)
+    if start_tab_job("packages", refresh_btn, "Refresh Package List", list_packages_worker):
+        start_loader()
+
+# Running job per tab. Each job borrows its own sessions, so the tabs can run at the same
+# time, and cancelling one leaves the others running.
+tab_jobs = {}
+
+def start_tab_job(key, button, label, worker):
+    """Start worker as the tab's job and turn button into its Cancel button.
+
+    If the tab's job is already running, cancel it instead. Returns True when a job was started.
+    """
+    job = tab_jobs.get(key)
+    if job:
+        button.config(text="Cancelling...")
+        job.cancel()
+        return False
+
+    job = tab_jobs[key] = Job(label)
+    button.config(text="Cancel")
+
+    def finished():
+        tab_jobs.pop(key, None)
+        button.config(text=label)
 
-def run_in_thread(func, *args):
-    """Run a function in a thread, used to keep UI responsive."""
+    def target():
+        try:
+            worker()
+        finally:
+            app.after(0, finished)
+
+    run_in_thread(target, job=job)
+    return True
+
+def run_in_thread(func, *args, job=None):
+    """Run a function in a thread, used to keep UI responsive. With a job, the function runs
+    as that job so its queries can be cancelled with job.cancel()."""
+    if job:
+        func, args = job.run, (func, *args)
     threading.Thread(target=func, args=args, daemon=True).start()
 
 def extract_package_content():
@@ -546,19 +599,30 @@ def extract_package_content():
         messagebox.showwarning("Missing Input", "Please enter both schema and package name.")
         return
     try:
-        # Fetch source with line numbers
-        query = """
-            SELECT line, text FROM all_source 
-            WHERE owner = UPPER(:1) AND name = UPPER(:2) AND type IN ('PACKAGE BODY')
-            ORDER BY TYPE,line
-        """
-        rows = fetch_query(query, [schema, pkg])[1]
-        if not rows:
-            raise Exception("No source found for package.")
-        return rows
+        return analyzer_core.extract_package_content(schema, pkg)
+    except JobCancelled:
+        raise
     except Exception as e:
         messagebox.showerror("Error", str(e))
 
+PROC_DECLARATION = re.compile(r"\b(PROCEDURE|FUNCTION)\b", re.IGNORECASE)
+pkg_text_painter = None  # LineTagPainter still highlighting the shown package
+pkg_text_goto_line = None  # line to show after the next extraction (set by Search Source)
+
+def format_package_source(rows):
+    """Return the numbered source text and the text lines (1-based) that mention a procedure or function."""
+    text = "".join(f"{line_num:>4}: {src.rstrip()}\n" for line_num, src in rows)
+    marked_lines = [index for index, (_, src) in enumerate(rows, 1) if PROC_DECLARATION.search(src)]
+    return text, marked_lines
+
+def show_pkg_text_goto_line():
+    global pkg_text_goto_line
+    if pkg_text_goto_line:
+        pkg_text.tag_remove("search_hit", "1.0", tk.END)
+        pkg_text.tag_add("search_hit", f"{pkg_text_goto_line}.0", f"{pkg_text_goto_line}.end")
+        pkg_text.see(f"{pkg_text_goto_line}.0")
+        pkg_text_goto_line = None
+
 def extract_package_content_worker():
     def stop_loader():
         progress_bar3.stop()
@@ -566,23 +630,23 @@ def extract_package_content_worker():
 
     try:
         output = extract_package_content()
+        # Text and highlighted lines are prepared here, off the UI thread
+        text, marked_lines = format_package_source(output or [])
         def update_ui():
+            global pkg_text_painter
+            if pkg_text_painter:
+                pkg_text_painter.cancel()
             pkg_text.config(state=tk.NORMAL)      # Enable editing temporarily
             pkg_text.delete("1.0", tk.END)
-            if output:              
-                pkg_text.tag_configure("highlight", background="#ffffcc")
-                # Insert with line numbers and highlight procedures/functions
-                for line_num, text in output:
-                    numbered_line = f"{line_num:>4}: {text.rstrip()}\n"
-                    pkg_text.insert(tk.END, numbered_line)
-                    if re.search(r"\b(PROCEDURE|FUNCTION)\b", text, re.IGNORECASE):
-                        line_start = f"{line_num}.0"
-                        line_end = f"{line_num}.end"
-                        pkg_text.tag_add("highlight", line_start, line_end)
+            pkg_text.insert("1.0", text)
             pkg_text.config(state=tk.DISABLED)    # Disable editing again
+            show_pkg_text_goto_line()  # before painting, so the lines shown are tagged first
+            pkg_text_painter = LineTagPainter(pkg_text, "highlight", marked_lines)
         app.after(0, update_ui)
+    except JobCancelled:
+        debug_log("Extract package content cancelled")
     except Exception as e:
-        app.after(0, lambda: messagebox.showerror("Error", str(e)))
+        app.after(0, lambda msg=str(e): messagebox.showerror("Error", msg))
     finally:
         app.after(0, stop_loader)
 
@@ -591,60 +655,8 @@ def extract_package_content_callback():
         progress_bar3.pack(fill='x', padx=10, pady=(0, 10))
         progress_bar3.start()
 
-    start_loader()
-    run_in_thread(extract_package_content_worker)
-
-def extract_table_operations(lines):
-    operations = defaultdict(list)
-
-    for line_num, line in lines:
-        for op, pattern in OPERATION_PATTERNS.items():
-            for match in pattern.finditer(line):
-                table_name = match.group(1)
-                operations[table_name].append((op, line_num, line.strip()))
-
-    return operations
-
-def detect_dynamic_sql_blocks(source_lines):
-    dyn_blocks = []
-    block = []
-    capturing = False
-
-    for line_num, line in source_lines:
-        if not capturing and re.search(r":=\s*('|q'|\")", line):
-            capturing = True
-            block = [(line_num, line)]
-        elif capturing:
-            block.append((line_num, line))
-            if re.search(r"('|q'|\");", line):
-                capturing = False
-                dyn_blocks.append(block)
-                block = []
-
-    return dyn_blocks
-
-def extract_tables_from_block(block):
-    sql = " ".join(line for _, line in block)
-    tables = []
-    for op, pattern in OPERATION_PATTERNS.items():
-        for match in pattern.finditer(sql):
-            tables.append((op, match.group(1)))
-    return tables
-
-def process_dynamic_sql(source_lines):
-    tables = defaultdict(list)
-    blocks = detect_dynamic_sql_blocks(source_lines)
-    for block in blocks:
-        line_start = block[0][0]
-        extracted = extract_tables_from_block(block)
-        for op, table in extracted:
-            tables[table].append((op, line_start, " ".join(line.strip() for _, line in block)))
-    return tables
-
-def merge_operations(static_ops, dynamic_ops):
-    for table, ops in dynamic_ops.items():
-        static_ops[table].extend(ops)
-    return static_ops
+    if start_tab_job("extract", analyze_pkg_btn, "Extract Package Content", extract_package_content_worker):
+        start_loader()
 
 def highlight_operations(text_widget, operations):
     text_widget.tag_remove("highlight", "1.0", tk.END)
@@ -692,6 +704,8 @@ table_icon = load_icon("sql_analyzer.png")
 pkg_list_icon = load_icon("sql_analyzer.png")
 pkg_extract_icon = load_icon("sql_analyzer.png")
 sql_dev_icon = load_icon("sql_analyzer.png")
+search_icon = load_icon("sql_analyzer.png")
+perf_icon = load_icon("sql_analyzer.png")
 
 # ------------------- Tabs -------------------
 tab_conn = ttk.Frame(notebook)
@@ -699,6 +713,8 @@ tab_table = ttk.Frame(notebook)
 tab_pkg_list = ttk.Frame(notebook)
 tab_pkg_extract = ttk.Frame(notebook)
 tab_sql_editor = ttk.Frame(notebook)
+tab_search = ttk.Frame(notebook)
+tab_perf = ttk.Frame(notebook)
 
 if conn_icon:
     notebook.add(tab_conn, text=" Connection", image=conn_icon, compound="left")
@@ -725,6 +741,16 @@ if sql_dev_icon:
 else:
     notebook.add(tab_sql_editor, text=" SQL Editor")
 
+if search_icon:
+    notebook.add(tab_search, text=" Search Source", image=search_icon, compound="left")
+else:
+    notebook.add(tab_search, text=" Search Source")
+
+if perf_icon:
+    notebook.add(tab_perf, text=" Performance", image=perf_icon, compound="left")
+else:
+    notebook.add(tab_perf, text=" Performance")
+
 # Disable tabs initially
 notebook.tab(1, state="disabled")
 notebook.tab(2, state="disabled")
@@ -764,7 +790,6 @@ load_config()
 
 tk.Label(tab_table, text="Enter Schema Name:").pack(pady=(5,0))
 schema_entry_table = ttk.Combobox(tab_table, width=30)
-schema_entry_table['values'] = get_all_schemas()  # We'll define this function below
 schema_entry_table.pack(pady=(0,5))
 
 tk.Label(tab_table, text="Enter Table Name:").pack(pady=5)
@@ -773,12 +798,29 @@ def update_table_list(*args):
     schema = schema_entry_table.get()
     if schema:
         table_entry['values'] = get_tables(schema)
+        run_in_thread(prewarm_metadata, schema)  # no queries while the last prewarm is live
 schema_entry_table.bind("<<ComboboxSelected>>", update_table_list)
 table_entry.pack()
 
 analyze_btn = tk.Button(tab_table, text="Analyze Table", command=analyze_table_callback)
 analyze_btn.pack(pady=5)
 
+table_actions = tk.Frame(tab_table)
+table_actions.pack()
+sample_count_var = tk.BooleanVar(value=False)
+tk.Checkbutton(table_actions, text=f"Sample row count ({analyzer_core.ROW_SAMPLE_PERCENT:g}% of blocks)",
+               variable=sample_count_var).pack(side="left", padx=5)
+count_btn = tk.Button(table_actions, text="Exact Count", command=exact_count_callback)
+count_btn.pack(side="left", padx=5)
+tk.Button(table_actions, text="Refresh Metadata", command=refresh_metadata_callback).pack(side="left", padx=5)
+tk.Label(table_actions, text="Depth:").pack(side="left", padx=(10, 0))
+impact_depth_var = tk.StringVar(value="3")
+ttk.Combobox(table_actions, textvariable=impact_depth_var, values=[*map(str, range(1, 11)), "All"],
+             width=4, state="readonly").pack(side="left")
+deps_btn = tk.Button(table_actions, text="Dependents", command=dependents_callback)
+deps_btn.pack(side="left", padx=5)
+tk.Button(table_actions, text="Export Graph", command=export_graph_callback).pack(side="left", padx=5)
+
 table_output = scrolledtext.ScrolledText(tab_table, wrap=tk.WORD, height=25)
 table_output.pack(fill='both', expand=True, padx=10, pady=5)
 table_output.config(state=tk.DISABLED)    # Disable editing setup
@@ -787,7 +829,6 @@ table_output.config(state=tk.DISABLED)    # Disable editing setup
 
 tk.Label(tab_pkg_list, text="Enter Schema Name:").pack(pady=(5,0))
 schema_entry_pkg_list = ttk.Combobox(tab_pkg_list, width=30)
-schema_entry_pkg_list['values'] = get_all_schemas()
 schema_entry_pkg_list.pack(pady=(0,5))
 
 refresh_btn = tk.Button(tab_pkg_list, text="Refresh Package List", command=list_packages_callback)
@@ -808,7 +849,6 @@ package_tree.pack(fill="both", expand=True, padx=10, pady=5)
 
 tk.Label(tab_pkg_extract, text="Enter Schema Name:").pack(pady=(5,0))
 schema_entry_package = ttk.Combobox(tab_pkg_extract, width=30)
-schema_entry_package['values'] = get_all_schemas()
 schema_entry_package.pack(pady=(0,5))
 
 tk.Label(tab_pkg_extract, text="Enter Package Name:").pack(pady=5)
@@ -825,6 +865,8 @@ analyze_pkg_btn.pack(pady=5)
 
 pkg_text = scrolledtext.ScrolledText(tab_pkg_extract, wrap=tk.WORD)
 pkg_text.pack(fill='both', expand=True, padx=10, pady=5)
+pkg_text.tag_configure("highlight", background="#ffffcc")
+pkg_text.tag_configure("search_hit", background="#cce5ff")
 pkg_text.config(state=tk.DISABLED)    # Disable editing setup
 
 # ---------------- Progress Bar -----------------
@@ -879,50 +921,11 @@ sql_filter_var = tk.StringVar()
 
 import re
 
-def apply_syntax_highlighting(event=None):
-    content = editor.get("1.0", tk.END)
-
-    # Clear previous tags
-    editor.tag_remove("keyword", "1.0", tk.END)
-    editor.tag_remove("comment", "1.0", tk.END)
-
-    # Highlight SQL keywords
-    for word in sql_keywords:
-        start = "1.0"
-        while True:
-            start = editor.search(rf"\y{word}\y", start, tk.END, regexp=True, nocase=True)
-            if not start:
-                break
-            end = f"{start}+{len(word)}c"
-            editor.tag_add("keyword", start, end)
-            start = end
-    editor.tag_configure("keyword", foreground="blue", font=("Courier New", 10, "bold"))
-
-    # Highlight comments
-    # -- single-line comments
-    for match in re.finditer(r'--.*', content):
-        start_index = f"1.0 + {match.start()} chars"
-        end_index = f"1.0 + {match.end()} chars"
-        editor.tag_add("comment", start_index, end_index)
-
-    # /* multi-line comments */
-    for match in re.finditer(r'/\*.*?\*/', content, re.DOTALL):
-        start_index = f"1.0 + {match.start()} chars"
-        end_index = f"1.0 + {match.end()} chars"
-        editor.tag_add("comment", start_index, end_index)
-
-    editor.tag_configure("comment", foreground="green", font=("Courier New", 10, "italic"))
-
-
 def load_sql_sheet_names():
     return fetch_query("SELECT id, name FROM MY_SQL_SHEETS ORDER BY created_on DESC")
 
 def load_sql_content(sql_id):
-    conn, _ = connect()
-    if not conn:
-        raise Exception("Database connection failed.")
-    
-    with conn.cursor() as cursor:
+    with pooled_connection() as conn, conn.cursor() as cursor:
         cursor.execute("SELECT content FROM MY_SQL_SHEETS WHERE id = :1", [sql_id])
         row = cursor.fetchone()
         if row:
@@ -933,29 +936,23 @@ def load_sql_content(sql_id):
 
 def save_new_sql(name, content, created_by=getpass.getuser()):
     try:
-        conn, _ = connect()
-        if not conn:
-            messagebox.showerror("Database Error", "Database connection failed.")
-            return False
-
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT COUNT(*) FROM MY_SQL_SHEETS WHERE LOWER(name) = LOWER(:1)", [name])
-                count = cursor.fetchone()[0]
-                if count > 0:
-                    messagebox.showerror("Duplicate Name", f"A SQL sheet with the name '{name}' already exists.")
-                    return False
-
-                query = "INSERT INTO MY_SQL_SHEETS (name, content, created_by) VALUES (:1, :2, :3)"
-                cursor.execute(query, [name, content, created_by])
-            conn.commit()
-            return True
-        except Exception as e:
-            conn.rollback()
-            messagebox.showerror("Database Error", f"An error occurred while saving the SQL sheet:\n{str(e)}")
-            return False
-        finally:
-            conn.close()
+        with pooled_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT COUNT(*) FROM MY_SQL_SHEETS WHERE LOWER(name) = LOWER(:1)", [name])
+                    count = cursor.fetchone()[0]
+                    if count > 0:
+                        messagebox.showerror("Duplicate Name", f"A SQL sheet with the name '{name}' already exists.")
+                        return False
+
+                    query = "INSERT INTO MY_SQL_SHEETS (name, content, created_by) VALUES (:1, :2, :3)"
+                    cursor.execute(query, [name, content, created_by])
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                messagebox.showerror("Database Error", f"An error occurred while saving the SQL sheet:\n{str(e)}")
+                return False
     except Exception as e:
         messagebox.showerror("Unexpected Error", f"An unexpected error occurred:\n{str(e)}")
         return False
@@ -966,54 +963,32 @@ def update_sql_sheet(sql_id, content):
 def delete_sql_sheet(sql_id):
     execute_query("DELETE FROM MY_SQL_SHEETS WHERE id = :1", [sql_id])
 
-def on_scroll(*args):
-    editor.yview(*args)
-    line_numbers.yview(*args)
-
-def on_key_or_mouse(event=None):
-    update_line_numbers()
-
-def run_sql_query(query):
-    debug_log("Establishing connection for SQL execution...")
-    conn, _ = connect()
-    if not conn:
-        debug_log("Connection failed.")
-        return [], [["Connection failed."]]
+def refresh_sql_list(on_done=None):
+    """Reload the saved SQL sheets off the Tk thread and repopulate the list when they arrive."""
+    def worker():
+        debug_log("Refreshing SQL sheet list...")
+        try:
+            rows = fetch_query("SELECT id, name, created_by FROM MY_SQL_SHEETS ORDER BY created_on DESC")[1]  # getting only results
+        except Exception as e:
+            log("error", "Failed to load SQL sheets: %s", e)
+            return
+        debug_log("Sheets found: %s", len(rows))
 
-    try:
-        with conn.cursor() as cursor:
-            debug_log(f"Executing query:\n{query}")
-            cursor.execute(query)
-            debug_log(f"Cursor description: {cursor.description}")
-
-            if cursor.description:
-                try:
-                    cols = [desc[0] for desc in cursor.description]
-                except Exception as e:
-                    debug_log(f"Error reading cursor.description: {e}")
-                    cols = []
-                rows = cursor.fetchmany(fetch_rows)
-                debug_log(f"Query returned {len(rows)} rows with columns: {cols}")
-                return cols, rows
-            else:
-                conn.commit()
-                debug_log("Non-SELECT query executed and committed.")
-                return [], [["Executed successfully."]]
+        def update_ui():
+            show_sql_list(rows)
+            if on_done:
+                on_done()
+        app.after(0, update_ui)
 
-    except Exception as e:
-        debug_log(f"SQL Execution Error: {e}")
-        return [], [[f"Error: {e}"]]
+    run_in_thread(worker)
 
-def refresh_sql_list():
+def show_sql_list(rows):
     global all_sql_rows
-    debug_log("Refreshing SQL sheet list...")
+    all_sql_rows = rows
     for row in sql_tree.get_children():
         sql_tree.delete(row)
     sql_sheets.clear()
 
-    all_sql_rows = fetch_query("SELECT id, name, created_by FROM MY_SQL_SHEETS ORDER BY created_on DESC")[1]  # getting only results
-    debug_log(f"Sheets found: {all_sql_rows}")
-    
     for sid, name, creator in all_sql_rows:
         sql_tree.insert("", tk.END, values=(sid, name, creator))
         sql_sheets[sid] = name
@@ -1038,7 +1013,7 @@ def on_sql_select(event=None):
     if selected:
         item = sql_tree.item(selected[0])
         sql_id, name, _ = item["values"]
-        debug_log(f"Selected: {name} (ID: {sql_id})")
+        debug_log("Selected: %s (ID: %s)", name, sql_id)
 
         current_sql_id.set(sql_id)
         sql_name_entry.delete(0, tk.END)
@@ -1046,14 +1021,13 @@ def on_sql_select(event=None):
 
         content = load_sql_content(sql_id)
         if content:
-            debug_log(f"Loaded content: {str(content)[:100]}...")
+            debug_log("Loaded content: %s...", str(content)[:100])
             unsaved_label.config(text="")
         else:
             debug_log("WARNING: No content loaded or it's empty/null.")
 
         editor.delete("1.0", tk.END)
         editor.insert(tk.END, content if content else "")
-        apply_syntax_highlighting()
 
 def select_sql_block_in_editor(start_char_idx, end_char_idx):
     editor.tag_remove(tk.SEL, "1.0", tk.END)
@@ -1078,7 +1052,20 @@ def select_sql_block_in_editor(start_char_idx, end_char_idx):
     editor.see(start_index)
     editor.focus_set()
 
+sql_job = None  # Job of the statement currently running from the SQL editor
+
+def load_sql_call_timeout():
+    try:
+        return int(analyzer_core.read_config().get("sql_call_timeout", 0))
+    except Exception:
+        return 0
+
 def run_sql():
+    global sql_job
+    if sql_job:
+        messagebox.showinfo("Query Running", "Wait for the running query to finish or cancel it first.")
+        return
+
     query, start_pos, end_pos = extract_sql_from_cursor()
 
     if not query.strip():
@@ -1086,58 +1073,72 @@ def run_sql():
         return
 
     select_sql_block_in_editor(start_pos, end_pos)
+    debug_log("Running trimmed query: %s", query)
 
-    debug_log(f"Running trimmed query: {query}")
-    result_label.config(text="⏳ Executing query...")
-    tab_sql_editor.update_idletasks()  # Refresh the label immediately
-
-    # Clear previous result
-    result_tree.delete(*result_tree.get_children())
-    result_tree["columns"] = []
-    result_tree["show"] = "headings"
-    result_label.config(text="Query Result")
+    # Clear previous result and release the session the previous result cursor was holding
+    close_result_view()
+    set_result_columns([])
 
     # Remove previous error highlights
     editor.tag_remove("error", "1.0", tk.END)
 
-    # Show progress
-    result_label.config(text="⏳ Executing query...")
-
-    # Run query
-    start_time = time.time()
-    cols, data = run_sql_query(query.rstrip(';').strip()) # Strip ; while running query in DB
-    end_time = time.time()
-    elapsed = end_time - start_time
-
-    row_count = len(data)
-
-    # Check for errors
-    if len(cols) == 0 and data and data[0][0].startswith("Error:"):
-        error_msg = data[0][0]
+    # Run in the background; only the first page of rows is fetched here, the rest as the grid scrolls
+    job = sql_job = Job("SQL")
+    started = time.time()
+    run_sql_btn.config(state="disabled")
+    cancel_sql_btn.config(state="normal")
+    call_timeout = load_sql_call_timeout()
+
+    def tick():
+        if sql_job is job:
+            result_label.config(text=f"⏳ Executing query... {time.time() - started:.1f}s")
+            app.after(100, tick)
+
+    def finish():
+        global sql_job
+        sql_job = None
+        run_sql_btn.config(state="normal")
+        cancel_sql_btn.config(state="disabled")
+        return time.time() - started
+
+    def on_done(conn, cursor, cols, rows):
+        elapsed = finish()
+        if cols:
+            show_result_cursor(conn, cursor, cols, rows)
+            count = f"{result_view['total']:,}" if result_view["total"] is not None else f"{result_view['known_rows']:,}+"
+            result_label.config(text=f"✅ Query Result – {count} rows, first page in {elapsed:.2f}s")
+        else:
+            # For DML statements like INSERT/UPDATE
+            status = "Executed successfully."
+            open_result_rows(["Status"], [[status]])
+            result_label.config(text=f"✅ {status} – completed in {elapsed:.2f}s")
+
+    def on_error(e):
+        elapsed = finish()
+        if job.cancelled:
+            result_label.config(text=f"⛔ Query cancelled after {elapsed:.1f}s")
+            return
+        debug_log("SQL Execution Error: %s", e)
         result_label.config(text="❌ Error occurred")
         highlight_error_block(query)  # Pass the query to highlight here
-        show_error_popup(error_msg)
-        return
+        show_error_popup(f"Error: {e}")
 
-    # Display results
-    if cols:
-        result_tree["columns"] = cols
-        for col in cols:
-            result_tree.heading(col, text=col)
-        for row in data:
-            result_tree.insert("", tk.END, values=row)
-        if row_count == 50:
-            result_label.config(text=f"✅ Showing first 50 rows – {elapsed:.2f}s (limited)")
+    def worker():
+        try:
+            result = execute_result_cursor(query.rstrip(';').strip(), job, call_timeout) # Strip ; while running query in DB
+        except Exception as e:
+            app.after(0, on_error, e)
         else:
-            result_label.config(text=f"✅ Query Result – {row_count} rows in {elapsed:.2f}s")
+            app.after(0, on_done, *result)
 
-    else:
-        # For DML statements like INSERT/UPDATE
-        status = data[0][0] if data else "Query completed"
-        result_tree["columns"] = ["Status"]
-        result_tree.heading("Status", text="Status")
-        result_tree.insert("", tk.END, values=[status])
-        result_label.config(text=f"✅ {status} – completed in {elapsed:.2f}s")
+    tick()
+    run_in_thread(worker)
+
+def cancel_sql():
+    """Interrupt the running statement on the server; the worker then releases its session."""
+    if sql_job:
+        result_label.config(text="⏳ Cancelling...")
+        sql_job.cancel()
 
 
 def highlight_error_block(error_query):
@@ -1188,46 +1189,69 @@ def show_error_popup(error_message):
     txt.config(state="disabled")
 
 def export_csv_full():
-    query = extract_sql_from_cursor()
-    if not query.strip().lower().startswith("select"):
-        messagebox.showinfo("Not Supported", "Only SELECT queries can be exported to CSV.")
+    """Export the full result of the statement under the cursor in a background job.
+
+    The format follows the chosen file extension (see result_export.EXPORT_WRITERS).
+    """
+    query = extract_sql_from_cursor()[0]
+    if not query.strip().lower().startswith(("select", "with")):
+        messagebox.showinfo("Not Supported", "Only SELECT queries can be exported.")
         return
 
     file_path = filedialog.asksaveasfilename(
         defaultextension=".csv",
-        filetypes=[("CSV Files", "*.csv")],
+        filetypes=result_export.EXPORT_FILETYPES,
         title="Export Full Query Result As"
     )
     if not file_path:
         return
-
     try:
-        conn, _ = connect()
-        if not conn:
-            raise Exception("Failed to connect to database")
+        result_export.writer_for_path(file_path)
+    except ValueError as e:
+        messagebox.showerror("Export Failed", str(e))
+        return
 
-        with conn.cursor() as cursor:
-            cursor.execute(query)
+    job = Job("Export")
+    progress_win = tk.Toplevel(app)
+    progress_win.title("Exporting...")
+    progress_win.geometry("360x110")
+    progress_win.transient(app)
+    progress_win.resizable(False, False)
+    status_label = ttk.Label(progress_win, text="Running query...")
+    status_label.pack(pady=10)
+    ttk.Button(progress_win, text="Cancel", command=job.cancel).pack()
+    progress_win.protocol("WM_DELETE_WINDOW", job.cancel)
 
-            columns = [desc[0] for desc in cursor.description]
+    def show_progress(progress):
+        status_label.config(
+            text=f"{progress.rows:,} rows – {progress.rows_per_sec:,.0f} rows/s – "
+                 f"{progress.bytes / 1048576:,.1f} MB"
+        )
 
-            with open(file_path, mode="w", newline="", encoding="utf-8") as csv_file:
-                writer = csv.writer(csv_file)
-                writer.writerow(columns)  # header
+    def worker():
+        try:
+            progress = result_export.export_query(
+                query.rstrip(";").strip(), file_path,
+                on_progress=lambda p: app.after(0, show_progress, p),
+            )
+        except JobCancelled as e:
+            app.after(0, lambda msg=str(e): (progress_win.destroy(), messagebox.showinfo("Export Cancelled", msg)))
+            return
+        except Exception as e:
+            debug_log("Export failed: %s", e)
+            app.after(0, lambda msg=str(e): (progress_win.destroy(), messagebox.showerror("Export Failed", f"Error:\n{msg}")))
+            return
 
-                batch_size = 1000
-                while True:
-                    rows = cursor.fetchmany(batch_size)
-                    if not rows:
-                        break
-                    writer.writerows(rows)
+        def finish():
+            progress_win.destroy()
+            messagebox.showinfo(
+                "Export Complete",
+                f"{progress.rows:,} rows ({progress.bytes / 1048576:,.1f} MB) exported in "
+                f"{progress.seconds:.1f}s to:\n{file_path}"
+            )
+        app.after(0, finish)
 
-        messagebox.showinfo("Export Complete", f"Query result exported to:\n{file_path}")
-    except Exception as e:
-        messagebox.showerror("Export Failed", f"Error:\n{str(e)}")
-    finally:
-        if conn:
-            conn.close()
+    run_in_thread(worker, job=job)
 
 
 
@@ -1277,7 +1301,7 @@ def remove_comments(sql):
 def save_sql():
     name = sql_name_entry.get().strip()
     content = editor.get("1.0", tk.END)
-    debug_log(f"Saving SQL: {name}")
+    debug_log("Saving SQL: %s", name)
     if name:
         success = save_new_sql(name, content)
         if success:
@@ -1308,17 +1332,16 @@ def delete_sql():
 def import_sql_file():
     file = filedialog.askopenfilename(filetypes=[("SQL Files", "*.sql")])
     if file:
-        debug_log(f"Importing file: {file}")
+        debug_log("Importing file: %s", file)
         with open(file, 'r', encoding='utf-8') as f:
             editor.delete("1.0", tk.END)
             editor.insert(tk.END, f.read())
-            apply_syntax_highlighting()
 
 
 def export_sql_file():
     file = filedialog.asksaveasfilename(defaultextension=".sql", filetypes=[("SQL Files", "*.sql")])
     if file:
-        debug_log(f"Exporting to file: {file}")
+        debug_log("Exporting to file: %s", file)
         with open(file, 'w', encoding='utf-8') as f:
             f.write(editor.get("1.0", tk.END))
         messagebox.showinfo("Exported", "File saved.")
@@ -1385,33 +1408,22 @@ editor_frame.pack(fill="both", expand=True, padx=10, pady=(0, 5))
 # Vertical scrollbar
 scrollbar = ttk.Scrollbar(editor_frame, orient="vertical")
 
-# Line numbers (left)
-line_numbers = tk.Text(editor_frame, width=4, padx=4, takefocus=0, border=0,
-                       background='#F0F0F0', state='disabled', wrap='none')
-line_numbers.pack(side="left", fill="y")
-
 # SQL editor (right)
-editor = tk.Text(editor_frame, wrap=tk.WORD, font=("Courier New", 10), undo=True,
-                 yscrollcommand=scrollbar.set)
+editor = tk.Text(editor_frame, wrap=tk.WORD, font=("Courier New", 10), undo=True)
 editor.pack(side="left", fill="both", expand=True)
 
-# Scrollbar on the far right
-scrollbar.config(command=lambda *args: (editor.yview(*args), line_numbers.yview(*args)))
-scrollbar.pack(side="right", fill="y")
+# Line numbers (left), drawn for the visible lines only and kept in step with editor.yview
+line_numbers = LineNumberGutter(editor_frame, editor, scroll_command=scrollbar.set)
+line_numbers.pack(side="left", fill="y", before=editor)
 
-# Keep line numbers in sync
-def update_line_numbers(event=None):
-    lines = editor.get("1.0", "end-1c").split("\n")
-    nums = "\n".join(f"{i+1}" for i in range(len(lines)))
-    line_numbers.config(state="normal")
-    line_numbers.delete("1.0", tk.END)
-    line_numbers.insert("1.0", nums)
-    line_numbers.config(state="disabled")
-    line_numbers.yview_moveto(editor.yview()[0])
+# Syntax highlighting follows edits (typing, paste, undo, loading a sheet) on its own
+editor.tag_configure("keyword", foreground="blue", font=("Courier New", 10, "bold"))
+editor.tag_configure("comment", foreground="green", font=("Courier New", 10, "italic"))
+sql_highlighter = IncrementalHighlighter(editor, sql_keywords)
 
-editor.bind("<KeyRelease>", lambda e: (apply_syntax_highlighting(), update_line_numbers()))
-editor.bind("<MouseWheel>", update_line_numbers)
-editor.bind("<ButtonRelease>", update_line_numbers)
+# Scrollbar on the far right
+scrollbar.config(command=editor.yview)
+scrollbar.pack(side="right", fill="y")
 
 # ---- SQL Help Panel ----
 help_paned = ttk.PanedWindow(tab_sql_editor, orient=tk.VERTICAL)
@@ -1498,8 +1510,11 @@ sep_frame.pack(side="left", padx=10)
 right_btn_frame.pack(side="right")
 
 # Left-aligned buttons (SQL operations)
-ttk.Button(left_btn_frame, text="Run SQL", command=run_sql).pack(side="left", padx=5)
-ttk.Button(left_btn_frame, text="Export Full CSV", command=export_csv_full).pack(side="left", padx=5)
+run_sql_btn = ttk.Button(left_btn_frame, text="Run SQL", command=run_sql)
+run_sql_btn.pack(side="left", padx=5)
+cancel_sql_btn = ttk.Button(left_btn_frame, text="Cancel", command=cancel_sql, state="disabled")
+cancel_sql_btn.pack(side="left", padx=5)
+ttk.Button(left_btn_frame, text="Export Full Result", command=export_csv_full).pack(side="left", padx=5)
 ttk.Button(left_btn_frame, text="Save New", command=lambda: (save_sql(), unsaved_label.config(text=""))).pack(side="left", padx=5)
 ttk.Button(left_btn_frame, text="Update", command=lambda: (update_sql(), unsaved_label.config(text=""))).pack(side="left", padx=5)
 ttk.Button(left_btn_frame, text="Delete", command=delete_sql).pack(side="left", padx=5)
@@ -1520,10 +1535,12 @@ result_frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 # Scrollbar
 result_scrollbar = ttk.Scrollbar(result_frame, orient="vertical")
 
-# Treeview with scrollbar
+# Treeview with scrollbar. The tree only holds the visible rows (see Virtual Result Grid), so
+# the scrollbar is driven by the result position rather than by the tree's own yview.
+ttk.Style().configure("Result.Treeview", rowheight=RESULT_ROW_HEIGHT)
 result_tree = ttk.Treeview(
     result_frame,
-    yscrollcommand=result_scrollbar.set,
+    style="Result.Treeview",
     selectmode="browse"
 )
 # Context Menu
@@ -1533,7 +1550,13 @@ result_menu.add_command(label="Copy Row", command=lambda: copy_selected_row(resu
 result_menu.add_command(label="Copy All", command=lambda: copy_all_rows(result_tree))
 result_menu.add_separator()
 result_menu.add_command(label="Copy Column Name", command=lambda: copy_column_name(result_tree))
-result_scrollbar.config(command=result_tree.yview)
+result_scrollbar.config(command=on_result_scrollbar)
+result_tree.bind("<Configure>", on_result_resize)
+result_tree.bind("<MouseWheel>", on_result_mousewheel)
+result_tree.bind("<Button-4>", on_result_mousewheel)
+result_tree.bind("<Button-5>", on_result_mousewheel)
+result_tree.bind("<Prior>", on_result_key)
+result_tree.bind("<Next>", on_result_key)
 
 # -----------------------------------------Helper functions---------------------------------------------
 
@@ -1629,12 +1652,196 @@ result_tree.config(xscrollcommand=result_scrollbar_x.set)
 
 result_scrollbar_x.pack(side="bottom", fill="x")
 
-refresh_sql_list()
+# ---------------- Tab 6: Search Source ----------------
+def search_source_callback(event=None):
+    schema = schema_entry_search.get().strip()
+    query = source_search_entry.get()
+    if not schema or not query.strip():
+        messagebox.showwarning("Input Error", "Please enter a schema and a search text.")
+        return
+    options = dict(whole_word=search_word_var.get(), case_sensitive=search_case_var.get(),
+                   regex=search_regex_var.get())
+    try:
+        source_search.compile_query(query, **options)
+    except re.error as e:
+        messagebox.showwarning("Invalid Pattern", str(e))
+        return
+
+    def on_progress(done, total):
+        app.after(0, lambda: search_status.config(text=f"Indexing sources... {done}/{total}"))
+
+    def worker():
+        try:
+            refreshed = source_search.refresh_search_index(schema, on_progress=on_progress)
+            hits, seconds = source_search.search_source(schema, query, **options)
+            app.after(0, lambda: show_search_hits(hits, seconds, refreshed))
+        except JobCancelled:
+            app.after(0, lambda: search_status.config(text="Search cancelled"))
+        except Exception as e:
+            app.after(0, lambda msg=str(e): messagebox.showerror("Search Error", msg))
+
+    search_status.config(text="Updating index...")
+    start_tab_job("search", search_btn, "Search", worker)
+
+def show_search_hits(hits, seconds, refreshed):
+    search_tree.delete(*search_tree.get_children())
+    for hit in hits:
+        search_tree.insert("", "end", values=(hit.name, hit.type, hit.line, hit.text.strip()))
+    limit_note = f" (first {source_search.SEARCH_LIMIT})" if len(hits) >= source_search.SEARCH_LIMIT else ""
+    search_status.config(text=f"{len(hits)} hits{limit_note} in {seconds * 1000:.0f} ms"
+                              f"{f', {refreshed} objects re-indexed' if refreshed else ''}")
+
+def open_search_hit(event=None):
+    """Show the selected package body hit in the Extract Content tab, scrolled to its line."""
+    global pkg_text_goto_line
+    selection = search_tree.selection()
+    if not selection:
+        return
+    name, obj_type, line, _ = search_tree.item(selection[0], "values")
+    if obj_type != "PACKAGE BODY":
+        return
+    schema_entry_package.set(schema_entry_search.get().strip())
+    package_entry.set(name)
+    pkg_text_goto_line = int(line)
+    notebook.select(tab_pkg_extract)
+    extract_package_content_callback()
+
+search_form = tk.Frame(tab_search)
+search_form.pack(fill="x", padx=10, pady=5)
+tk.Label(search_form, text="Schema:").pack(side="left")
+schema_entry_search = ttk.Combobox(search_form, width=25)
+schema_entry_search.pack(side="left", padx=(0, 10))
+tk.Label(search_form, text="Search:").pack(side="left")
+source_search_entry = tk.Entry(search_form, width=40)
+source_search_entry.pack(side="left", fill="x", expand=True)
+source_search_entry.bind("<Return>", search_source_callback)
+
+search_options = tk.Frame(tab_search)
+search_options.pack(fill="x", padx=10)
+search_word_var = tk.BooleanVar(value=True)
+search_case_var = tk.BooleanVar(value=False)
+search_regex_var = tk.BooleanVar(value=False)
+tk.Checkbutton(search_options, text="Whole word", variable=search_word_var).pack(side="left")
+tk.Checkbutton(search_options, text="Match case", variable=search_case_var).pack(side="left")
+tk.Checkbutton(search_options, text="Regex", variable=search_regex_var).pack(side="left")
+search_btn = tk.Button(search_options, text="Search", command=search_source_callback)
+search_btn.pack(side="left", padx=10)
+search_status = tk.Label(search_options, text="", anchor="w")
+search_status.pack(side="left", fill="x", expand=True)
+
+search_frame = tk.Frame(tab_search)
+search_frame.pack(fill="both", expand=True, padx=10, pady=5)
+search_tree = ttk.Treeview(search_frame, columns=("Name", "Type", "Line", "Text"), show="headings")
+for column, width, anchor in (("Name", 200, "w"), ("Type", 110, "w"), ("Line", 60, "e"), ("Text", 600, "w")):
+    search_tree.heading(column, text=column)
+    search_tree.column(column, width=width, anchor=anchor, stretch=(column == "Text"))
+search_scrollbar = ttk.Scrollbar(search_frame, orient="vertical", command=search_tree.yview)
+search_tree.config(yscrollcommand=search_scrollbar.set)
+search_scrollbar.pack(side="right", fill="y")
+search_tree.pack(fill="both", expand=True)
+search_tree.bind("<Double-1>", open_search_hit)
+
+# ---------------- Tab 7: Performance ----------------
+PERF_LANE_HEIGHT = 18
+PERF_LABEL_WIDTH = 220
+PERF_KIND_COLORS = {"phase": "#b0b0b0", "connect": "#8e6cc7", "fetch": "#4a7fc1", "stream": "#3aa3a3",
+                    "execute": "#d08a2e"}
+
+def refresh_perf_view(event=None):
+    traces = perf_trace.snapshot()
+    draw_perf_timeline(traces)
+    perf_tree.delete(*perf_tree.get_children())
+    for t in perf_trace.slowest(calls=traces):
+        perf_tree.insert("", "end", values=(
+            f"{t.elapsed * 1000:.1f}", t.operation or "-", t.kind, t.rows, t.bytes, t.round_trips,
+            f"{t.connect * 1000:.1f}", f"{t.execute * 1000:.1f}", f"{t.fetch * 1000:.1f}", t.sql_hash,
+            t.error or " ".join(t.text.split())
+        ))
+    calls = [t for t in traces if t.kind != "phase"]
+    perf_status.config(text=f"{len(calls)} database calls, {sum(t.elapsed for t in calls):.2f}s, "
+                            f"{sum(t.round_trips for t in calls)} round-trips, "
+                            f"{sum(t.rows for t in calls):,} rows; "
+                            f"parsing {sum(t.parse for t in traces if t.kind == 'phase' and not t.operation):.2f}s")
+
+def draw_perf_timeline(traces):
+    """One lane per operation; each call or phase is a bar from its start to its end."""
+    perf_canvas.delete("all")
+    if not traces:
+        return
+    start = min(t.started for t in traces)
+    end = max(t.started + t.elapsed for t in traces)
+    width = max(perf_canvas.winfo_width() - PERF_LABEL_WIDTH - 10, 100)
+    scale = width / max(end - start, 1e-6)
+
+    lanes = {}
+    for t in sorted(traces, key=lambda t: t.started):
+        lane = t.operation if t.kind != "phase" else (f"{t.operation} / {t.text}" if t.operation else t.text)
+        y = lanes.setdefault(lane, len(lanes)) * PERF_LANE_HEIGHT + 4
+        x = PERF_LABEL_WIDTH + (t.started - start) * scale
+        perf_canvas.create_rectangle(x, y, x + max(t.elapsed * scale, 2), y + PERF_LANE_HEIGHT - 4,
+                                     fill="#d9534f" if t.error else PERF_KIND_COLORS.get(t.kind, "gray"),
+                                     outline="")
+    for lane, index in lanes.items():
+        perf_canvas.create_text(4, index * PERF_LANE_HEIGHT + PERF_LANE_HEIGHT // 2 + 2, anchor="w",
+                                text=(lane or "(no operation)")[-34:], font=("Segoe UI", 8))
+    perf_canvas.create_text(PERF_LABEL_WIDTH + width, len(lanes) * PERF_LANE_HEIGHT + 8, anchor="e",
+                            text=f"{(end - start) * 1000:.0f} ms", font=("Segoe UI", 8))
+    perf_canvas.config(scrollregion=(0, 0, PERF_LABEL_WIDTH + width, len(lanes) * PERF_LANE_HEIGHT + 16))
+
+def clear_perf_callback():
+    perf_trace.clear()
+    refresh_perf_view()
+
+def export_perf_callback():
+    path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON Files", "*.json")])
+    if path:
+        try:
+            count = perf_trace.export_json(path)
+            perf_status.config(text=f"Exported {count} traces to {os.path.basename(path)}")
+        except Exception as e:
+            messagebox.showerror("Export Timings", str(e))
+
+perf_actions = tk.Frame(tab_perf)
+perf_actions.pack(fill="x", padx=10, pady=5)
+tk.Button(perf_actions, text="Refresh", command=refresh_perf_view).pack(side="left")
+tk.Button(perf_actions, text="Clear", command=clear_perf_callback).pack(side="left", padx=5)
+tk.Button(perf_actions, text="Export JSON", command=export_perf_callback).pack(side="left")
+perf_status = tk.Label(perf_actions, text="", anchor="w")
+perf_status.pack(side="left", fill="x", expand=True, padx=10)
+
+perf_timeline = tk.Frame(tab_perf)
+perf_timeline.pack(fill="x", padx=10)
+perf_canvas = tk.Canvas(perf_timeline, height=200, background="white", highlightthickness=0)
+perf_canvas_scrollbar = ttk.Scrollbar(perf_timeline, orient="vertical", command=perf_canvas.yview)
+perf_canvas.config(yscrollcommand=perf_canvas_scrollbar.set)
+perf_canvas_scrollbar.pack(side="right", fill="y")
+perf_canvas.pack(fill="x", expand=True)
+
+tk.Label(tab_perf, text="Slowest database calls:", anchor="w").pack(fill="x", padx=10, pady=(5, 0))
+perf_frame = tk.Frame(tab_perf)
+perf_frame.pack(fill="both", expand=True, padx=10, pady=5)
+perf_columns = (("ms", 70, "e"), ("Operation", 200, "w"), ("Kind", 60, "w"), ("Rows", 70, "e"),
+                ("Bytes", 80, "e"), ("Trips", 50, "e"), ("Connect", 65, "e"), ("Execute", 65, "e"),
+                ("Fetch", 65, "e"), ("Hash", 100, "w"), ("SQL", 500, "w"))
+perf_tree = ttk.Treeview(perf_frame, columns=[name for name, _, _ in perf_columns], show="headings")
+for column, width, anchor in perf_columns:
+    perf_tree.heading(column, text=column)
+    perf_tree.column(column, width=width, anchor=anchor, stretch=(column == "SQL"))
+perf_scrollbar = ttk.Scrollbar(perf_frame, orient="vertical", command=perf_tree.yview)
+perf_tree.config(yscrollcommand=perf_scrollbar.set)
+perf_scrollbar.pack(side="right", fill="y")
+perf_tree.pack(fill="both", expand=True)
+
+notebook.bind("<<NotebookTabChanged>>",
+              lambda event: refresh_perf_view() if notebook.select() == str(tab_perf) else None, add="+")
 
 # ---------------- Start GUI ----------------
 notebook.tab(1, state="disabled")
 notebook.tab(2, state="disabled")
 notebook.tab(3, state="disabled")
 notebook.tab(4, state="disabled")
+notebook.tab(5, state="disabled")
 
+# Nothing touches the database before Connect, so the window paints straight away
+app.after_idle(lambda: record_startup_time("first paint"))
 app.mainloop()
@@ -0,0 +1,193 @@
+"""Structured timing of database calls and analysis phases, for the Performance tab.
+
+Every fetch_query, stream_query and execute_query records a Trace: a hash of the SQL text,
+round-trips, rows, bytes and the time spent borrowing a session (connect), executing and
+fetching. Analysis code runs inside `with phase("Analyze Table"):` blocks, which record a
+trace of their own, with the time spent parsing PL/SQL, and label the calls made inside them,
+also on worker threads started with submit_in_job(). The last MAX_TRACES traces are kept in
+memory and can be exported as JSON.
+"""
+import contextvars
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import NamedTuple
+
+ENABLED = True
+MAX_TRACES = 5000
+SLOWEST_LIMIT = 50  # calls listed by slowest() and in the JSON export
+DEFAULT_PREFETCH_ROWS = 2  # python-oracledb's cursor.prefetchrows
+
+
+class Trace(NamedTuple):
+    started: float    # time.time() at the start
+    operation: str    # enclosing phases, "Analyze Table / usage"; "" outside any
+    kind: str         # "connect", "fetch", "stream", "execute" or "phase"
+    sql_hash: str     # "" for phases
+    text: str         # SQL text, or the phase name
+    round_trips: int  # estimated from the prefetch and array sizes
+    rows: int
+    bytes: int        # text and raw lengths, 8 per other value
+    connect: float    # seconds waiting for a pooled session
+    execute: float
+    fetch: float
+    parse: float      # PL/SQL scanning inside a phase
+    elapsed: float
+    error: str
+
+
+class CallStats:
+    """Counters of one database call in progress, filled in by the code making it."""
+    __slots__ = ("round_trips", "rows", "bytes", "connect", "execute", "fetch")
+
+    def __init__(self):
+        self.round_trips = self.rows = self.bytes = 0
+        self.connect = self.execute = self.fetch = 0.0
+
+    def add_rows(self, rows, prefetch, arraysize):
+        """Count a fetched batch; the first prefetch rows come back with the execute."""
+        if not ENABLED:
+            return
+        self.rows += len(rows)
+        self.bytes += estimate_bytes(rows)
+        self.round_trips = 1 + math.ceil(max(self.rows - prefetch, 0) / arraysize)
+
+
+class Phase:
+    __slots__ = ("label", "parse")
+
+    def __init__(self, label):
+        self.label = label
+        self.parse = 0.0
+
+
+traces = deque(maxlen=MAX_TRACES)
+lock = threading.Lock()
+_current_phase = contextvars.ContextVar("perf_phase", default=None)
+
+def sql_hash(text):
+    """Short hash of the SQL with whitespace collapsed, to group calls of the same statement."""
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()[:12]
+
+def estimate_bytes(rows):
+    size = 0
+    for row in rows:
+        for value in row:
+            size += len(value) if isinstance(value, (str, bytes)) else 8
+    return size
+
+def current_operation():
+    current = _current_phase.get()
+    return current.label if current else ""
+
+def record(trace):
+    with lock:
+        traces.append(trace)
+
+@contextmanager
+def traced_call(kind, sql):
+    """Yield a CallStats for one database call and record it as a Trace when the block exits."""
+    stats = CallStats()
+    if not ENABLED:
+        yield stats
+        return
+    started, start = time.time(), time.perf_counter()
+    error = ""
+    try:
+        yield stats
+    except GeneratorExit:
+        raise  # a stream closed early by its reader
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record(Trace(started, current_operation(), kind, sql_hash(sql), sql, stats.round_trips, stats.rows,
+                     stats.bytes, stats.connect, stats.execute, stats.fetch, 0.0,
+                     time.perf_counter() - start, error))
+
+@contextmanager
+def phase(name):
+    """Time an analysis phase. Calls and nested phases inside it are labelled with its name."""
+    if not ENABLED:
+        yield
+        return
+    parent = _current_phase.get()
+    current = Phase(f"{parent.label} / {name}" if parent else name)
+    token = _current_phase.set(current)
+    started, start = time.time(), time.perf_counter()
+    error = ""
+    try:
+        yield
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_phase.reset(token)
+        if parent:
+            add_parse_time(current.parse, parent)
+        record(Trace(started, parent.label if parent else "", "phase", "", name, 0, 0, 0, 0.0, 0.0, 0.0,
+                     current.parse, time.perf_counter() - start, error))
+
+def timed(name):
+    """Decorator that runs the function inside phase(name)."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def add_parse_time(seconds, target=None):
+    """Count seconds of PL/SQL scanning towards the current phase (or target)."""
+    target = target or _current_phase.get()
+    if target:
+        with lock:
+            target.parse += seconds
+
+def snapshot():
+    with lock:
+        return list(traces)
+
+def clear():
+    with lock:
+        traces.clear()
+
+def slowest(limit=SLOWEST_LIMIT, calls=None):
+    """The slowest database calls, slowest first."""
+    calls = [t for t in (snapshot() if calls is None else calls) if t.kind != "phase"]
+    return sorted(calls, key=lambda t: t.elapsed, reverse=True)[:limit]
+
+def statement_totals(calls=None):
+    """{sql_hash: {"sql", "calls", "rows", "bytes", "round_trips", "elapsed"}}, slowest total first."""
+    totals = {}
+    for t in (snapshot() if calls is None else calls):
+        if t.kind == "phase":
+            continue
+        total = totals.setdefault(t.sql_hash, {"sql": t.text, "calls": 0, "rows": 0, "bytes": 0,
+                                               "round_trips": 0, "elapsed": 0.0})
+        total["calls"] += 1
+        total["rows"] += t.rows
+        total["bytes"] += t.bytes
+        total["round_trips"] += t.round_trips
+        total["elapsed"] += t.elapsed
+    return dict(sorted(totals.items(), key=lambda item: item[1]["elapsed"], reverse=True))
+
+def export_json(path):
+    """Write every kept trace, the slowest calls and per-statement totals to path."""
+    calls = snapshot()
+    report = {
+        "exported": datetime.now().isoformat(timespec="seconds"),
+        "traces": [t._asdict() for t in calls],
+        "slowest": [t._asdict() for t in slowest(calls=calls)],
+        "statements": statement_totals(calls),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return len(calls)
@@ -0,0 +1,486 @@
+import re
+from bisect import bisect_right
+from typing import NamedTuple
+
+# ---------------- Operation Patterns ----------------
+# One regex per operation, kept for callers that still want to match a single operation type
+OPERATION_PATTERNS = {
+    "SELECT": re.compile(r"\bSELECT\b.*?\bFROM\b\s+(?:\w+\.)?([a-zA-Z0-9_]+)", re.IGNORECASE | re.DOTALL),
+    "INSERT": re.compile(r"\bINSERT\s+INTO\s+(?:\w+\.)?([a-zA-Z0-9_]+)", re.IGNORECASE),
+    "UPDATE": re.compile(r"\bUPDATE\s+(?:\w+\.)?([a-zA-Z0-9_]+)\s+SET\b", re.IGNORECASE),
+    "DELETE": re.compile(r"\bDELETE\s+FROM\s+(?:\w+\.)?([a-zA-Z0-9_]+)", re.IGNORECASE),
+}
+
+# All four operations in a single alternation. Only the leading keyword is consumed and the table
+# is captured in a lookahead, so every keyword in the text is visited exactly once. SELECT is just
+# a trigger: its table comes from the next FROM followed by an identifier, which is what the lazy
+# ".*?" in OPERATION_PATTERNS["SELECT"] finds, without rescanning the line for every SELECT.
+OPERATION_MATCHER = re.compile(r"""
+    \b(?:
+        INSERT(?=\s+INTO\s+(?:\w+\.)?(?P<INSERT>[a-zA-Z0-9_]+))
+      | DELETE(?=\s+FROM\s+(?:\w+\.)?(?P<DELETE>[a-zA-Z0-9_]+))
+      | UPDATE(?=\s+(?:\w+\.)?(?P<UPDATE>[a-zA-Z0-9_]+)\s+SET\b)
+      | FROM(?=\s+(?:\w+\.)?(?P<FROM>[a-zA-Z0-9_]+))
+      | (?P<SELECT>SELECT)\b
+    )
+""", re.IGNORECASE | re.VERBOSE)
+
+
+def strip_line_comment(line):
+    """Drop a trailing -- comment, same as re.sub(r"--.*", "", line) for a single line."""
+    pos = line.find("--")
+    return line if pos == -1 else line[:pos]
+
+
+def iter_line_operations(text):
+    """Yield (operation, table) for every OPERATION_PATTERNS hit in text, in one pass.
+
+    Gives the same hits as running each pattern in OPERATION_PATTERNS over text, ordered by
+    position instead of by operation.
+    """
+    # End offset of the last hit per operation, to skip overlaps the same way finditer does
+    ends = {}
+    select_open = False
+    for match in OPERATION_MATCHER.finditer(text):
+        op = match.lastgroup
+        if op == "SELECT":
+            if match.start() >= ends.get("SELECT", 0):
+                select_open = True
+            continue
+
+        table = match.group(op)
+        if op == "FROM":
+            if select_open:
+                select_open = False
+                ends["SELECT"] = match.end(op)
+                yield "SELECT", table
+        elif match.start() >= ends.get(op, 0):
+            ends[op] = match.end(op)
+            yield op, table
+
+
+def iter_operation_matches(text):
+    """Like iter_line_operations, but yields (operation, table, offset) where offset is the
+    position of the keyword that starts the statement part (SELECT/INSERT/UPDATE/DELETE)."""
+    ends = {}
+    select_pos = None
+    for match in OPERATION_MATCHER.finditer(text):
+        op = match.lastgroup
+        if op == "SELECT":
+            if select_pos is None and match.start() >= ends.get("SELECT", 0):
+                select_pos = match.start()
+            continue
+
+        table = match.group(op)
+        if op == "FROM":
+            if select_pos is not None:
+                ends["SELECT"] = match.end(op)
+                yield "SELECT", table, select_pos
+                select_pos = None
+        elif match.start() >= ends.get(op, 0):
+            ends[op] = match.end(op)
+            yield op, table, match.start()
+
+
+# ---------------- Streaming Statement Lexer ----------------
+MAX_STATEMENT_CHARS = 200000  # a statement buffer is flushed once it grows past this
+
+# Things that change the lexer state while in plain code. q-quotes must be tried before "'".
+_CODE_TOKEN = re.compile(r"""--|/\*|;|"|(?<![\w$#])[nN]?[qQ]'|'""")
+_Q_CLOSERS = {"[": "]", "{": "}", "<": ">", "(": ")"}
+
+
+def _line_at(line_offsets, offset):
+    index = bisect_right(line_offsets, (offset, float("inf"))) - 1
+    return line_offsets[max(index, 0)][1]
+
+
+class SqlStatement(NamedTuple):
+    text: str
+    start_line: int
+    end_line: int
+    line_offsets: list  # [(offset in text, source line), ...] in ascending order
+    literals: list = ()  # [(offset of its '' in text, contents, source line), ...] per string literal
+
+    def line_at(self, offset):
+        """Source line number of a character offset in text."""
+        return _line_at(self.line_offsets, offset)
+
+
+def iter_sql_statements(src_lines, max_chars=MAX_STATEMENT_CHARS):
+    """Yield a SqlStatement for each ;-terminated statement in (line, text) rows.
+
+    Comments are dropped and string literals (including q'[...]' quotes) are emptied to '',
+    so keywords inside them are never matched; their contents are kept in the statement's
+    literals for the dynamic SQL analyzer. Each input line is scanned once, and only the
+    current statement is held in memory.
+    """
+    parts = []
+    size = 0
+    line_offsets = []
+    literals = []
+    literal_parts = []  # contents of the string literal being read
+    literal_line = None
+    state = None  # None (code), "block", "string", "ident" or a q-quote closing sequence
+    search_code = _CODE_TOKEN.search
+
+    def flush():
+        nonlocal parts, size, line_offsets, literals
+        text = "".join(parts)
+        offsets = line_offsets
+        statement_literals = literals
+        parts, size, line_offsets, literals = [], 0, [], []
+        stripped = text.strip()
+        if not stripped:
+            return None
+        first = len(text) - len(text.lstrip())
+        last = first + len(stripped) - 1
+        return SqlStatement(text, _line_at(offsets, first), _line_at(offsets, last), offsets, statement_literals)
+
+    for line_number, line_text in src_lines:
+        line_text = (line_text or "").rstrip("\r\n")
+        if line_offsets and line_offsets[-1][0] == size:
+            line_offsets[-1] = (size, line_number)
+        else:
+            line_offsets.append((size, line_number))
+        pos = 0
+        end = len(line_text)
+
+        while pos < end:
+            if state is None:
+                match = search_code(line_text, pos)
+                if not match:
+                    parts.append(line_text[pos:])
+                    size += end - pos
+                    break
+
+                start = match.start()
+                parts.append(line_text[pos:start])
+                size += start - pos
+                token = match.group()
+                pos = match.end()
+
+                if token == ";":
+                    statement = flush()
+                    if statement:
+                        yield statement
+                    line_offsets.append((0, line_number))
+                elif token == "--":
+                    break
+                elif token == "/*":
+                    state = "block"
+                    parts.append(" ")
+                    size += 1
+                elif token == '"':
+                    state = "ident"
+                    parts.append('"')
+                    size += 1
+                else:
+                    literal_parts = []
+                    literal_line = line_number
+                    if token == "'" or pos >= end:
+                        state = "string"
+                    else:
+                        # q'<delim> ... <delim>' where bracket-like delimiters close with their pair
+                        state = _Q_CLOSERS.get(line_text[pos], line_text[pos]) + "'"
+                        pos += 1
+
+            elif state == "block":
+                close = line_text.find("*/", pos)
+                if close == -1:
+                    break
+                pos = close + 2
+                state = None
+
+            elif state == "ident":
+                close = line_text.find('"', pos)
+                if close == -1:
+                    parts.append(line_text[pos:])
+                    size += end - pos
+                    break
+                parts.append(line_text[pos:close + 1])
+                size += close + 1 - pos
+                pos = close + 1
+                state = None
+
+            else:
+                closer = "'" if state == "string" else state
+                close = line_text.find(closer, pos)
+                if close == -1:
+                    literal_parts.append(line_text[pos:])
+                    literal_parts.append("\n")
+                    break
+                if state == "string" and line_text.startswith("'", close + 1):
+                    literal_parts.append(line_text[pos:close + 1])
+                    pos = close + 2  # '' is an escaped quote
+                    continue
+                literal_parts.append(line_text[pos:close])
+                literals.append((size, "".join(literal_parts), literal_line))
+                pos = close + len(closer)
+                state = None
+                parts.append("''")
+                size += 2
+
+        parts.append("\n")
+        size += 1
+        if size > max_chars:
+            statement = flush()
+            if statement:
+                yield statement
+
+    statement = flush()
+    if statement:
+        yield statement
+
+
+def scan_source_operations(src_lines, dynamic=True):
+    """Return [(TABLE, operation, line), ...] for every OPERATION_PATTERNS hit in (line, text) rows.
+
+    Works on whole statements, so a SELECT whose FROM is on a later line is still found; the
+    reported line is the one holding the SELECT/INSERT/UPDATE/DELETE keyword. With dynamic,
+    SQL built in strings is analyzed too and reported with DYNAMIC_TAG appended to the
+    operation.
+    """
+    hits = []
+    analyzer = DynamicSqlAnalyzer() if dynamic else None
+    for statement in iter_sql_statements(src_lines):
+        hits.extend(
+            (table.upper(), op, statement.line_at(offset))
+            for op, table, offset in iter_operation_matches(statement.text)
+        )
+        if analyzer:
+            hits.extend(analyzer.feed(statement))
+    if analyzer:
+        hits.extend(analyzer.finish())
+    return hits
+
+
+# ---------------- Dynamic SQL ----------------
+DYNAMIC_TAG = " (dynamic)"
+UNKNOWN_OPERAND = "DYN__"  # stands in for a parameter, function call, ... whose value is unknown
+MAX_DYNAMIC_CHARS = MAX_STATEMENT_CHARS  # longer SQL held in a variable stops growing
+
+# Places where a string expression starts: the three ways of running SQL text, and assignments
+_DYNAMIC_SITE = re.compile(r"""
+    (?P<run>\bEXECUTE\s+IMMEDIATE\b | \bOPEN\s+[\w$#.]+\s+FOR\b)
+  | (?P<parse>\bDBMS_SQL\s*\.\s*PARSE\s*\(\s*[\w$#.]+\s*,)
+  | (?P<assign>:=)
+""", re.IGNORECASE | re.VERBOSE)
+_EXPR_TOKEN = re.compile(r"''|\|\||[\w$#.]+|\S")
+_EXPR_END = frozenset(("USING", "INTO", "RETURNING", "BULK"))
+_STRING_TYPE = r"(?:N?VARCHAR2?|N?CHAR|N?CLOB|LONG|STRING|[\w$#.]+%TYPE)"
+_DECLARED = re.compile(rf"(?<![\w$#])([\w$#]+)\s+(?:CONSTANT\s+)?{_STRING_TYPE}\s*(?:\([^()]*\))?\s*(?:NOT\s+NULL\s*)?$", re.IGNORECASE)
+_ASSIGNED = re.compile(r"(?<![\w$#.])([\w$#.]+)\s*$")
+_DECLARED_TAIL = re.compile(r"N?VARCHAR2?|N?CHAR|N?CLOB|LONG|STRING|TYPE|NULL", re.IGNORECASE)
+_WHITESPACE_CHR = re.compile(r"CHR\s*\(\s*(?:9|10|13|32)\s*\)$", re.IGNORECASE)
+_SQL_START = re.compile(r"\s*\(?\s*(?:SELECT|INSERT|UPDATE|DELETE|MERGE|WITH)\b", re.IGNORECASE)
+_STATIC_QUERY = frozenset(("SELECT", "WITH", "("))  # OPEN c FOR SELECT ... is static SQL
+
+
+class DynamicSqlAnalyzer:
+    """Finds table operations in SQL that is built as text and run with EXECUTE IMMEDIATE,
+    OPEN ... FOR or DBMS_SQL.PARSE.
+
+    Statements are fed in order. String literals are joined across || and across lines, and
+    string variables remember what was assigned to them (v := v || '...' appends) until
+    they are run, so EXECUTE IMMEDIATE v_sql sees the whole text. Operands with unknown values become
+    UNKNOWN_OPERAND, and tables that contain it are not reported. SQL left in a variable
+    that is never run (e.g. passed to a helper) is analyzed by finish(). Every statement
+    is looked at once and each reported hit is new, so the cost stays linear in the source.
+    """
+
+    def __init__(self):
+        self.variables = {}  # NAME -> [(text, line), ...]
+        self.seen = set()
+
+    def feed(self, statement):
+        """Return the dynamic hits of one SqlStatement as [(TABLE, operation, line), ...].
+
+        Runs for every statement, so ones without a literal or a tracked variable, or without
+        a place an expression can start, are skipped with plain substring tests first.
+        """
+        if not statement.literals and not self.variables:
+            return []
+        text = statement.text
+        upper = text.upper()
+        if not (":=" in upper or "IMMEDIATE" in upper or "FOR" in upper or "PARSE" in upper):
+            return []
+        if not statement.literals and not any(name in upper for name in self.variables):
+            return []
+
+        hits = []
+        literals = {offset: (contents, line) for offset, contents, line in statement.literals}
+        for site in _DYNAMIC_SITE.finditer(text):
+            kind = site.lastgroup
+            if kind == "assign":
+                target = self.assignment_target(text[:site.start()])
+                if target:
+                    self.assign(target, statement, site.end(), literals, hits)
+                continue
+
+            first = _EXPR_TOKEN.search(text, site.end())
+            if kind == "run" and first and first.group().upper() in _STATIC_QUERY:
+                continue
+            pieces, operands = self.read_expression(statement, site.end(), literals, stop_at_comma=kind == "parse")
+            hits += self.analyze(pieces)
+            if len(operands) == 1:
+                # Forget SQL once run: it was analyzed, and text appended later is still read
+                self.variables.pop(operands[0], None)
+        return hits
+
+    def finish(self):
+        """Hits for SQL still held in variables that were never run."""
+        hits = []
+        for pieces in self.variables.values():
+            hits += self.analyze(pieces, require_sql=True)
+        self.variables.clear()
+        return hits
+
+    @staticmethod
+    def assignment_target(prefix):
+        match = _ASSIGNED.search(prefix)
+        if not match or _DECLARED_TAIL.fullmatch(match.group(1)):
+            # Only a declaration ends in a type name, a length or NOT NULL
+            match = _DECLARED.search(prefix) or match
+        return match.group(1).upper() if match else None
+
+    def assign(self, target, statement, pos, literals, hits):
+        pieces, operands = self.read_expression(statement, pos, literals)
+        old = self.variables.pop(target, None)
+        if old is not None and (not operands or operands[0] != target):
+            hits += self.analyze(old, require_sql=True)  # overwritten before it was run
+        if any(line is not None for _, line in pieces):
+            if sum(len(text) for text, _ in pieces) <= MAX_DYNAMIC_CHARS:
+                self.variables[target] = pieces
+            elif old is not None:
+                self.variables[target] = old
+
+    def read_expression(self, statement, pos, literals, stop_at_comma=False):
+        """Return (pieces, operands) for the || expression at pos.
+
+        pieces are (text, line) with line None for unknown operands; operands holds the
+        upper-cased source text of each operand.
+        """
+        text = statement.text
+        pieces, operands = [], []
+        start = end = None  # span of the operand being read
+        count = depth = 0   # its tokens, and the open parentheses
+        for match in _EXPR_TOKEN.finditer(text, pos):
+            token = match.group()
+            if depth == 0:
+                if token == "||":
+                    if count:
+                        self.add_operand(text[start:end], count, start, literals, pieces, operands)
+                    start, count = None, 0
+                    continue
+                if token == ")" or (token == "," and stop_at_comma) or token.upper() in _EXPR_END:
+                    break
+            if token == "(":
+                depth += 1
+            elif token == ")":
+                depth -= 1
+            if start is None:
+                start = match.start()
+            end = match.end()
+            count += 1
+        if count:
+            self.add_operand(text[start:end], count, start, literals, pieces, operands)
+        return pieces, operands
+
+    def add_operand(self, source, count, offset, literals, pieces, operands):
+        name = source.upper()
+        operands.append(name)
+        if count == 1 and source == "''" and offset in literals:
+            pieces.append(literals[offset])
+        elif count == 1 and name in self.variables:
+            pieces.extend(self.variables[name])
+        elif _WHITESPACE_CHR.match(source):
+            pieces.append((" ", None))
+        else:
+            pieces.append((UNKNOWN_OPERAND, None))
+
+    def analyze(self, pieces, require_sql=False):
+        parts, offsets, size = [], [], 0
+        for piece, line in pieces:
+            if line is not None:
+                offsets.append((size, line))
+            parts.append(piece)
+            size += len(piece)
+        if not offsets:
+            return []
+        sql = "".join(parts)
+        if require_sql and not _SQL_START.match(sql):
+            return []
+
+        hits = []
+        for op, table, offset in iter_operation_matches(sql):
+            table = table.upper()
+            if UNKNOWN_OPERAND in table:
+                continue
+            hit = (table, op + DYNAMIC_TAG, _line_at(offsets, offset))
+            if hit not in self.seen:
+                self.seen.add(hit)
+                hits.append(hit)
+        return hits
+
+
+# ---------------- Editor Highlighting ----------------
+# Line-at-a-time tokenizer for the SQL editor. The state carried between lines is None,
+# "block" (inside /* */) or "string" (inside '...'), so any line can be re-tokenized on its
+# own once the state at its start is known.
+_HIGHLIGHT_TOKEN = re.compile(r"--|/\*|'|(?<![\w$#])[A-Za-z_][\w$#]*")
+
+
+def highlight_line(line, state, keywords):
+    """Return ([(tag, start, end), ...], state at end of line) for one editor line.
+
+    tag is "keyword" for words in keywords (upper case) and "comment" for -- and /* */
+    comments. Keywords inside comments and string literals are not reported.
+    """
+    spans = []
+    pos = 0
+    end = len(line)
+    search = _HIGHLIGHT_TOKEN.search
+
+    while pos < end:
+        if state == "block":
+            close = line.find("*/", pos)
+            if close == -1:
+                spans.append(("comment", pos, end))
+                return spans, state
+            spans.append(("comment", pos, close + 2))
+            pos = close + 2
+            state = None
+
+        elif state == "string":
+            close = line.find("'", pos)
+            if close == -1:
+                return spans, state
+            pos = close + 1
+            if line.startswith("'", pos):
+                pos += 1  # '' is an escaped quote
+            else:
+                state = None
+
+        else:
+            match = search(line, pos)
+            if not match:
+                break
+            token = match.group()
+            start, pos = match.span()
+            if token == "--":
+                spans.append(("comment", start, end))
+                break
+            if token == "/*":
+                close = line.find("*/", pos)
+                if close == -1:
+                    spans.append(("comment", start, end))
+                    return spans, "block"
+                spans.append(("comment", start, close + 2))
+                pos = close + 2
+            elif token == "'":
+                state = "string"
+            elif token.upper() in keywords:
+                spans.append(("keyword", start, pos))
+
+    return spans, state
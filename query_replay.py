@@ -0,0 +1,257 @@
+"""Record and replay of database calls, for profiling and testing without a live session.
+
+Set analyzer_core.data_source to a QueryRecorder to capture every fetch_query, stream_query
+and execute_query of a real session to a file, or to a QueryReplay to serve those results
+later with no database at all:
+
+    analyzer_core.data_source = QueryRecorder("hr.replay.gz")
+    analyzer_core.connect()
+    analyzer_core.analyze_table("HR", "EMPLOYEES")
+    analyzer_core.data_source.save()
+
+    analyzer_core.data_source = QueryReplay("hr.replay.gz", latency=1.0)
+    analyzer_core.connect()  # no pool; reports the recorded user and service
+    analyzer_core.analyze_table("HR", "EMPLOYEES")
+
+Calls are matched on the SQL text and bind values. A call made more than once replays its
+responses in order and then repeats the last one. The local caches (package_source.db,
+package_xref.db, ...) decide which queries run at all, so replay with the caches the recording
+was made with; record with them deleted for a recording that replays on a fresh checkout.
+
+The file is gzip-compressed JSON lines: a header, then one line per distinct (SQL, binds)
+with its responses. Dates, timestamps, intervals, Decimals and bytes are tagged so they come
+back as the same Python types.
+"""
+import base64
+import gzip
+import json
+import threading
+import time
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import oracledb
+
+import analyzer_core
+import perf_trace
+from analyzer_core import JobCancelled, check_cancelled, debug_log
+
+REPLAY_FORMAT_VERSION = 1
+
+
+class ReplayMiss(LookupError):
+    """The replayed code ran a query that is not in the recording."""
+
+
+class RecordedError(oracledb.DatabaseError):
+    """Raised on replay for a call that failed while it was recorded.
+
+    A DatabaseError, so the `except oracledb.Error` handlers catch it like the live error.
+    """
+
+
+# ---------------- Encoding ----------------
+DECODERS = {
+    "$dt": datetime.fromisoformat,
+    "$d": date.fromisoformat,
+    "$td": lambda seconds: timedelta(seconds=seconds),
+    "$n": Decimal,
+    "$b": base64.b64decode,
+}
+
+def encode_value(value):
+    """json.dumps default= for the column and bind types JSON has no type for."""
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    if isinstance(value, timedelta):
+        return {"$td": value.total_seconds()}
+    if isinstance(value, Decimal):
+        return {"$n": str(value)}
+    if isinstance(value, (bytes, bytearray)):
+        return {"$b": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Cannot record a {type(value).__name__} value")
+
+def decode_value(obj):
+    """json.loads object_hook undoing encode_value."""
+    if len(obj) == 1:
+        (tag, value), = obj.items()
+        if tag in DECODERS:
+            return DECODERS[tag](value)
+    return obj
+
+def to_json(value):
+    return json.loads(json.dumps(value, default=encode_value))
+
+def call_key(query, params):
+    return json.dumps([query, params or []], default=encode_value, sort_keys=True, separators=(",", ":"))
+
+# ---------------- Recording ----------------
+class QueryRecorder:
+    """Data source that runs every call on the live session pool and records its result.
+
+    Calls are kept in memory until save(). Failed calls are recorded too, so code that
+    handles an ORA- error takes the same path on replay.
+    """
+    offline = False
+
+    def __init__(self, path):
+        self.path = path
+        self.calls = {}  # call_key -> {"sql", "binds", "responses"}
+        self.lock = threading.Lock()
+
+    def record(self, query, params, response, elapsed):
+        key = call_key(query, params)
+        response = to_json(response)
+        with self.lock:
+            call = self.calls.get(key)
+            if call is None:
+                call = self.calls[key] = {"sql": query, "binds": to_json(params or []), "responses": []}
+            responses = call["responses"]
+            last = responses[-1] if responses else None
+            if last and {k: v for k, v in last.items() if k not in ("latency", "repeat")} == response:
+                last["repeat"] = last.get("repeat", 1) + 1  # metadata lookups repeat a lot
+            else:
+                responses.append(dict(response, latency=round(elapsed, 6)))
+
+    def run(self, query, params, func):
+        """Record func()'s response dict, or the oracledb error it raises."""
+        start = time.perf_counter()
+        try:
+            response = func()
+        except oracledb.Error as e:
+            self.record(query, params, {"error": str(e)}, time.perf_counter() - start)
+            raise
+        self.record(query, params, response, time.perf_counter() - start)
+        return response
+
+    def fetch_query(self, query, params, on_progress, batch_size, on_cancel):
+        def fetch():
+            columns, rows = analyzer_core.oracle_fetch_query(query, params, on_progress, batch_size, on_cancel)
+            return {"columns": columns, "rows": rows}
+
+        response = self.run(query, params, fetch)
+        return response["columns"], response["rows"]
+
+    def stream_query(self, query, params, batch_size):
+        # Only the time spent fetching counts as latency, not what the caller does with the rows
+        rows, elapsed = [], 0.0
+        with closing(analyzer_core.oracle_stream_query(query, params, batch_size)) as stream:
+            try:
+                while True:
+                    start = time.perf_counter()
+                    row = next(stream, None)
+                    elapsed += time.perf_counter() - start
+                    if row is None:
+                        break
+                    rows.append(row)
+                    yield row
+            except oracledb.Error as e:
+                self.record(query, params, {"error": str(e)}, elapsed)
+                raise
+            except GeneratorExit:
+                # The caller stopped early; on replay it stops at the same row
+                self.record(query, params, {"columns": None, "rows": rows}, elapsed)
+                raise
+        self.record(query, params, {"columns": None, "rows": rows}, elapsed)
+
+    def execute_query(self, query, params):
+        def execute():
+            analyzer_core.oracle_execute_query(query, params)
+            return {"columns": None, "rows": []}
+
+        self.run(query, params, execute)
+        return True
+
+    def save(self):
+        header = {
+            "version": REPLAY_FORMAT_VERSION,
+            "dsn": analyzer_core.DSN,
+            "user": analyzer_core.DB_USER,
+            "service_name": analyzer_core.db_service_name,
+            "recorded": datetime.now().isoformat(timespec="seconds"),
+        }
+        with self.lock, gzip.open(self.path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+            for call in self.calls.values():
+                f.write(json.dumps(call, separators=(",", ":")) + "\n")
+        debug_log("[RECORD] %s distinct calls saved to %s", len(self.calls), self.path)
+
+# ---------------- Replay ----------------
+class QueryReplay:
+    """Data source that answers calls from a QueryRecorder file, with no database.
+
+    latency scales the recorded time of each call: 0 answers at once, 1.0 waits as long as
+    the live call took. Raises ReplayMiss for a call that is not in the recording.
+    """
+    offline = True
+
+    def __init__(self, path, latency=0.0):
+        self.path = path
+        self.latency = latency
+        self.calls = {}      # call_key -> [response, ...]
+        self.positions = {}  # call_key -> responses served so far
+        self.lock = threading.Lock()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(next(f))
+            if header.get("version") != REPLAY_FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported recording version {header.get('version')}")
+            for line in f:
+                call = json.loads(line, object_hook=decode_value)
+                self.calls[call_key(call["sql"], call["binds"])] = [
+                    response for response in call["responses"] for _ in range(response.get("repeat", 1))
+                ]
+        self.dsn, self.user, self.service_name = header["dsn"], header["user"], header["service_name"]
+        debug_log("[REPLAY] %s distinct calls loaded from %s (recorded %s)", len(self.calls), path, header['recorded'])
+
+    def response(self, query, params, stats):
+        key = call_key(query, params)
+        with self.lock:
+            responses = self.calls.get(key)
+            if responses is None:
+                raise ReplayMiss(f"Not in {self.path}: {' '.join(query.split())} with binds {params!r}")
+            served = self.positions.get(key, 0)
+            self.positions[key] = served + 1
+        response = responses[min(served, len(responses) - 1)]
+
+        check_cancelled()
+        if self.latency:
+            start = time.perf_counter()
+            time.sleep(response["latency"] * self.latency)
+            stats.execute = time.perf_counter() - start
+            check_cancelled()
+        stats.round_trips = 1
+        if "error" in response:
+            raise RecordedError(response["error"])
+        return response
+
+    def fetch_query(self, query, params, on_progress, batch_size, on_cancel):
+        try:
+            with perf_trace.traced_call("fetch", query) as stats:
+                response = self.response(query, params, stats)
+                rows = [tuple(row) for row in response["rows"]]
+                stats.add_rows(rows, perf_trace.DEFAULT_PREFETCH_ROWS, batch_size)
+        except JobCancelled:
+            if on_cancel:
+                on_cancel()
+            raise
+        if on_progress and rows:
+            on_progress(len(rows))
+        return response["columns"], rows
+
+    def stream_query(self, query, params, batch_size):
+        with perf_trace.traced_call("stream", query) as stats:
+            rows = self.response(query, params, stats)["rows"]
+            for start in range(0, len(rows), batch_size):
+                check_cancelled()
+                batch = [tuple(row) for row in rows[start:start + batch_size]]
+                stats.add_rows(batch, batch_size + 1, batch_size)
+                yield from batch
+
+    def execute_query(self, query, params):
+        with perf_trace.traced_call("execute", query) as stats:
+            self.response(query, params, stats)
+            stats.round_trips = 2
+        return True
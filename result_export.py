@@ -0,0 +1,225 @@
+"""Streaming query export: rows go from a pooled cursor straight into a file writer.
+
+Only one fetch batch (or one Parquet row group) is held in memory at a time, so the
+export size is bounded by disk space rather than RAM. Writers are picked by file
+extension from EXPORT_WRITERS:
+
+    .csv       plain CSV
+    .csv.gz    gzip-compressed CSV
+    .jsonl     JSON Lines, one object per row
+    .parquet   Apache Parquet in row-group batches (needs pyarrow)
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from typing import NamedTuple
+
+import oracledb
+
+from analyzer_core import JobCancelled, current_job, debug_log, pooled_connection
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+EXPORT_ARRAYSIZE = 5000          # rows per round-trip; large exports are network bound
+PARQUET_ROW_GROUP_ROWS = 50000   # rows buffered before a Parquet row group is written
+PROGRESS_INTERVAL = 0.25         # seconds between on_progress calls
+
+
+class ExportProgress(NamedTuple):
+    rows: int
+    bytes: int
+    seconds: float
+    done: bool = False
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+# ---------------- Writers ----------------
+# A writer gets the open binary output file and the cursor description, then receives
+# the rows one fetch batch at a time.
+class CsvWriter:
+    def __init__(self, raw, description):
+        self.text = io.TextIOWrapper(self.open_stream(raw), encoding="utf-8", newline="")
+        self.writer = csv.writer(self.text)
+        self.writer.writerow([d[0] for d in description])
+
+    def open_stream(self, raw):
+        return raw
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.text.flush()
+        self.text.detach()
+
+
+class GzipCsvWriter(CsvWriter):
+    def open_stream(self, raw):
+        self.gz = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)
+        return self.gz
+
+    def close(self):
+        super().close()
+        self.gz.close()
+
+
+class JsonLinesWriter:
+    def __init__(self, raw, description):
+        self.text = io.TextIOWrapper(raw, encoding="utf-8", newline="\n")
+        self.columns = [d[0] for d in description]
+
+    def write_rows(self, rows):
+        columns = self.columns
+        self.text.writelines(
+            json.dumps(dict(zip(columns, row)), default=str, ensure_ascii=False) + "\n" for row in rows
+        )
+
+    def close(self):
+        self.text.flush()
+        self.text.detach()
+
+
+def arrow_type(column):
+    """Arrow type for a cursor.description entry (name, type, display_size, internal_size, precision, scale, null_ok)."""
+    db_type, precision, scale = column[1], column[4], column[5]
+    if db_type is oracledb.DB_TYPE_NUMBER:
+        if scale == 0 and precision and precision <= 18:
+            return pa.int64()
+        return pa.float64()
+    if db_type in (oracledb.DB_TYPE_BINARY_FLOAT, oracledb.DB_TYPE_BINARY_DOUBLE):
+        return pa.float64()
+    if db_type in (oracledb.DB_TYPE_DATE, oracledb.DB_TYPE_TIMESTAMP,
+                   oracledb.DB_TYPE_TIMESTAMP_TZ, oracledb.DB_TYPE_TIMESTAMP_LTZ):
+        return pa.timestamp("us")
+    if db_type in (oracledb.DB_TYPE_RAW, oracledb.DB_TYPE_LONG_RAW, oracledb.DB_TYPE_BLOB):
+        return pa.binary()
+    return pa.string()
+
+
+class ParquetWriter:
+    def __init__(self, raw, description):
+        if pa is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        self.schema = pa.schema([(d[0], arrow_type(d)) for d in description])
+        self.writer = pq.ParquetWriter(raw, self.schema, compression="snappy")
+        self.buffer = []
+
+    def write_rows(self, rows):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= PARQUET_ROW_GROUP_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        arrays = []
+        for index, field in enumerate(self.schema):
+            values = [row[index] for row in self.buffer]
+            if pa.types.is_string(field.type):
+                values = [None if v is None else str(v) for v in values]
+            arrays.append(pa.array(values, type=field.type))
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+EXPORT_WRITERS = {
+    ".csv.gz": GzipCsvWriter,
+    ".csv": CsvWriter,
+    ".jsonl": JsonLinesWriter,
+    ".parquet": ParquetWriter,
+}
+
+EXPORT_FILETYPES = [
+    ("CSV Files", "*.csv"),
+    ("Gzip CSV Files", "*.csv.gz"),
+    ("JSON Lines Files", "*.jsonl"),
+    ("Parquet Files", "*.parquet"),
+]
+
+
+def writer_for_path(path):
+    lower = path.lower()
+    for suffix, writer in EXPORT_WRITERS.items():
+        if lower.endswith(suffix):
+            return writer
+    raise ValueError(f"Unsupported export format: {os.path.basename(path)} "
+                     f"(use {', '.join(EXPORT_WRITERS)})")
+
+
+# ---------------- Export ----------------
+def lob_as_value(cursor, metadata):
+    # Fetch LOBs inline so rows can be written without a round-trip per LOB
+    if metadata.type_code is oracledb.DB_TYPE_CLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG, arraysize=cursor.arraysize)
+    if metadata.type_code is oracledb.DB_TYPE_BLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG_RAW, arraysize=cursor.arraysize)
+
+
+def export_query(query, path, params=None, on_progress=None, arraysize=EXPORT_ARRAYSIZE):
+    """Stream the result of query into path, in the format given by its extension.
+
+    on_progress(ExportProgress) is called at most every PROGRESS_INTERVAL seconds and once
+    at the end. Run it in an analyzer_core.Job to make it cancellable: cancelling breaks the
+    running call on the server or stops between batches, and raises JobCancelled. The file
+    is written under a temporary name and only renamed to path once complete, so a failed
+    or cancelled export never leaves a truncated file behind.
+    """
+    writer_class = writer_for_path(path)
+    job = current_job()
+    part_path = path + ".part"
+    start = time.perf_counter()
+    rows_written = 0
+
+    try:
+        with pooled_connection() as conn, conn.cursor() as cursor, open(part_path, "wb") as raw:
+            cursor.arraysize = arraysize
+            cursor.prefetchrows = arraysize + 1
+            cursor.outputtypehandler = lob_as_value
+            debug_log("Exporting to %s:\n%s", path, query)
+            cursor.execute(query, params or [])
+            if not cursor.description:
+                raise ValueError("Query does not return rows")
+
+            writer = writer_class(raw, cursor.description)
+            last_report = start
+            while True:
+                if job and job.cancelled:
+                    raise JobCancelled(f"Export cancelled after {rows_written} rows")
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                writer.write_rows(rows)
+                rows_written += len(rows)
+
+                now = time.perf_counter()
+                if on_progress and now - last_report >= PROGRESS_INTERVAL:
+                    last_report = now
+                    on_progress(ExportProgress(rows_written, raw.tell(), now - start))
+            writer.close()
+            size = raw.tell()
+
+        os.replace(part_path, path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    progress = ExportProgress(rows_written, size, time.perf_counter() - start, done=True)
+    debug_log("Exported %s rows (%s bytes) in %.2fs", progress.rows, progress.bytes, progress.seconds)
+    if on_progress:
+        on_progress(progress)
+    return progress
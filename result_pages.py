@@ -0,0 +1,61 @@
+"""Paging of a scrollable result cursor for the virtual result grid (no Tk).
+
+The grid keeps its state in a plain dict (package_analyzer.result_view). Rows come from a
+scrollable server-side cursor that stays open while the result is shown; pages are fetched
+as the user scrolls and only the last RESULT_CACHE_PAGES pages are kept in memory, so a
+5 million row result costs the same as a 50 row one.
+"""
+RESULT_PAGE_SIZE = 200     # rows per round-trip
+RESULT_CACHE_PAGES = 20    # pages kept in memory; evicted pages are re-read by scrolling the cursor
+
+
+def read_result_page(view, page):
+    """Fetch page from the cursor into the page cache, scrolling unless it is next anyway."""
+    cursor = view["cursor"]
+    if page != view["next_page"]:
+        cursor.scroll(page * RESULT_PAGE_SIZE + 1, mode="absolute")  # evicted page: positions are 1-based
+    rows = cursor.fetchmany(RESULT_PAGE_SIZE)
+    view["next_page"] = page + 1
+    end = page * RESULT_PAGE_SIZE + len(rows)
+    view["known_rows"] = max(view["known_rows"], end)
+    if len(rows) < RESULT_PAGE_SIZE:
+        view["total"] = end
+
+    pages = view["pages"]
+    pages[page] = rows
+    pages.move_to_end(page)
+    if len(pages) > RESULT_CACHE_PAGES:
+        pages.popitem(last=False)
+    return rows
+
+def get_result_page(view, page):
+    pages = view["pages"]
+    if page in pages:
+        pages.move_to_end(page)
+        return pages[page]
+    total = view["total"]
+    if total is not None and page * RESULT_PAGE_SIZE >= total:
+        return []
+
+    # Pages past the cursor position are read in order so the row count stays known. Cached
+    # pages on the way are read again too: that is what moves the cursor past them.
+    while view["next_page"] < page:
+        read_result_page(view, view["next_page"])
+        if view["total"] is not None:
+            return get_result_page(view, page)
+    return read_result_page(view, page)
+
+def get_result_rows(view, start, count):
+    if view["rows"] is not None:
+        return view["rows"][start:start + count]
+    if not view["cursor"]:
+        return []
+    rows = []
+    page, skip = divmod(start, RESULT_PAGE_SIZE)
+    while len(rows) < count:
+        page_rows = get_result_page(view, page)
+        rows.extend(page_rows[skip:])
+        if len(page_rows) < RESULT_PAGE_SIZE:
+            break
+        page, skip = page + 1, 0
+    return rows[:count]
@@ -0,0 +1,260 @@
+"""Identifier search over the PL/SQL sources of a schema.
+
+The index is a local SQLite file with every source line and an inverted index from
+upper-cased tokens (runs of letters, digits, _, $ and #) to the lines containing them.
+refresh_search_index() re-indexes only objects whose last_ddl_time changed, reading their
+source through the analyzer_core source cache. search_source() then answers:
+
+    whole word     token lookup in the inverted index
+    substring      tokens containing the text, found in the token vocabulary
+    regex          the literal identifier runs the pattern requires narrow the lines down,
+                   then the pattern is run on those lines only (or on every line when the
+                   pattern has no such runs, e.g. "\\d{5}")
+"""
+import re
+import sqlite3
+import time
+from contextlib import closing
+from typing import NamedTuple
+
+import analyzer_core
+import perf_trace
+from analyzer_core import check_cancelled, debug_log
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+SEARCH_DB_PATH = "source_search.db"
+SEARCH_TYPES = ("PACKAGE", "PACKAGE BODY", "PROCEDURE", "FUNCTION", "TRIGGER")
+SEARCH_LIMIT = 2000      # hits returned per query
+MIN_RUN_LENGTH = 3       # shorter literal runs match too many tokens to narrow anything down
+
+TOKEN = re.compile(r"[\w$#]+")
+WORD_CHAR = r"[\w$#]"
+
+
+class SearchHit(NamedTuple):
+    owner: str
+    name: str
+    type: str
+    line: int
+    text: str
+
+
+# ---------------- Index ----------------
+def open_search_db():
+    db = sqlite3.connect(SEARCH_DB_PATH, timeout=30)
+    db.executescript("""
+        CREATE TABLE IF NOT EXISTS search_objects (
+            id INTEGER PRIMARY KEY, dsn TEXT, owner TEXT, name TEXT, type TEXT, last_ddl_time TEXT,
+            UNIQUE (dsn, owner, name, type)
+        );
+        CREATE TABLE IF NOT EXISTS search_lines (
+            object_id INTEGER, line INTEGER, text TEXT, PRIMARY KEY (object_id, line)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS search_tokens (
+            token TEXT, object_id INTEGER, line INTEGER, PRIMARY KEY (token, object_id, line)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS search_tokens_object ON search_tokens (object_id);
+        CREATE TABLE IF NOT EXISTS search_vocab (token TEXT PRIMARY KEY) WITHOUT ROWID;
+    """)
+    return db
+
+
+def drop_object(db, object_id):
+    db.execute("DELETE FROM search_tokens WHERE object_id = ?", (object_id,))
+    db.execute("DELETE FROM search_lines WHERE object_id = ?", (object_id,))
+    db.execute("DELETE FROM search_objects WHERE id = ?", (object_id,))
+
+
+def index_object(db, owner, name, obj_type, ddl_time, rows):
+    object_id = db.execute(
+        "INSERT INTO search_objects (dsn, owner, name, type, last_ddl_time) VALUES (?, ?, ?, ?, ?)",
+        (analyzer_core.DSN or "", owner, name, obj_type, ddl_time)
+    ).lastrowid
+    lines = [(object_id, line, (text or "").rstrip("\n")) for line, text in rows]
+    db.executemany("INSERT OR REPLACE INTO search_lines VALUES (?, ?, ?)", lines)
+    postings = [
+        (token, object_id, line)
+        for _, line, text in lines
+        for token in set(TOKEN.findall(text.upper()))
+    ]
+    db.executemany("INSERT OR IGNORE INTO search_tokens VALUES (?, ?, ?)", postings)
+    # The vocabulary only grows; tokens that no longer occur just match no lines
+    db.executemany("INSERT OR IGNORE INTO search_vocab VALUES (?)", {(token,) for token, _, _ in postings})
+
+
+@perf_trace.timed("search index refresh")
+def refresh_search_index(schema, on_progress=None):
+    """Bring the index of schema up to date and return the number of objects (re)indexed or dropped.
+
+    One all_objects query finds the changed objects; only those are read again. Runs in the
+    current analyzer_core job, so it can be cancelled between objects.
+    """
+    owner = schema.upper()
+    current = analyzer_core.object_ddl_times(schema, SEARCH_TYPES)
+
+    with closing(open_search_db()) as db:
+        stored = {
+            (name, obj_type): (object_id, ddl_time)
+            for object_id, name, obj_type, ddl_time in db.execute(
+                "SELECT id, name, type, last_ddl_time FROM search_objects WHERE dsn = ? AND owner = ?",
+                (analyzer_core.DSN or "", owner)
+            )
+        }
+        stale = sorted(key for key, ddl_time in current.items() if stored.get(key, (None, None))[1] != ddl_time)
+        dropped = [key for key in stored if key not in current]
+        if not stale and not dropped:
+            return 0
+        debug_log("[SEARCH] %s: %s stale, %s dropped of %s objects", owner, len(stale), len(dropped), len(current))
+
+        with db:
+            for key in dropped:
+                drop_object(db, stored[key][0])
+
+        done = 0
+        for (name, obj_type), rows in analyzer_core.iter_object_sources(schema, stale, current):
+            check_cancelled()
+            with db:  # one transaction per object, so a cancelled refresh keeps what it finished
+                if (name, obj_type) in stored:
+                    drop_object(db, stored[(name, obj_type)][0])
+                index_object(db, owner, name, obj_type, current[(name, obj_type)], rows)
+            done += 1
+            if on_progress:
+                on_progress(done, len(stale))
+    return len(stale) + len(dropped)
+
+
+def clear_search_index(schema=None):
+    with closing(open_search_db()) as db, db:
+        if schema:
+            ids = [(object_id,) for (object_id,) in db.execute(
+                "SELECT id FROM search_objects WHERE dsn = ? AND owner = ?", (analyzer_core.DSN or "", schema.upper())
+            )]
+            for (object_id,) in ids:
+                drop_object(db, object_id)
+        else:
+            db.execute("DELETE FROM search_tokens")
+            db.execute("DELETE FROM search_lines")
+            db.execute("DELETE FROM search_objects")
+            db.execute("DELETE FROM search_vocab")
+
+
+# ---------------- Queries ----------------
+def compile_query(query, whole_word=True, case_sensitive=False, regex=False):
+    pattern = query if regex else re.escape(query)
+    if whole_word:
+        pattern = rf"(?<!{WORD_CHAR})(?:{pattern})(?!{WORD_CHAR})"
+    return re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+
+
+def required_runs(pattern):
+    """Runs of word characters that every match of the regex pattern contains, upper-cased.
+
+    Only literals in the top-level sequence (and in plain groups within it) count; anything
+    repeated, optional, alternated or a character class ends a run.
+    """
+    runs = [""]
+
+    def walk(items):
+        for op, arg in items:
+            if op == sre_parse.LITERAL and re.match(r"[\w#]", chr(arg)):
+                runs[-1] += chr(arg)
+            elif op == sre_parse.SUBPATTERN:
+                walk(arg[-1])
+            else:
+                runs.append("")
+
+    walk(sre_parse.parse(pattern))
+    return [run.upper() for run in runs if len(run) >= MIN_RUN_LENGTH]
+
+
+def literal_runs(query, whole_word):
+    """[(run, exact)] for the word runs of a literal query. A run is a complete token (exact)
+    unless it touches an end of the query that is not a whole-word boundary."""
+    runs = []
+    for match in TOKEN.finditer(query.upper()):
+        exact = whole_word or (match.start() > 0 and match.end() < len(query))
+        if exact or len(match.group()) >= MIN_RUN_LENGTH:
+            runs.append((match.group(), exact))
+    return runs
+
+
+def lines_with_tokens(db, tokens):
+    found = set()
+    tokens = list(tokens)
+    for start in range(0, len(tokens), 500):  # stay below SQLite's bind variable limit
+        chunk = tokens[start:start + 500]
+        found.update(db.execute(
+            f"SELECT object_id, line FROM search_tokens WHERE token IN ({', '.join('?' * len(chunk))})", chunk
+        ))
+    return found
+
+
+def candidate_lines(db, runs):
+    """(object_id, line) pairs holding, for every (run, exact), a token equal to the run
+    (exact) or containing it."""
+    candidates = None
+    for run, exact in runs:
+        if exact:
+            tokens = [run]
+        else:
+            like = run.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            tokens = [token for (token,) in db.execute(
+                "SELECT token FROM search_vocab WHERE token LIKE ? ESCAPE '\\'", (f"%{like}%",)
+            )]
+        found = lines_with_tokens(db, tokens)
+        candidates = found if candidates is None else candidates & found
+        if not candidates:
+            break
+    return candidates
+
+
+@perf_trace.timed("Search Source")
+def search_source(schema, query, whole_word=True, case_sensitive=False, regex=False, limit=SEARCH_LIMIT):
+    """Return ([SearchHit, ...], seconds) for query in the indexed sources of schema, ordered
+    by object and line. Call refresh_search_index() first to pick up changed sources."""
+    start = time.perf_counter()
+    pattern = compile_query(query, whole_word, case_sensitive, regex)
+    owner = schema.upper()
+
+    if regex:
+        runs = [(run, False) for run in required_runs(query)]
+    else:
+        runs = literal_runs(query, whole_word)
+
+    hits = []
+    with closing(open_search_db()) as db:
+        objects = {
+            object_id: (name, obj_type)
+            for object_id, name, obj_type in db.execute(
+                "SELECT id, name, type FROM search_objects WHERE dsn = ? AND owner = ?",
+                (analyzer_core.DSN or "", owner)
+            )
+        }
+        candidates = candidate_lines(db, runs) if runs else None
+        if candidates is None:
+            rows = (
+                row for object_id in sorted(objects, key=objects.get)
+                for row in db.execute("SELECT object_id, line, text FROM search_lines WHERE object_id = ? ORDER BY line",
+                                      (object_id,))
+            )
+        else:
+            ordered = sorted((key for key in candidates if key[0] in objects), key=lambda k: (objects[k[0]], k[1]))
+            rows = (
+                (object_id, line, db.execute("SELECT text FROM search_lines WHERE object_id = ? AND line = ?",
+                                             (object_id, line)).fetchone()[0])
+                for object_id, line in ordered
+            )
+        for object_id, line, text in rows:
+            if pattern.search(text):
+                hits.append(SearchHit(owner, *objects[object_id], line, text))
+                if len(hits) >= limit:
+                    break
+
+    seconds = time.perf_counter() - start
+    debug_log("[SEARCH] %r in %s: %s hits in %.1f ms (%s)", query, owner, len(hits), seconds * 1000,
+              "full scan" if candidates is None else f"{len(candidates)} candidate lines")
+    return hits, seconds
@@ -0,0 +1,42 @@
+from plsql_parser import DYNAMIC_TAG, scan_source_operations
+
+
+def rows(source):
+    return list(enumerate(source.split("\n"), 1))
+
+
+def dynamic_hits(source):
+    return [hit for hit in scan_source_operations(rows(source)) if hit[1].endswith(DYNAMIC_TAG)]
+
+
+def test_execute_immediate_literal():
+    assert dynamic_hits("EXECUTE IMMEDIATE 'DELETE FROM audit_log WHERE id = :1' USING p_id;") == [
+        ("AUDIT_LOG", "DELETE" + DYNAMIC_TAG, 1)]
+
+
+def test_execute_immediate_variable_assigned_earlier():
+    source = ("DECLARE\n  v_sql VARCHAR2(200);\nBEGIN\n  v_sql := 'UPDATE orders SET status = 1';\n"
+              "  EXECUTE IMMEDIATE v_sql;\nEND;")
+    assert dynamic_hits(source) == [("ORDERS", "UPDATE" + DYNAMIC_TAG, 4)]
+
+
+def test_concatenation_across_lines():
+    source = "v_sql := 'SELECT a '\n  || 'FROM '\n  || 'customers WHERE 1 = 1';\nEXECUTE IMMEDIATE v_sql INTO x;"
+    assert dynamic_hits(source) == [("CUSTOMERS", "SELECT" + DYNAMIC_TAG, 1)]
+
+
+def test_open_for_string_but_not_static_query():
+    assert dynamic_hits("OPEN c FOR 'SELECT * FROM invoices WHERE id = ' || p_id;") == [
+        ("INVOICES", "SELECT" + DYNAMIC_TAG, 1)]
+    assert scan_source_operations(rows("OPEN c FOR SELECT * FROM static_t;")) == [("STATIC_T", "SELECT", 1)]
+
+
+def test_dbms_sql_parse():
+    assert dynamic_hits("DBMS_SQL.PARSE(cur, 'INSERT INTO staging VALUES (1)', DBMS_SQL.NATIVE);") == [
+        ("STAGING", "INSERT" + DYNAMIC_TAG, 1)]
+
+
+def test_unresolved_operands_are_not_reported():
+    assert dynamic_hits("EXECUTE IMMEDIATE 'DELETE FROM ' || p_table;") == []
+    assert dynamic_hits("EXECUTE IMMEDIATE v_unknown;") == []
+    assert dynamic_hits("EXECUTE IMMEDIATE 'UPDATE ' || get_name() || ' SET a = 1';") == []
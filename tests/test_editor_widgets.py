@@ -0,0 +1,150 @@
+import random
+
+from editor_widgets import IncrementalHighlighter
+from plsql_parser import highlight_line
+
+KEYWORDS = {"SELECT", "FROM", "S"}
+
+
+class FakeTk:
+    def __init__(self, text):
+        self.text = text
+
+    def call(self, *args):
+        if args[0] == "rename":
+            return ""
+        return self.text.tcl(*args[1:])
+
+    def createcommand(self, name, proxy):
+        self.text.proxy = proxy
+
+
+class FakeText:
+    """Just enough of a Tk Text widget for IncrementalHighlighter: text, tags and after()."""
+    _w = ".editor"
+    _tclCommands = None
+
+    def __init__(self, lines):
+        self.lines = [[[ch, set()] for ch in line] for line in lines]
+        self.callbacks = []
+        self.tk = FakeTk(self)
+
+    # Tcl-level commands, reached through the change listener's proxy
+    def tcl(self, command, *args):
+        if command == "index":
+            return "%d.%d" % self.position(args[0])
+        line, col = self.position(args[0])
+        if command == "insert":
+            head, tail = self.lines[line - 1][:col], self.lines[line - 1][col:]
+            new = [[]]
+            for ch in args[1]:
+                if ch == "\n":
+                    new.append([])
+                else:
+                    new[-1].append([ch, set()])
+            new[0] = head + new[0]
+            new[-1] += tail
+            self.lines[line - 1:line] = new
+        elif command == "delete":
+            end_line, end_col = self.position(args[1])
+            if (end_line, end_col) <= (line, col):
+                return ""
+            self.lines[line - 1:end_line] = [self.lines[line - 1][:col] + self.lines[end_line - 1][end_col:]]
+        return ""
+
+    def position(self, index):
+        if index == "end-1c":
+            return len(self.lines), len(self.lines[-1])
+        line, col = index.split(".")
+        line = min(int(line), len(self.lines))
+        return line, len(self.lines[line - 1]) if col == "end" else min(int(col), len(self.lines[line - 1]))
+
+    def insert(self, index, text):
+        self.proxy("insert", index, text)
+
+    def delete(self, start, end):
+        self.proxy("delete", start, end)
+
+    # Widget methods the highlighter calls directly
+    def index(self, index):
+        if index.startswith("@0,"):
+            return "1.0" if index == "@0,0" else f"{len(self.lines)}.0"
+        return self.tcl("index", index)
+
+    def winfo_height(self):
+        return 500
+
+    def get(self, start, end):
+        (first, _), (last, _) = self.position(start), self.position(end)
+        return "\n".join("".join(ch for ch, _ in line) for line in self.lines[first - 1:last])
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+        return len(self.callbacks)
+
+    def run_pending(self, passes=None):
+        while self.callbacks and passes != 0:
+            self.callbacks.pop(0)()
+            passes = None if passes is None else passes - 1
+
+    def tag_remove(self, tag, start, end):
+        (first, _), (last, _) = self.position(start), self.position(end)
+        for line in self.lines[first - 1:last]:
+            for cell in line:
+                cell[1].discard(tag)
+
+    def tag_add(self, tag, *ranges):
+        for start, end in zip(ranges[::2], ranges[1::2]):
+            (line, first), (_, last) = self.position(start), self.position(end)
+            for cell in self.lines[line - 1][first:last]:
+                cell[1].add(tag)
+
+    def tags(self):
+        return [[sorted(tags) for _, tags in line] for line in self.lines]
+
+    def expected_tags(self):
+        expected, state = [], None
+        for line in self.lines:
+            text = "".join(ch for ch, _ in line)
+            spans, state = highlight_line(text, state, KEYWORDS)
+            cells = [set() for _ in text]
+            for tag, start, end in spans:
+                for cell in cells[start:end]:
+                    cell.add(tag)
+            expected.append([sorted(tags) for tags in cells])
+        return expected
+
+
+def make_highlighter(lines, chunk):
+    widget = FakeText(lines)
+    highlighter = IncrementalHighlighter(widget, KEYWORDS)
+    highlighter.TOKENIZE_CHUNK = chunk
+    widget.run_pending()
+    assert widget.tags() == widget.expected_tags()
+    return widget
+
+
+def test_edit_above_an_unfinished_pass_keeps_tokenizing_past_it():
+    widget = make_highlighter(["", "", "S "], chunk=2)
+    widget.insert("1.0", "/*")
+    widget.run_pending(passes=1)  # lines 1-2 done, line 3 still waiting
+    widget.insert("1.2", "x")     # the state after line 1 is unchanged
+    widget.run_pending()
+    assert widget.tags() == widget.expected_tags()
+
+
+def test_random_edits_match_a_full_pass():
+    rng = random.Random(7)
+    alphabet = ["S", " ", "/*", "*/", "'", "--", "\n", "x"]
+    for _ in range(200):
+        widget = make_highlighter(["S x", "", "S", "x S", ""], chunk=2)
+        for _ in range(10):
+            line = rng.randint(1, len(widget.lines))
+            col = rng.randint(0, len(widget.lines[line - 1]))
+            if rng.random() < 0.3 and len(widget.lines) > 1:
+                widget.delete(f"{line}.{col}", f"{min(line + 1, len(widget.lines))}.0")
+            else:
+                widget.insert(f"{line}.{col}", rng.choice(alphabet))
+            widget.run_pending(passes=rng.randint(0, 2))
+        widget.run_pending()
+        assert widget.tags() == widget.expected_tags()
@@ -0,0 +1,98 @@
+from datetime import datetime
+
+import pytest
+
+import analyzer_core
+import metadata_cache
+from metadata_cache import MetadataCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(metadata_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = MetadataCache(ttl=60)
+    cache.put(("columns", "HR", "EMPLOYEES"), ["ID"])
+    clock[0] += 59
+    assert cache.get(("columns", "HR", "EMPLOYEES")) == (True, ["ID"])
+    clock[0] += 1
+    assert cache.get(("columns", "HR", "EMPLOYEES")) == (False, None)
+    assert cache.entries == {}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = MetadataCache(max_entries=2)
+    cache.put(("tables", "HR", ""), ["A"])
+    cache.put(("tables", "SCOTT", ""), ["B"])
+    cache.get(("tables", "HR", ""))  # SCOTT is now the least recently used
+    cache.put(("tables", "SYS", ""), ["C"])
+    assert list(cache.entries) == [("tables", "HR", ""), ("tables", "SYS", "")]
+
+
+def test_invalidate_matches_on_the_given_parts(clock):
+    cache = MetadataCache()
+    for key in [("columns", "HR", "EMPLOYEES"), ("indexes", "HR", "EMPLOYEES"),
+                ("columns", "HR", "JOBS"), ("columns", "SCOTT", "EMP")]:
+        cache.put(key, [])
+    assert cache.invalidate(owner="hr", obj="employees") == 2
+    assert cache.invalidate(kind="columns") == 2
+    assert cache.entries == {}
+
+
+def test_save_and_load_round_trip_per_scope(clock, tmp_path):
+    path = str(tmp_path / "metadata_cache.json")
+    cache = MetadataCache(ttl=60, path=path)
+    cache.bind("db1")
+    cache.put(("triggers", "HR", "EMPLOYEES"), [["TRG", datetime(2024, 5, 1, 12, 0)]])
+    cache.save()
+    cache.bind("db2")
+    cache.put(("tables", "HR", ""), ["OTHER"])
+    cache.save()
+
+    loaded = MetadataCache(ttl=60, path=path)
+    loaded.bind("db1")
+    assert loaded.get(("triggers", "HR", "EMPLOYEES")) == (True, [["TRG", datetime(2024, 5, 1, 12, 0)]])
+    assert loaded.get(("tables", "HR", "")) == (False, None)
+
+    clock[0] += 60
+    expired = MetadataCache(ttl=60, path=path)
+    expired.bind("db1")
+    assert expired.entries == {}
+
+
+def test_unreadable_cache_file_warns_on_stderr_only(tmp_path, capsys):
+    path = tmp_path / "metadata_cache.json"
+    path.write_text("{not json", encoding="utf-8")
+    cache = MetadataCache(path=str(path))
+    assert cache.read_file() == {}
+    out, err = capsys.readouterr()
+    assert out == ""
+    assert "Ignoring unreadable metadata cache" in err
+
+
+def test_prewarm_is_skipped_while_its_entries_are_live(clock, monkeypatch):
+    monkeypatch.setattr(analyzer_core, "metadata_cache", MetadataCache(ttl=60))
+    monkeypatch.setattr(analyzer_core, "data_source", None)
+    monkeypatch.setattr(analyzer_core, "oracle_fetch_query", lambda *args: (["TABLE_NAME"], [("EMPLOYEES",)]))
+    streamed = []
+
+    def stream(query, params=None, batch_size=1000):
+        streamed.append(query)
+        return iter([])
+
+    monkeypatch.setattr(analyzer_core, "stream_query", stream)
+    assert analyzer_core.prewarm_schema("HR") == 1
+    queries = len(streamed)
+    assert analyzer_core.prewarm_schema("HR") == 0
+    assert len(streamed) == queries
+    assert analyzer_core.prewarm_schema("HR", force=True) == 1
+    clock[0] += 60
+    assert analyzer_core.prewarm_schema("HR") == 1
+    analyzer_core.invalidate_metadata("HR")
+    assert analyzer_core.prewarm_schema("HR") == 1
+    assert len(streamed) == 4 * queries
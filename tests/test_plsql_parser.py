@@ -0,0 +1,55 @@
+from plsql_parser import iter_operation_matches, iter_sql_statements, scan_source_operations
+
+
+def rows(source):
+    return list(enumerate(source.split("\n"), 1))
+
+
+def statements(source):
+    return [(st.text.strip(), st.start_line, st.end_line) for st in iter_sql_statements(rows(source))]
+
+
+def static_hits(source):
+    return scan_source_operations(rows(source), dynamic=False)
+
+
+def test_select_split_across_lines_reports_the_select_line():
+    source = "x := 1;\nSELECT a\n  INTO b\n  FROM emp\n WHERE c = 1;"
+    assert statements(source)[1] == ("SELECT a\n  INTO b\n  FROM emp\n WHERE c = 1", 2, 5)
+    assert static_hits(source) == [("EMP", "SELECT", 2)]
+
+
+def test_operation_offsets_point_at_the_keyword():
+    text = "INSERT INTO t1 SELECT * FROM t2"
+    assert [(op, table, text[offset:offset + 6]) for op, table, offset in iter_operation_matches(text)] == [
+        ("INSERT", "t1", "INSERT"), ("SELECT", "t2", "SELECT")]
+
+
+def test_comment_and_terminator_inside_string_literals():
+    source = "v := 'a -- b; DELETE FROM fake' || 'it''s';\nDELETE FROM t1;"
+    first, second = iter_sql_statements(rows(source))
+    assert first.text == "v := '' || ''"
+    assert [contents for _, contents, _ in first.literals] == ["a -- b; DELETE FROM fake", "it's"]
+    assert (second.text.strip(), second.start_line) == ("DELETE FROM t1", 2)
+    assert static_hits(source) == [("T1", "DELETE", 2)]
+
+
+def test_q_quoted_strings():
+    source = "v := q'[it's; -- SELECT x FROM fake]';\nUPDATE t2 SET a = 1;\nw := nQ'{ } '}' ;\nDELETE FROM t3;"
+    first, second, third, fourth = iter_sql_statements(rows(source))
+    assert first.literals[0][1] == "it's; -- SELECT x FROM fake"
+    assert third.literals[0][1] == " } '"
+    assert static_hits(source) == [("T2", "UPDATE", 2), ("T3", "DELETE", 4)]
+
+
+def test_block_comments_do_not_nest_and_span_lines():
+    # Oracle ends a comment at the first */, so "/* a /* b */" is one comment
+    source = "/* a /* b */ SELECT x FROM t3;\n/* multi\nline; DELETE FROM fake\n*/ INSERT INTO t4 VALUES (1);"
+    assert statements(source) == [("SELECT x FROM t3", 1, 1), ("INSERT INTO t4 VALUES (1)", 4, 4)]
+    assert static_hits(source) == [("T3", "SELECT", 1), ("T4", "INSERT", 4)]
+
+
+def test_statement_without_terminator_at_the_end():
+    source = "BEGIN\n  DELETE FROM t5 WHERE x = 1;\n  UPDATE t6\n   SET y = 2"
+    assert statements(source)[-1] == ("UPDATE t6\n   SET y = 2", 3, 4)
+    assert static_hits(source) == [("T5", "DELETE", 2), ("T6", "UPDATE", 3)]
@@ -0,0 +1,58 @@
+from datetime import datetime
+from decimal import Decimal
+
+import oracledb
+import pytest
+
+import analyzer_core
+from query_replay import QueryRecorder, QueryReplay, ReplayMiss
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """A fake live session where dba_segments needs a privilege the user lacks."""
+    def fetch(query, params=None, on_progress=None, batch_size=1000, on_cancel=None):
+        if "dba_segments" in query:
+            raise oracledb.DatabaseError("ORA-00942: table or view does not exist")
+        return ["SUM(BYTES)", "SUM(BLOCKS)"], [(Decimal("65536"), 8)]
+
+    monkeypatch.setattr(analyzer_core, "oracle_fetch_query", fetch)
+    monkeypatch.setattr(analyzer_core, "DB_USER", "HR")
+    monkeypatch.setattr(analyzer_core, "data_source", None)
+
+
+def test_replay_takes_the_recorded_error_path(session, tmp_path, monkeypatch):
+    path = str(tmp_path / "hr.replay.gz")
+    recorder = QueryRecorder(path)
+    monkeypatch.setattr(analyzer_core, "data_source", recorder)
+    live = analyzer_core.get_segment_size("HR", "EMPLOYEES")
+    recorder.save()
+
+    monkeypatch.setattr(analyzer_core, "data_source", QueryReplay(path))
+    assert analyzer_core.get_segment_size("HR", "EMPLOYEES") == live == (Decimal("65536"), 8)
+    with pytest.raises(oracledb.DatabaseError, match="ORA-00942"):
+        analyzer_core.fetch_query("SELECT SUM(bytes), SUM(blocks) FROM dba_segments "
+                                  "WHERE owner = UPPER(:owner) AND segment_name = UPPER(:name)",
+                                  {"owner": "HR", "name": "EMPLOYEES"})
+
+
+def test_replay_round_trips_types_and_reports_misses(session, tmp_path, monkeypatch):
+    rows = [(1, "a", datetime(2024, 5, 1, 12, 30), Decimal("1.5"), b"\x00\xff", None)]
+    monkeypatch.setattr(analyzer_core, "oracle_fetch_query", lambda *args: (["C"] * 6, rows))
+    path = str(tmp_path / "types.replay.gz")
+    recorder = QueryRecorder(path)
+    monkeypatch.setattr(analyzer_core, "data_source", recorder)
+    analyzer_core.fetch_query("SELECT * FROM t WHERE d = :1", [datetime(2024, 5, 1)])
+    recorder.save()
+
+    monkeypatch.setattr(analyzer_core, "data_source", QueryReplay(path))
+    assert analyzer_core.fetch_query("SELECT * FROM t WHERE d = :1", [datetime(2024, 5, 1)]) == (["C"] * 6, rows)
+    with pytest.raises(ReplayMiss):
+        analyzer_core.fetch_query("SELECT * FROM t WHERE d = :1", [datetime(2024, 5, 2)])
+
+
+def test_missing_dba_segments_privilege_is_not_a_warning(session, capsys, monkeypatch):
+    monkeypatch.setattr(analyzer_core, "LOG_LEVEL", "warn")
+    monkeypatch.setattr(analyzer_core, "DEBUG", False)
+    assert analyzer_core.get_segment_size("HR", "EMPLOYEES") == (Decimal("65536"), 8)
+    assert "Segment size lookup failed" not in capsys.readouterr().err
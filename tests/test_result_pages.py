@@ -0,0 +1,53 @@
+from collections import OrderedDict
+
+from result_pages import RESULT_CACHE_PAGES, RESULT_PAGE_SIZE, get_result_page, get_result_rows
+
+
+class FakeCursor:
+    """Scrollable cursor over a list; scroll(n, mode="absolute") makes row n (1-based) the next one."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.position = 0
+
+    def fetchmany(self, size):
+        rows = self.rows[self.position:self.position + size]
+        self.position += len(rows)
+        return rows
+
+    def scroll(self, value, mode):
+        assert mode == "absolute" and 1 <= value <= len(self.rows)
+        self.position = value - 1
+
+
+def open_view(row_count):
+    cursor = FakeCursor([(i,) for i in range(row_count)])
+    view = {"cursor": cursor, "rows": None, "pages": OrderedDict(), "next_page": 1,
+            "known_rows": 0, "total": None}
+    view["pages"][0] = cursor.fetchmany(RESULT_PAGE_SIZE)
+    return view
+
+
+def expected_page(page):
+    return [(i,) for i in range(page * RESULT_PAGE_SIZE, (page + 1) * RESULT_PAGE_SIZE)]
+
+
+def test_reading_ahead_skips_past_cached_pages():
+    view = open_view(40 * RESULT_PAGE_SIZE)
+    for page in range(25):
+        assert get_result_page(view, page) == expected_page(page)
+    get_result_page(view, 0)   # evicted: scrolls the cursor back
+    get_result_page(view, 10)  # cached: the cursor stays after page 0
+
+    assert get_result_page(view, 25) == expected_page(25)
+    assert view["next_page"] == 26
+    assert len(view["pages"]) <= RESULT_CACHE_PAGES
+
+
+def test_rows_across_pages_and_row_count():
+    view = open_view(3 * RESULT_PAGE_SIZE + 5)
+    start = 2 * RESULT_PAGE_SIZE - 3
+    assert get_result_rows(view, start, 10) == [(i,) for i in range(start, start + 10)]
+    assert get_result_rows(view, 3 * RESULT_PAGE_SIZE, 50) == [(i,) for i in range(3 * RESULT_PAGE_SIZE, 3 * RESULT_PAGE_SIZE + 5)]
+    assert view["total"] == 3 * RESULT_PAGE_SIZE + 5
+    assert get_result_page(view, 4) == []
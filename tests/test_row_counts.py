@@ -0,0 +1,34 @@
+import pytest
+
+import analyzer_core
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    sent = []
+
+    def fetch(query, params=None, *args):
+        sent.append(query)
+        return ["C"], [(42, 42)]
+
+    monkeypatch.setattr(analyzer_core, "data_source", None)
+    monkeypatch.setattr(analyzer_core, "oracle_fetch_query", fetch)
+    return sent
+
+
+def test_count_queries_quote_the_table_name(queries):
+    assert analyzer_core.exact_row_count("hr", "Employees") == 42
+    analyzer_core.sample_row_count("HR", "JOB$HIST#", 5)
+    assert queries[0] == 'SELECT COUNT(*) FROM "HR"."EMPLOYEES"'
+    assert '"HR"."JOB$HIST#" SAMPLE BLOCK (5.0)' in queries[1]
+
+
+@pytest.mark.parametrize("schema, table", [
+    ("HR", "X; DROP TABLE T"), ("HR", 'EMP"--'), ("HR DUAL,", "EMP"), ("HR", ""), ("HR", "1EMP"),
+])
+def test_count_queries_reject_anything_but_identifiers(queries, schema, table):
+    with pytest.raises(ValueError):
+        analyzer_core.exact_row_count(schema, table)
+    with pytest.raises(ValueError):
+        analyzer_core.sample_row_count(schema, table)
+    assert queries == []
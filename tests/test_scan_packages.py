@@ -0,0 +1,56 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import analyzer_core
+
+PACKAGES = [f"PKG_{i:02}" for i in range(60)]
+
+
+@pytest.fixture
+def schema(tmp_path, monkeypatch):
+    """60 packages, none cached; counts the all_source queries of each kind."""
+    monkeypatch.setattr(analyzer_core, "SOURCE_DB_PATH", str(tmp_path / "source.db"))
+    monkeypatch.setattr(analyzer_core, "DSN", "db")
+    monkeypatch.setattr(analyzer_core, "data_source", None)
+    monkeypatch.setattr(analyzer_core, "get_session_pool", lambda: SimpleNamespace(max=8))
+    queries = {"stream": 0, "fetch": 0}
+    lock = threading.Lock()
+
+    def source(name):
+        return [(1, f"SELECT a FROM t_{name} WHERE 1 = 1;")]
+
+    def fetch(query, params=None, *args):
+        if "all_objects" in query:
+            return ["NAME", "TYPE", "DDL"], [(pkg, "PACKAGE BODY", "2024-01-01") for pkg in PACKAGES]
+        with lock:
+            queries["fetch"] += 1
+        return ["LINE", "TEXT"], source(params[1])
+
+    def stream(query, params=None, batch_size=1000):
+        queries["stream"] += 1
+        names = sorted(value for key, value in params.items() if key.startswith("n"))
+        return iter([(name, line, text) for name in names for line, text in source(name)])
+
+    monkeypatch.setattr(analyzer_core, "oracle_fetch_query", fetch)
+    monkeypatch.setattr(analyzer_core, "stream_query", stream)
+    return queries
+
+
+def expected():
+    return {pkg: [(f"T_{pkg}", "SELECT", 1)] for pkg in PACKAGES}
+
+
+def test_bulk_scan_streams_instead_of_one_query_per_package(schema):
+    assert analyzer_core.scan_packages("HR", PACKAGES, workers=4) == expected()
+    assert schema == {"stream": 1, "fetch": 0}
+
+
+def test_incremental_scan_fetches_each_package_on_worker_threads(schema):
+    progress = []
+    result = analyzer_core.scan_packages("HR", PACKAGES, workers=4, bulk=False,
+                                         on_progress=lambda done, total: progress.append((done, total)))
+    assert result == expected() and list(result) == PACKAGES
+    assert schema == {"stream": 0, "fetch": 60}
+    assert progress[-1] == (60, 60)
@@ -0,0 +1,55 @@
+import analyzer_core
+
+
+def test_bulk_refetch_streams_only_the_stale_packages(tmp_path, monkeypatch):
+    monkeypatch.setattr(analyzer_core, "SOURCE_DB_PATH", str(tmp_path / "source.db"))
+    monkeypatch.setattr(analyzer_core, "DSN", "db")
+    monkeypatch.setattr(analyzer_core, "XREF_BULK_THRESHOLD", 2)
+    monkeypatch.setattr(analyzer_core, "SOURCE_IN_LIST_LIMIT", 3)
+    packages = [f"PKG_{i}" for i in range(8)]
+    versions = {pkg: ("PACKAGE BODY", "2024-01-01") for pkg in packages}
+    for pkg in packages[:3]:
+        analyzer_core.store_source("HR", pkg, *versions[pkg], [(1, f"cached {pkg}")])
+
+    streamed = []
+
+    def stream(query, params=None, batch_size=1000):
+        names = sorted(value for key, value in params.items() if key != "owner")
+        streamed.append(names)
+        return iter([(name, 1, f"fetched {name}") for name in names])
+
+    monkeypatch.setattr(analyzer_core, "stream_query", stream)
+    sources = dict(analyzer_core.iter_package_sources("HR", packages, versions))
+
+    assert streamed == [["PKG_3", "PKG_4", "PKG_5"], ["PKG_6", "PKG_7"]]
+    assert sources == {pkg: [(1, f"{'cached' if pkg < 'PKG_3' else 'fetched'} {pkg}")] for pkg in packages}
+    assert dict(analyzer_core.iter_package_sources("HR", packages, versions)) == sources  # now all cached
+    assert len(streamed) == 2
+
+
+def test_bulk_object_refetch_streams_only_stale_names_and_reports_empty_ones(tmp_path, monkeypatch):
+    monkeypatch.setattr(analyzer_core, "SOURCE_DB_PATH", str(tmp_path / "source.db"))
+    monkeypatch.setattr(analyzer_core, "DSN", "db")
+    monkeypatch.setattr(analyzer_core, "XREF_BULK_THRESHOLD", 2)
+    monkeypatch.setattr(analyzer_core, "SOURCE_IN_LIST_LIMIT", 2)
+    objects = [("PKG_A", "PACKAGE BODY"), ("PKG_A", "PACKAGE"), ("PROC_B", "PROCEDURE"), ("TRG_C", "TRIGGER")]
+    ddl_times = {key: "2024-01-01" for key in objects}
+    streamed = []
+
+    def stream(query, params=None, batch_size=1000):
+        names = sorted(value for key, value in params.items() if key.startswith("n"))
+        types = {value for key, value in params.items() if key.startswith("t")}
+        streamed.append(names)
+        return iter([(name, obj_type, 1, f"{obj_type} {name}") for name, obj_type in sorted(objects)
+                     if name in names and obj_type in types and name != "TRG_C"])
+
+    monkeypatch.setattr(analyzer_core, "stream_query", stream)
+    sources = dict(analyzer_core.iter_object_sources("HR", objects, ddl_times))
+
+    assert streamed == [["PKG_A", "PROC_B"], ["TRG_C"]]
+    assert sources == {
+        ("PKG_A", "PACKAGE BODY"): [(1, "PACKAGE BODY PKG_A")],
+        ("PKG_A", "PACKAGE"): [(1, "PACKAGE PKG_A")],
+        ("PROC_B", "PROCEDURE"): [(1, "PROCEDURE PROC_B")],
+        ("TRG_C", "TRIGGER"): [],
+    }
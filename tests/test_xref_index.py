@@ -0,0 +1,30 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+import analyzer_core
+
+
+@pytest.fixture
+def schema(tmp_path, monkeypatch):
+    """Two packages in HR; the scan writes to the index from another connection midway."""
+    monkeypatch.setattr(analyzer_core, "XREF_DB_PATH", str(tmp_path / "xref.db"))
+    monkeypatch.setattr(analyzer_core, "DSN", "db")
+    monkeypatch.setattr(analyzer_core, "data_source", None)
+    monkeypatch.setattr(analyzer_core, "oracle_fetch_query", lambda *args: (
+        ["OBJECT_NAME", "LAST_DDL_TIME"], [("PKG_A", datetime(2024, 1, 1)), ("PKG_B", datetime(2024, 1, 2))]))
+
+    def scan(schema, packages, workers, bulk, on_progress):
+        with sqlite3.connect(analyzer_core.XREF_DB_PATH, timeout=0) as other:  # fails if the lock is held
+            other.execute("INSERT INTO xref_packages VALUES ('other', 'HR', 'PKG_X', '')")
+        return {pkg: [("EMPLOYEES", "SELECT", 10)] for pkg in packages}
+
+    monkeypatch.setattr(analyzer_core, "scan_packages", scan)
+
+
+def test_refresh_does_not_hold_the_write_lock_while_scanning(schema):
+    assert analyzer_core.refresh_xref_index("HR") == 2
+    usage = analyzer_core.lookup_table_usage("HR", "EMPLOYEES")
+    assert sorted(pkg for _, _, pkg in usage) == ["PKG_A", "PKG_B"]
+    assert analyzer_core.refresh_xref_index("HR") == 0